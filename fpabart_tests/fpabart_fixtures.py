@@ -14,36 +14,49 @@ is not permitted without specific, written prior permission from
 Fisher & Paykel Appliances Limited.
 """
 
+import json
 import logging
+import os
 import pytest
 
-from appium.options.android import UiAutomator2Options
 from appium.webdriver import Remote
-from appium.webdriver.appium_service import AppiumService
+from modules.appium_driver.session_broker import APPIUM_PORT, get_session_broker
+from modules.appium_driver.webdriver_metrics import instrument
 
 
+IPB_PORT_ENVIRONMENT_VARIABLE = "FPABART_IPB_PORT"
+IPB_CAPTURE_ENVIRONMENT_VARIABLE = "FPABART_IPB_CAPTURE"
+NEW_APPIUM_SESSION_ENVIRONMENT_VARIABLE = "FPABART_NEW_APPIUM_SESSION"
+APPIUM_PORT_ENVIRONMENT_VARIABLE = "FPABART_APPIUM_PORT"
+CAPABILITIES_ENVIRONMENT_VARIABLE = "FPABART_CAPABILITIES_FILE"
+
 logger = logging.getLogger(__name__)
 
 _appium_driver = None
+_dryer_control = None
 
 
 @pytest.fixture
 def appium_driver() -> Remote:
     """Create the Appium driver.
 
+    The Appium server and session are reused from earlier runs when they are still alive (see 'session_broker'). Set
+    the 'FPABART_NEW_APPIUM_SESSION' environment variable to always create a new session.
+
+    The device pool scheduler sets 'FPABART_APPIUM_PORT' and 'FPABART_CAPABILITIES_FILE' to run on one of several rigs.
+    Without them, the default Appium port and the capabilities below are used.
+
+    Every command the driver sends is timed (see 'webdriver_metrics'), and the hooks write each step's totals to its
+    step attributes.
+
     Returns:
         Remote: The Appium driver.
     """
     global _appium_driver
 
     if _appium_driver is None:
-        appium_address = "127.0.0.1"
-        appium_port = 4723
-
-        # Start the Appium server before we create the Appium driver.
-        logger.debug(f"Starting Appium service at {appium_address}:{appium_port}")
-        service = AppiumService()
-        service.start(args=["--address", appium_address, "-p", str(appium_port)], timeout_ms=20000)
+        capabilities_path = os.environ.get(CAPABILITIES_ENVIRONMENT_VARIABLE)
+        port = int(os.environ.get(APPIUM_PORT_ENVIRONMENT_VARIABLE, APPIUM_PORT))
 
         capabilities = {
             "platformName": "Android",
@@ -56,12 +69,67 @@ def appium_driver() -> Remote:
             "fullReset": "false",
         }
 
+        if capabilities_path is not None:
+            with open(capabilities_path, "r") as file:
+                capabilities = json.load(file)
+
         logger.debug(f"Loading capabilities: {capabilities}")
-        options = UiAutomator2Options().load_capabilities(capabilities)
-        logger.debug(f"Creating Appium driver at http://{appium_address}:{appium_port}")
-        driver = Remote(f"http://{appium_address}:{appium_port}", options=options)
+        reuse_session = NEW_APPIUM_SESSION_ENVIRONMENT_VARIABLE not in os.environ
+        driver = get_session_broker(port).get_driver(capabilities, reuse_session)  # Starts the server only if needed.
+        instrument(driver)  # Time every WebDriver command so the report can show where each step's time went.
 
         logger.info("Successfully set up Appium!")
         _appium_driver = driver
 
     return _appium_driver
+
+
+def _close_dryer_control() -> None:
+    """Stop the dryer's IPB reader, then close its capture file, at the end of the test session."""
+    global _dryer_control
+
+    if _dryer_control is not None:
+        _dryer_control.stop_reader()  # Sends any queued writes, which are recorded to the capture.
+        _dryer_control.stop_capture()
+        _dryer_control = None
+
+
+@pytest.fixture
+def dryer_control(request: pytest.FixtureRequest):
+    """Connect to the dryer's IPB port.
+
+    The port is read from the 'FPABART_IPB_PORT' environment variable. For example: "COM3" or "/dev/ttyUSB0". If the
+    'FPABART_IPB_CAPTURE' environment variable is set, every frame is recorded to the capture file it names.
+
+    The connection is shared by every test in the session, and its reader and capture are stopped when the session
+    ends.
+
+    Args:
+        request (pytest.FixtureRequest): The pytest request, for registering the session teardown.
+
+    Returns:
+        HD_control: The dryer's IPB controller.
+    """
+    global _dryer_control
+
+    if _dryer_control is None:
+        from modules.ipb.high_spec_dryer_control import HD_control
+
+        port = os.environ.get(IPB_PORT_ENVIRONMENT_VARIABLE)
+
+        if port is None:
+            raise RuntimeError(f"Set '{IPB_PORT_ENVIRONMENT_VARIABLE}' to the dryer's IPB port!")
+
+        logger.debug(f"Connecting to the dryer's IPB port: {port}")
+        _dryer_control = HD_control(port)  # ERD definitions come from the cached ERD index.
+
+        capture_path = os.environ.get(IPB_CAPTURE_ENVIRONMENT_VARIABLE)
+
+        if capture_path is not None:
+            logger.debug(f"Recording the IPB traffic to: {capture_path}")
+            _dryer_control.start_capture(capture_path)
+
+        _dryer_control.start_reader()  # Keep reading ERD events while the test drives the UI.
+        request.session.addfinalizer(_close_dryer_control)
+
+    return _dryer_control
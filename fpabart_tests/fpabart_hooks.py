@@ -20,15 +20,23 @@ Fisher & Paykel Appliances Limited.
 
 import fpabart as bart
 import logging
+import os
 import shutil
 import sys
 
 from datetime import datetime
+from modules.appium_driver.webdriver_metrics import get_active_metrics
+from modules.ipb.erd_time_series import get_active_store
 from pathlib import Path
+from time import monotonic
 
 
 START_TIMESTAMP_KEY = "start_timestamp"
 END_TIMESTAMP_KEY = "end_timestamp"
+ERD_TIME_SERIES_KEY = "erd_time_series"
+WEBDRIVER_METRICS_KEY = "webdriver_metrics"
+
+WORKER_ENVIRONMENT_VARIABLE = "FPABART_WORKER"  # Set by the device pool scheduler in each rig's worker.
 
 FPABART_JSON_FILE_RELATIVE_PATH = Path("fpabart.json")
 REPORTS_DIRECTORY_RELATIVE_PATH = Path("reports")
@@ -37,6 +45,8 @@ LATEST_REPORT_DIRECTORY_RELATIVE_PATH = REPORTS_DIRECTORY_RELATIVE_PATH / Path("
 
 logger = logging.getLogger()
 
+_scenario_start_time = None  # From 'time.monotonic()', to find the ERD values received during the scenario.
+
 
 def _get_timestamp() -> str:
     """Get the current timestamp.
@@ -115,6 +125,9 @@ def before_feature():
 
 def before_scenario():
     """'fpabart' runs this at the start of each scenario."""
+    global _scenario_start_time
+    _scenario_start_time = monotonic()
+
     bart.scenario_attribute(START_TIMESTAMP_KEY, _get_timestamp())
 
 
@@ -122,16 +135,33 @@ def before_step():
     """'fpabart' runs this at the start of each step."""
     bart.step_attribute(START_TIMESTAMP_KEY, _get_timestamp())
 
+    metrics = get_active_metrics()
+
+    if metrics is not None:
+        metrics.start_step()
+
 
 def after_step():
     """'fpabart' runs this after each step."""
     bart.step_attribute(END_TIMESTAMP_KEY, _get_timestamp())
 
+    # If the step used the Appium driver, save where its time went so the report can show the slowest steps.
+    metrics = get_active_metrics()
+
+    if metrics is not None:
+        bart.step_attribute(WEBDRIVER_METRICS_KEY, metrics.end_step())
+
 
 def after_scenario():
     """'fpabart' runs this after each scenario."""
     bart.scenario_attribute(END_TIMESTAMP_KEY, _get_timestamp())
 
+    # If the scenario used the IPB, save the ERD values received during it so the report can plot them.
+    store = get_active_store()
+
+    if store is not None and _scenario_start_time is not None:
+        bart.scenario_attribute(ERD_TIME_SERIES_KEY, store.export(_scenario_start_time, monotonic()))
+
 
 def after_feature():
     """'fpabart' runs this after each feature."""
@@ -144,5 +174,13 @@ def on_session_closing():
 
 
 def last_hook():
-    """'fpabart' runs this once after it generates the 'fpabart.json' file."""
+    """'fpabart' runs this once after it generates the 'fpabart.json' file.
+
+    Workers started by the device pool scheduler leave 'fpabart.json' in place; the scheduler merges the workers'
+    results and creates one report.
+    """
+    if WORKER_ENVIRONMENT_VARIABLE in os.environ:
+        logger.info(f"Leaving the results of worker '{os.environ[WORKER_ENVIRONMENT_VARIABLE]}' for the scheduler")
+        return
+
     _create_report()
@@ -1,8 +1,11 @@
 import logging
+import sys
 
-from appium.options.android import UiAutomator2Options
-from appium.webdriver import Remote
-from appium.webdriver.appium_service import AppiumService
+from pathlib import Path
+
+sys.path.append(str(Path(__file__).resolve().parents[1]))  # The root of the repository.
+
+from modules.appium_driver.session_broker import AppiumSessionBroker  # noqa: E402
 
 
 logging.basicConfig(
@@ -17,9 +20,9 @@ appium_address = "127.0.0.1"
 appium_port = 4723
 print("1")
 
-service = AppiumService()
+broker = AppiumSessionBroker(appium_address, appium_port)
 print("2")
-service.start(args=["--address", appium_address, "-p", str(appium_port)], timeout_ms=20000)
+broker.ensure_server()  # Reuses a running server; starts one only if the status check fails.
 print("3")
 
 capabilities = {
@@ -34,7 +37,6 @@ capabilities = {
 }
 print("4")
 
-options = UiAutomator2Options().load_capabilities(capabilities)
 print("5")
-driver = Remote(f"http://{appium_address}:{appium_port}", options=options)
+driver = broker.get_driver(capabilities)  # Reattaches to the last session if it is alive.
 print("6")
@@ -2,9 +2,7 @@ import fpabart as bart
 import modules.appium_driver.appium_driver_helper as appium_driver_helper
 from time import sleep
 import random
-from PythonCommsBusHijack.erd_lib import ERDLib
-from PythonCommsBusHijack.ipb_control import IPB_Control
-from high_spec_dryer_control import HD_control  # Import HD_control class
+from modules.ipb.high_spec_dryer_control import HD_control  # Import HD_control class
 
 
 # Testing out capTouch
@@ -26,7 +24,7 @@ def test_running_auto(appium_driver):
     # Check for material options and click one
     bart.step("Check that all materials are present")
     material_options = ["Mixed", "Cotton", "Polyester", "Silk", "Elastane", "Linen", "Down"]
-    sleep(1)
+    appium_driver_helper.wait_for_screen(appium_driver, ["Down", "Mixed"])
     appium_driver_helper.swipe(appium_driver, "Down", "Mixed", 2)
     material_options = ["Acrylic", "Viscose", "Lyocell", "Hemp", "Ramie", "Nylon"]
     chosen_material = random.choice(material_options)
@@ -34,7 +32,7 @@ def test_running_auto(appium_driver):
     bart.step(f"Selecting random material: {chosen_material}")
     material_element = appium_driver_helper.get_element(appium_driver, chosen_material)
     material_element.click()
-    sleep(3)
+    appium_driver_helper.wait_until_stable(appium_driver)
 
     # Verify that the time is set to "AUTO"
     bart.step("Check if time is set to Auto")
@@ -55,8 +53,7 @@ def test_running_auto(appium_driver):
 
     # Send CapTouch command using HD_control class
     port = "COM_PORT"  # Replace "COM_PORT" with the actual COM port
-    erd_lib = ERDLib()  # Initialize ERDLib
-    dryer_control = HD_control(port, erd_lib)
+    dryer_control = HD_control(port)  # ERD definitions come from the shared, cached ERD index
     dryer_control.dryer_start_pause()
 
     # Verify I am on Running Cycle Screen
@@ -68,7 +65,7 @@ def test_running_auto(appium_driver):
     # Display current cycle state
     bart.step("Check for current cycle state")
     cycle_status = ["Fill", "Wash", "Rinse", "Spin", "Dry", "Cooling", "Load sensing", "Steam"]
-    sleep(3)
+    appium_driver_helper.wait_until_stable(appium_driver)
     appium_driver_helper.get_element(appium_driver, cycle_status)
 
     # Wait for 30 seconds of no interaction
@@ -78,18 +75,11 @@ def test_running_auto(appium_driver):
     # Check footer and hamburger menu disappears
     bart.step("Hamburger and Footer Menu Disappears")
     menu_btns = ["Cancel", "Options", "Add item"]
-    all_disappeared = True
-    for element in menu_btns:
-        try:
-            appium_driver_helper.get_element(appium_driver, element, max_attempts=1)
-            print(f"{element} did not disappear.")
-            all_disappeared = False
-        except RuntimeError:
-            pass
-    if all_disappeared:
+    present_btns = appium_driver_helper.get_present_elements(appium_driver, menu_btns)
+    for element in present_btns:
+        print(f"{element} did not disappear.")
+    if not present_btns:
         print("Footer and hamburger menu disappeared as expected.")
 
     bart.step("Complete Scenario")
-    appium_driver.terminate_app("com.fisherpaykel.laundry.fcs200")
-    sleep(2)
-    appium_driver.activate_app("com.fisherpaykel.laundry.fcs200")
\ No newline at end of file
+    appium_driver_helper.restart_app(appium_driver)
\ No newline at end of file
@@ -1,12 +1,15 @@
 """."""
 
 import json
+import sys
+
+from pathlib import Path
+
+# Make the repository's 'modules' package importable when this directory is run as a standalone script.
+sys.path.append(str(Path(__file__).resolve().parents[4]))
 
-from appium import webdriver
-from appium.webdriver.appium_service import AppiumService
 from appium.webdriver.common.appiumby import AppiumBy as By
 from selenium.webdriver.support import expected_conditions as EC
-from appium.options.android import UiAutomator2Options
 from selenium.webdriver.support.ui import WebDriverWait
 from selenium.webdriver.common.action_chains import ActionChains
 from selenium.webdriver.common.actions import interaction
@@ -14,20 +17,20 @@ from selenium.webdriver.common.actions.action_builder import ActionBuilder
 from selenium.webdriver.common.actions.pointer_input import PointerInput
 from selenium.common.exceptions import NoSuchElementException
 from PIL import ImageChops
+from modules.appium_driver import appium_driver_helper
+from modules.appium_driver.locator_cache import get_locator_cache
+from modules.appium_driver.session_broker import AppiumSessionBroker, get_session_broker
 
 APPIUM_PORT = 4723
 APPIUM_HOST = "127.0.0.1"
 driver = None
 
 
-def appium_service():
-    """Connect to the Appium server."""
-    service = AppiumService()
-    service.start(
-        args=["--address", APPIUM_HOST, "-p", str(APPIUM_PORT)],
-        timeout_ms=20000,
-    )
-    return service
+def appium_service() -> AppiumSessionBroker:
+    """Connect to the Appium server, starting it only if no healthy server is already running."""
+    broker = get_session_broker()
+    broker.ensure_server()
+    return broker
 
 
 # Function to create a new driver instance
@@ -47,12 +50,9 @@ def init_global_driver():
     """."""
     global driver
     print("##### Creating driver")
-    appium_host = f"http://{APPIUM_HOST}:{APPIUM_PORT}"
 
     with open("capabilities.json", "r") as file:
-        appium_options = UiAutomator2Options().load_capabilities(json.load(file))
-
-    driver = webdriver.Remote(appium_host, options=appium_options)
+        driver = get_session_broker().get_driver(json.load(file))  # Reattaches to the last session if it is alive.
 
 
 def search_modes(identifier: str):
@@ -102,16 +102,21 @@ def wait_for_by(by, identifier):
 def find_element(identifier: str):
     """Find an element with the given identifier.
 
-    It tries different search modes until the element is found.
+    It tries different search modes until the element is found, starting with the search mode which found it last
+    time (see 'locator_cache'). The search mode which finds it is remembered for next time.
     It returns the found element, or None if no element is found.
     """
     print("Find element:", identifier, "...")
 
+    app_package = appium_driver_helper.get_app_package(driver)  # The same cache bucket as 'appium_driver_helper'.
+    locator_cache = get_locator_cache()
+
     element = None
-    for by, locator in search_modes(identifier):
+    for search_mode_index, (by, locator) in locator_cache.order(app_package, identifier, search_modes(identifier)):
         if wait_for_by(by, locator):
             element = find_element_by(by, locator)
             if element is not None:
+                locator_cache.record(app_package, identifier, search_mode_index)
                 break
 
     if element is None:
@@ -144,82 +149,20 @@ MAX_DEPTH = 5
 def get_text(element, depth=MAX_DEPTH):
     """Retrieve the "innerText" of a provided element.
 
-    It will also retrieve text from children elements.
+    It will also retrieve text from children elements, reading the whole subtree from one UI snapshot (see
+    'appium_driver_helper.get_text').
     It returns a list of texts [string].
     """
-    if depth < 0:
-        return []  # Return an empty list if maximum depth is exceeded
-    if element is None:
-        return []
-
-    texts = []
-
-    try:
-        # Retrieve the content description text
-        text = element.get_attribute("content-desc")
-        if text not in [None, "", "null"]:
-            texts.append(text)
-    except Exception as e:
-        print(f"Error retrieving text: {e}")
-
-    # Find child elements
-    try:
-        children = element.find_elements(By.XPATH, ".//*/child::*")
-        for child in children:
-            child_texts = get_text(child, depth - 1)
-            texts.extend(child_texts)  # Append texts from children
-    except Exception as e:
-        print(f"Error finding children: {e}")
-
-    return texts
+    return appium_driver_helper.get_text(driver, element, depth)
 
 
 def get_attributes(element):
     """Extract the attributes of a given element.
 
+    The attributes are read from one UI snapshot (see 'appium_driver_helper.get_attributes').
     It returns a dictionary of attributes.
     """
-    if element is None:
-        return {}
-
-    attrs = ["location", "tag_name", "size"]
-    # 'text', 'rect'
-    attributes = [
-        "package",
-        "class",
-        "content-desc",
-        "resource-id",
-        "enabled",
-        "checkable",
-        "checked",
-        "clickable",
-        "focusable",
-        "focused",
-        "long-clickable",
-        "scrollable",
-        "selected",
-        "displayed",
-    ]
-    # 'password', 'bounds'
-
-    data = {}
-    try:
-        for a in attrs:
-            try:
-                if hasattr(element, a):
-                    data[a] = getattr(element, a)
-            except Exception as e:
-                print(e)
-        for attr in attributes:
-            try:
-                data[attr] = element.get_attribute(attr)
-            except Exception as e:
-                print(e)
-
-    except Exception as e:
-        print(f"Error while accessing element: {e}")
-
-    return data
+    return appium_driver_helper.get_attributes(element)
 
 
 def swipe(start_location_ID, end_location_ID, repetitions):
@@ -243,6 +186,8 @@ def swipe(start_location_ID, end_location_ID, repetitions):
         actions.w3c_actions.pointer_action.release()
         actions.perform()
 
+    appium_driver_helper.invalidate_snapshot(driver)
+
 
 def verify_element_text(identifier: str, expected_text: str):
     """."""
@@ -38,8 +38,9 @@ def options():
       
     logger.step("I verify item type option and default value")
     item_type_dryer = Start.find_element("option-card-item-type")
-    item_type_title =Start.get_text(item_type_dryer)[0]
-    item_type_default = Start.get_text(item_type_dryer)[1]
+    item_type_dryer_texts = Start.get_text(item_type_dryer)
+    item_type_title = item_type_dryer_texts[0]
+    item_type_default = item_type_dryer_texts[1]
     # print(item_type_title)
     # print(item_type_default)
     if item_type_title == "Item type" and item_type_default == "Moderate":
@@ -49,8 +50,9 @@ def options():
       
     logger.step("I verify dryness level option and default value")
     dryness_level = Start.find_element("option-card-dryness level")
-    dryness_level_title =Start.get_text(dryness_level)[0]
-    dryness_level_default = Start.get_text(dryness_level)[1]
+    dryness_level_texts = Start.get_text(dryness_level)
+    dryness_level_title = dryness_level_texts[0]
+    dryness_level_default = dryness_level_texts[1]
     if dryness_level_title == "dryness level" and dryness_level_default == "dry":
       logger.result(Result.PASS)
     else:
@@ -59,8 +61,9 @@ def options():
       
     logger.step("I verify rack dry option and default value")
     rack_dry = Start.find_element("option-card-rack dry")
-    rack_dry_title =Start.get_text(rack_dry)[0]
-    rack_dry_default = Start.get_text(rack_dry)[1]
+    rack_dry_texts = Start.get_text(rack_dry)
+    rack_dry_title = rack_dry_texts[0]
+    rack_dry_default = rack_dry_texts[1]
     if rack_dry_title == "rack dry" and rack_dry_default == "Off":
       logger.result(Result.PASS)
     else:
@@ -69,8 +72,9 @@ def options():
     
     logger.step("I verify treatment option and default value")
     treatment = Start.find_element("option-card-Treatment")
-    treatment_title =Start.get_text(treatment)[0]
-    treatment_default = Start.get_text(treatment)[1]
+    treatment_texts = Start.get_text(treatment)
+    treatment_title = treatment_texts[0]
+    treatment_default = treatment_texts[1]
     if treatment_title == "Treatment" and treatment_default == "dry":
       logger.result(Result.PASS)
     else:
@@ -79,8 +83,9 @@ def options():
       
     logger.step("I verify time option and default value")
     time = Start.find_element("option-card-time")
-    time_title =Start.get_text(time)[0]
-    time_default = Start.get_text(time)[1]
+    time_texts = Start.get_text(time)
+    time_title = time_texts[0]
+    time_default = time_texts[1]
     if time_title == "time" and time_default == "Auto":
       logger.result(Result.PASS)
     else:
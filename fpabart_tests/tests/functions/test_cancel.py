@@ -1,48 +1,15 @@
 import fpabart as bart
 import modules.appium_driver.appium_driver_helper as appium_driver_helper
+import modules.appium_driver.screen_navigator as screen_navigator
 from time import sleep
-import random
 
 @bart.scenario("Cancel during active cycle")
 def test_cancel_active(appium_driver):
     """Cancel dry cycle when screen is active """
 
-    #Check that I am on Home Screen
-    bart.step("Check for screen title")
-    dyer_title = appium_driver_helper.get_element(appium_driver, "title")
-
-    dyer_title_text = appium_driver_helper.get_text(appium_driver, dyer_title)
-    if dyer_title_text == "DRYER":
-        print("Home screen title verification passed.")
-    else:
-        print("Home screen title verification failed.")
-
-    # Check for material options and click one
-    bart.step("Check that all materials are present")
-    material_options =  ["Mixed", "Cotton", "Polyester", "Wool", "Silk", "Elastane", "Linen", "Down",] # Wool and cashmere does not have auto
-    sleep(1)
-    appium_driver_helper.swipe(appium_driver, "Down", "Mixed", 2)
-    material_options = ["Cashmere", "Acrylic", "Viscose", "Lyocell",  "Hemp", "Ramie", "Nylon"]
-    chosen_material = random.choice(material_options)
-
-    bart.step(f"Selecting random material: {chosen_material}")
-    material_element = appium_driver_helper.get_element(appium_driver, chosen_material)
-    material_element.click()
-    sleep(3)
-
-    #Click on Start button
-    bart.step("Click start")
-    start_btn = appium_driver_helper.get_element(appium_driver, "button-start") 
-    start_btn.click()
-
-    # Verify Captouch step
-    # bart.step("Use captouch to start and activate cycle")
-    
-    # Verify I am on Running Cycle Screen
-    bart.step("Check that I am on running cycle menu")
-    appium_driver_helper.get_element(appium_driver, "cycle-time-remaning")
-    appium_driver_helper.get_element(appium_driver, "button-cancel")
-    appium_driver_helper.get_element(appium_driver, "button-options")
+    # Go to the running cycle screen from wherever the last scenario left the app
+    bart.step("Go to running cycle screen")
+    screen_navigator.goto(appium_driver, screen_navigator.RUNNING)
     
     # Click on the cancel button
     bart.step("Click cancel button on active screen")
@@ -66,7 +33,7 @@ def test_cancel_active(appium_driver):
 
     # Wait for a few seconds
     bart.step("Wait for machine to process")
-    sleep(3)
+    appium_driver_helper.wait_for_screen(appium_driver, ["title"])
 
     # Check I am back on the material selection screen
     bart.step("Check for screen title")
@@ -84,42 +51,9 @@ def test_cancel_active(appium_driver):
 def test_cancel_wake(appium_driver):
     """Cancel Dry cycle after waking up the screen"""
     
-    #Check that I am on Home Screen
-    bart.step("Check for screen title")
-    dyer_title = appium_driver_helper.get_element(appium_driver, "title")
-
-    dyer_title_text = appium_driver_helper.get_text(appium_driver, dyer_title)
-    if dyer_title_text == "DRYER":
-        print("Home screen title verification passed.")
-    else:
-        print("Home screen title verification failed.")
-
-    # Check for material options and click one
-    bart.step("Check that all materials are present")
-    material_options =  ["Mixed", "Cotton", "Polyester", "Wool", "Silk", "Elastane", "Linen", "Down",] # Wool and cashmere does not have auto
-    sleep(1)
-    appium_driver_helper.swipe(appium_driver, "Down", "Mixed", 2)
-    material_options = ["Cashmere", "Acrylic", "Viscose", "Lyocell",  "Hemp", "Ramie", "Nylon"]
-    chosen_material = random.choice(material_options)
-
-    bart.step(f"Selecting random material: {chosen_material}")
-    material_element = appium_driver_helper.get_element(appium_driver, chosen_material)
-    material_element.click()
-    sleep(3)
-
-    #Click on Start button
-    bart.step("Click start")
-    start_btn = appium_driver_helper.get_element(appium_driver, "button-start") 
-    start_btn.click()
-
-    # Verify Captouch step
-    # bart.step("Use captouch to start and activate cycle")
-
-    # Verify I am on Running Cycle Screen
-    bart.step("Check that I am on running cycle menu")
-    appium_driver_helper.get_element(appium_driver, "cycle-time-remaning")
-    appium_driver_helper.get_element(appium_driver, "button-cancel")
-    appium_driver_helper.get_element(appium_driver, "button-options")
+    # Go to the running cycle screen from wherever the last scenario left the app
+    bart.step("Go to running cycle screen")
+    screen_navigator.goto(appium_driver, screen_navigator.RUNNING)
 
     # Wait for screen to go to sleep
     bart.step("Wait for screen to go to sleep")
@@ -146,7 +80,7 @@ def test_cancel_wake(appium_driver):
 
     # Wait for a few seconds
     bart.step("Wait for machine to process")
-    sleep(3)
+    appium_driver_helper.wait_for_screen(appium_driver, ["button-save", "button-delay", "button-start"])
 
     # Check I am back on the Material setting scrren
     appium_driver_helper.get_element(appium_driver, "button-save")
@@ -159,42 +93,9 @@ def test_cancel_wake(appium_driver):
 def test_cancel_alert(appium_driver):
     """Clicking back button on the cancel cycle alert should not cancel cycle"""
 
-    #Check that I am on Home Screen
-    bart.step("Check for screen title")
-    dyer_title = appium_driver_helper.get_element(appium_driver, "title")
-
-    dyer_title_text = appium_driver_helper.get_text(appium_driver, dyer_title)
-    if dyer_title_text == "DRYER":
-        print("Home screen title verification passed.")
-    else:
-        print("Home screen title verification failed.")
-
-    # Check for material options and click one
-    bart.step("Check that all materials are present")
-    material_options =  ["Mixed", "Cotton", "Polyester", "Wool", "Silk", "Elastane", "Linen", "Down",] # Wool and cashmere does not have auto
-    sleep(1)
-    appium_driver_helper.swipe(appium_driver, "Down", "Mixed", 2)
-    material_options = ["Cashmere", "Acrylic", "Viscose", "Lyocell",  "Hemp", "Ramie", "Nylon"]
-    chosen_material = random.choice(material_options)
-
-    bart.step(f"Selecting random material: {chosen_material}")
-    material_element = appium_driver_helper.get_element(appium_driver, chosen_material)
-    material_element.click()
-    sleep(3)
-
-    #Click on Start button
-    bart.step("Click start")
-    start_btn = appium_driver_helper.get_element(appium_driver, "button-start") 
-    start_btn.click()
-
-    # Verify Captouch step
-    # bart.step("Use captouch to start and activate cycle")
-
-    # Verify I am on Running Cycle Screen
-    bart.step("Check that I am on running cycle menu")
-    # change to new resource_id
-    appium_driver_helper.get_element(appium_driver, "Cancel")
-    appium_driver_helper.get_element(appium_driver, "Options")
+    # Go to the running cycle screen from wherever the last scenario left the app
+    bart.step("Go to running cycle screen")
+    screen_navigator.goto(appium_driver, screen_navigator.RUNNING)
 
     # Click on the cancel button
     bart.step("Click back button on active screen")
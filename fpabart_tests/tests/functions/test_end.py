@@ -1,53 +1,25 @@
 import fpabart as bart
 import modules.appium_driver.appium_driver_helper as appium_driver_helper
-from time import sleep
+import modules.appium_driver.screen_navigator as screen_navigator
 import random
 
 @bart.scenario("Checks an Alert appears when Dry Cycle complete")
-def test_end_alert(appium_driver):
+def test_end_alert(appium_driver, dryer_control):
     """Finish alert appears when dry cycle is complete"""
 
-    #Check that I am on Home Screen
-    bart.step("Check for screen title")
-    dyer_title = appium_driver_helper.get_element(appium_driver, "title")
-
-    dyer_title_text = appium_driver_helper.get_text(appium_driver, dyer_title)
-    if dyer_title_text == "DRYER":
-        print("Home screen title verification passed.")
-    else:
-        print("Home screen title verification failed.")
-
-    # Check for material options and click one
-    bart.step("Check that all materials are present")
-    material_options =  ["Mixed", "Cotton", "Polyester", "Wool", "Silk", "Elastane", "Linen", "Down",] # Wool and cashmere does not have auto
-    sleep(1)
-    appium_driver_helper.swipe(appium_driver, "Down", "Mixed", 2)
-    material_options = ["Cashmere", "Acrylic", "Viscose", "Lyocell",  "Hemp", "Ramie", "Nylon"]
-    chosen_material = random.choice(material_options)
-
-    bart.step(f"Selecting random material: {chosen_material}")
-    material_element = appium_driver_helper.get_element(appium_driver, chosen_material)
-    material_element.click()
-    sleep(3)
-
-    # Verify Captouch step
-    # bart.step("Use captouch to start and activate cycle")
-    
-    # Verify I am on Running Cycle Screen
-    bart.step("Check that I am on running cycle menu")
-    appium_driver_helper.get_element(appium_driver, "cycle-time-remaning")
-    appium_driver_helper.get_element(appium_driver, "button-cancel")
-    appium_driver_helper.get_element(appium_driver, "button-options")
+    # Go to the running cycle screen from wherever the last scenario left the app
+    bart.step("Go to running cycle screen")
+    screen_navigator.goto(appium_driver, screen_navigator.RUNNING)
 
     # Displays current cycle state
     bart.step("Checks for current cycle state")
     cycle_status = ["Fill", "Wash", "Rinse", "Spin", "Dry", "Cooling"," Load sensing", "Steam"]
-    sleep(3)
+    appium_driver_helper.wait_until_stable(appium_driver)
     appium_driver_helper.get_element(appium_driver, cycle_status)
  
-    # Verify that I am near end of running cycle
-    bart.step("Check I am on the running cycle page")
-    sleep(3600)
+    # Fast forward to the end of the running cycle in test mode
+    bart.step("Fast forward to the end of the cycle")
+    dryer_control.fast_forward_to_complete()
  
     # Check that cycle complete menu popup
     bart.step("Check end cycle menu pops up")
@@ -57,54 +29,22 @@ def test_end_alert(appium_driver):
 
 
 @bart.scenario("Close complete alert with X button")
-def test_end_XBtn(appium_driver):
+def test_end_XBtn(appium_driver, dryer_control):
     """Close dry cycle complete alert with X button"""
 
-    #Check that I am on Home Screen
-    bart.step("Check for screen title")
-    dyer_title = appium_driver_helper.get_element(appium_driver, "title")
-
-    dyer_title_text = appium_driver_helper.get_text(appium_driver, dyer_title)
-    if dyer_title_text == "DRYER":
-        print("Home screen title verification passed.")
-    else:
-        print("Home screen title verification failed.")
-
-    # Check for material options and click one
-    bart.step("Check that all materials are present")
-    material_options =  ["Mixed", "Cotton", "Polyester", "Wool", "Silk", "Elastane", "Linen", "Down",] # Wool and cashmere does not have auto
-    sleep(1)
-    appium_driver_helper.swipe(appium_driver, "Down", "Mixed", 2)
-    material_options = ["Cashmere", "Acrylic", "Viscose", "Lyocell",  "Hemp", "Ramie", "Nylon"]
-    chosen_material = random.choice(material_options)
-
-    bart.step(f"Selecting random material: {chosen_material}")
-    material_element = appium_driver_helper.get_element(appium_driver, chosen_material)
-    material_element.click()
-    sleep(3)
-
-    #Click on Start button
-    bart.step("Click start")
-    start_btn = appium_driver_helper.get_element(appium_driver, "button-start") 
-    start_btn.click()
-
-    # Verify Captouch step
-    # bart.step("Use captouch to start and activate cycle")
-    
-    # Verify I am on Running Cycle Screen
-    bart.step("Check that I am on running cycle menu")
-    appium_driver_helper.get_element(appium_driver, "cycle-time-remaning")
-    appium_driver_helper.get_element(appium_driver, "button-cancel")
-    appium_driver_helper.get_element(appium_driver, "button-options")
+    # Go to the running cycle screen from wherever the last scenario left the app
+    bart.step("Go to running cycle screen")
+    screen_navigator.goto(appium_driver, screen_navigator.RUNNING)
 
     # Displays current cycle state
     bart.step("Checks for current cycle state")
     cycle_status = ["Fill", "Wash", "Rinse", "Spin", "Dry", "Cooling"," Load sensing", "Steam"]
-    sleep(3)
+    appium_driver_helper.wait_until_stable(appium_driver)
     appium_driver_helper.get_element(appium_driver, cycle_status)
 
-    # Verify that I am near end of running cycle
-    sleep(3600)
+    # Fast forward to the end of the running cycle in test mode
+    bart.step("Fast forward to the end of the cycle")
+    dryer_control.fast_forward_to_complete()
 
     # Check that end of cycle menu pops up
     bart.step("Check end cycle menu pop up")
@@ -124,33 +64,14 @@ def test_end_XBtn(appium_driver):
 
 
 @bart.scenario("Close complete with Done button")
-def test_end_Done(appium_driver):
+def test_end_Done(appium_driver, dryer_control):
     """Close dry cycle complete alert with done button"""
 
     # Logic for crease-free active needs to be put in
     
-    #Check that I am on Home Screen
-    bart.step("Check for screen title")
-    dyer_title = appium_driver_helper.get_element(appium_driver, "title")
-
-    dyer_title_text = appium_driver_helper.get_text(appium_driver, dyer_title)
-    if dyer_title_text == "DRYER":
-        print("Home screen title verification passed.")
-    else:
-        print("Home screen title verification failed.")
-
-    # Check for material options and click one
-    bart.step("Check that all materials are present")
-    material_options =  ["Mixed", "Cotton", "Polyester", "Wool", "Silk", "Elastane", "Linen", "Down",] # Wool and cashmere does not have auto
-    sleep(1)
-    appium_driver_helper.swipe(appium_driver, "Down", "Mixed", 2)
-    material_options = ["Cashmere", "Acrylic", "Viscose", "Lyocell",  "Hemp", "Ramie", "Nylon"]
-    chosen_material = random.choice(material_options)
-
-    bart.step(f"Selecting random material: {chosen_material}")
-    material_element = appium_driver_helper.get_element(appium_driver, chosen_material)
-    material_element.click()
-    sleep(3)
+    # Go to the material settings screen from wherever the last scenario left the app
+    bart.step("Go to material settings screen")
+    screen_navigator.goto(appium_driver, screen_navigator.MATERIAL_SETTINGS)
 
     # Select More options in material setting screen
     bart.step("Click on More options")
@@ -184,11 +105,12 @@ def test_end_Done(appium_driver):
     # Displays current cycle state
     bart.step("Checks for current cycle state")
     cycle_status = ["Fill", "Wash", "Rinse", "Spin", "Dry", "Cooling"," Load sensing", "Steam"]
-    sleep(3)
+    appium_driver_helper.wait_until_stable(appium_driver)
     appium_driver_helper.get_element(appium_driver, cycle_status)
 
-    # Verify that I am near end of running cycle
-    sleep(3600)
+    # Fast forward to the end of the running cycle in test mode
+    bart.step("Fast forward to the end of the cycle")
+    dryer_control.fast_forward_to_complete()
 
     # Check that end of cycle menu pops up
     bart.step("Check end cycle menu pop up")
@@ -209,54 +131,22 @@ def test_end_Done(appium_driver):
 
 
 @bart.scenario("Close complete and add more time")
-def test_end_addTime(appium_driver):
+def test_end_addTime(appium_driver, dryer_control):
     """Cycle complete alert appears and click add more time"""
 
-    #Check that I am on Home Screen
-    bart.step("Check for screen title")
-    dyer_title = appium_driver_helper.get_element(appium_driver, "title")
-
-    dyer_title_text = appium_driver_helper.get_text(appium_driver, dyer_title)
-    if dyer_title_text == "DRYER":
-        print("Home screen title verification passed.")
-    else:
-        print("Home screen title verification failed.")
-
-    # Check for material options and click one
-    bart.step("Check that all materials are present")
-    material_options =  ["Mixed", "Cotton", "Polyester", "Wool", "Silk", "Elastane", "Linen", "Down",] # Wool and cashmere does not have auto
-    sleep(1)
-    appium_driver_helper.swipe(appium_driver, "Down", "Mixed", 2)
-    material_options = ["Cashmere", "Acrylic", "Viscose", "Lyocell",  "Hemp", "Ramie", "Nylon"]
-    chosen_material = random.choice(material_options)
-
-    bart.step(f"Selecting random material: {chosen_material}")
-    material_element = appium_driver_helper.get_element(appium_driver, chosen_material)
-    material_element.click()
-    sleep(3)
-
-    #Click on Start button
-    bart.step("Click start")
-    start_btn = appium_driver_helper.get_element(appium_driver, "button-start") 
-    start_btn.click()
-
-    # Verify Captouch step
-    # bart.step("Use captouch to start and activate cycle")
-    
-    # Verify I am on Running Cycle Screen
-    bart.step("Check that I am on running cycle menu")
-    appium_driver_helper.get_element(appium_driver, "cycle-time-remaning")
-    appium_driver_helper.get_element(appium_driver, "button-cancel")
-    appium_driver_helper.get_element(appium_driver, "button-options")
+    # Go to the running cycle screen from wherever the last scenario left the app
+    bart.step("Go to running cycle screen")
+    screen_navigator.goto(appium_driver, screen_navigator.RUNNING)
 
     # Displays current cycle state
     bart.step("Checks for current cycle state")
     cycle_status = ["Fill", "Wash", "Rinse", "Spin", "Dry", "Cooling"," Load sensing", "Steam"]
-    sleep(3)
+    appium_driver_helper.wait_until_stable(appium_driver)
     appium_driver_helper.get_element(appium_driver, cycle_status)
 
-    # Verify that I am near end of running cycle
-    sleep(3600)
+    # Fast forward to the end of the running cycle in test mode
+    bart.step("Fast forward to the end of the cycle")
+    dryer_control.fast_forward_to_complete()
 
     # Check that cycle complete menu popup
     bart.step("Check end cycle menu pop up")
@@ -277,54 +167,22 @@ def test_end_addTime(appium_driver):
 
 
 @bart.scenario("Complete alert popsup again after add more time completed")
-def test_end_alertComplete(appium_driver):
+def test_end_alertComplete(appium_driver, dryer_control):
     """Cycle complete alert comes after dry cycle is completed again after adding more time"""
 
-    #Check that I am on Home Screen
-    bart.step("Check for screen title")
-    dyer_title = appium_driver_helper.get_element(appium_driver, "title")
-
-    dyer_title_text = appium_driver_helper.get_text(appium_driver, dyer_title)
-    if dyer_title_text == "DRYER":
-        print("Home screen title verification passed.")
-    else:
-        print("Home screen title verification failed.")
-
-    # Check for material options and click one
-    bart.step("Check that all materials are present")
-    material_options =  ["Mixed", "Cotton", "Polyester", "Wool", "Silk", "Elastane", "Linen", "Down",] # Wool and cashmere does not have auto
-    sleep(1)
-    appium_driver_helper.swipe(appium_driver, "Down", "Mixed", 2)
-    material_options = ["Cashmere", "Acrylic", "Viscose", "Lyocell",  "Hemp", "Ramie", "Nylon"]
-    chosen_material = random.choice(material_options)
-
-    bart.step(f"Selecting random material: {chosen_material}")
-    material_element = appium_driver_helper.get_element(appium_driver, chosen_material)
-    material_element.click()
-    sleep(3)
-
-    #Click on Start button
-    bart.step("Click start")
-    start_btn = appium_driver_helper.get_element(appium_driver, "button-start") 
-    start_btn.click()
-
-    # Verify Captouch step
-    # bart.step("Use captouch to start and activate cycle")
-    
-    # Verify I am on Running Cycle Screen
-    bart.step("Check that I am on running cycle menu")
-    appium_driver_helper.get_element(appium_driver, "cycle-time-remaning")
-    appium_driver_helper.get_element(appium_driver, "button-cancel")
-    appium_driver_helper.get_element(appium_driver, "button-options")
+    # Go to the running cycle screen from wherever the last scenario left the app
+    bart.step("Go to running cycle screen")
+    screen_navigator.goto(appium_driver, screen_navigator.RUNNING)
 
     # Displays current cycle state
     bart.step("Checks for current cycle state")
     cycle_status = ["Fill", "Wash", "Rinse", "Spin", "Dry", "Cooling"," Load sensing", "Steam"]
-    sleep(3)
+    appium_driver_helper.wait_until_stable(appium_driver)
     appium_driver_helper.get_element(appium_driver, cycle_status)
 
-    # Verify that I am near end of running cycle
-    sleep(3600)
+    # Fast forward to the end of the running cycle in test mode
+    bart.step("Fast forward to the end of the cycle")
+    dryer_control.fast_forward_to_complete()
 
     # Check that cycle complete menu popup
     bart.step("Check end cycle menu pop up")
@@ -334,7 +192,7 @@ def test_end_alertComplete(appium_driver):
 
     # Check that it takes you back to time selection
     bart.step("Check redirect to time selection")
-    sleep(1)
+    appium_driver_helper.wait_for_screen(appium_driver, ["0:30", "Auto"])
     appium_driver_helper.swipe(appium_driver, "0:30", "Auto", 1)
     appium_driver_helper.swipe(appium_driver, "0:40", "0:30", 1)
     appium_driver_helper.swipe(appium_driver, "0:50", "0:40", 1)
@@ -346,7 +204,7 @@ def test_end_alertComplete(appium_driver):
     bart.step(f"Selecting random time: {chosen_time}")
     time_element = appium_driver_helper.get_element(appium_driver, chosen_time)
     time_element.click()
-    sleep(3)
+    appium_driver_helper.wait_until_stable(appium_driver)
 
     # Click confirm for chosen time
     bart.step("Click confirm button")
@@ -357,8 +215,9 @@ def test_end_alertComplete(appium_driver):
     bart.step("Cycle continues with new selected time")
     appium_driver_helper.get_element(appium_driver, "cycle-time-remaning")
 
-    # Wait for cycle to near complete
-    sleep(3600)
+    # Fast forward to the end of the running cycle in test mode
+    bart.step("Fast forward to the end of the cycle")
+    dryer_control.fast_forward_to_complete()
 
     # Check that cycle complete menu popups the second time
     bart.step("Check end cycle menu popsup second time")
@@ -21,7 +21,7 @@ def test_running_auto(appium_driver):
     # Check for material options and click one
     bart.step("Check that all materials are present")
     material_options =  ["Mixed", "Cotton", "Polyester", "Wool", "Silk", "Elastane", "Linen", "Down",] # Wool and cashmere does not have auto
-    sleep(1)
+    appium_driver_helper.wait_for_screen(appium_driver, ["Down", "Mixed"])
     appium_driver_helper.swipe(appium_driver, "Down", "Mixed", 2)
     material_options = ["Cashmere", "Acrylic", "Viscose", "Lyocell",  "Hemp", "Ramie", "Nylon"]
     chosen_material = random.choice(material_options)
@@ -29,7 +29,7 @@ def test_running_auto(appium_driver):
     bart.step(f"Selecting random material: {chosen_material}")
     material_element = appium_driver_helper.get_element(appium_driver, chosen_material)
     material_element.click()
-    sleep(3)
+    appium_driver_helper.wait_until_stable(appium_driver)
 
     # Verify that the time is set to "AUTO"
     bart.step("Check if time is set to Auto")
@@ -56,7 +56,7 @@ def test_running_auto(appium_driver):
     # Displays current cycle state
     bart.step("Checks for current cycle state")
     cycle_status = ["Fill", "Wash", "Rinse", "Spin", "Dry", "Cooling"," Load sensing", "Steam"]
-    sleep(3)
+    appium_driver_helper.wait_until_stable(appium_driver)
     appium_driver_helper.get_element(appium_driver, cycle_status)
 
     # Wait for 30 seconds of no interaction
@@ -66,21 +66,14 @@ def test_running_auto(appium_driver):
     # Check footer and hamburger menu dissapears
     bart.step("Hamburger and Footer Menu Dissapears") 
     menu_btns = ["Cancel", "Options", "Add item"] # Create list of elements
-    all_disappeared = True # Set to true all elements are gone
-    for element in menu_btns:
-        try:
-            appium_driver_helper.get_element(appium_driver, element, max_attempts=1) # Search for elements, allow one try
-            print(f"{element} did not disappear.")
-            all_disappeared = False # Returns false if any listed elements are found 
-        except RuntimeError:
-            pass # All elements dissapeared
-    if all_disappeared:
+    present_btns = appium_driver_helper.get_present_elements(appium_driver, menu_btns) # Check them all in one snapshot
+    for element in present_btns:
+        print(f"{element} did not disappear.")
+    if not present_btns:
         print("Footer and hamburger menu disappeared as expected.") 
 
     bart.step("Complete Scenario")
-    appium_driver.terminate_app("com.fisherpaykel.laundry.fcs200")
-    sleep(2)  # Wait for a couple of seconds.
-    appium_driver.activate_app("com.fisherpaykel.laundry.fcs200")
+    appium_driver_helper.restart_app(appium_driver)  # Returns as soon as the home screen is back.
 
 
 
@@ -102,7 +95,7 @@ def test_running_time(appium_driver):
     # Check for material options and click one
     bart.step("Check that all materials are present")
     material_options =  ["Mixed", "Cotton", "Polyester", "Wool", "Silk", "Elastane", "Linen", "Down",] # Wool and cashmere does not have auto
-    sleep(1)
+    appium_driver_helper.wait_for_screen(appium_driver, ["Down", "Mixed"])
     appium_driver_helper.swipe(appium_driver, "Down", "Mixed", 2)
     material_options = ["Cashmere", "Acrylic", "Viscose", "Lyocell",  "Hemp", "Ramie", "Nylon"]
     chosen_material = random.choice(material_options)
@@ -110,7 +103,7 @@ def test_running_time(appium_driver):
     bart.step(f"Selecting random material: {chosen_material}")
     material_element = appium_driver_helper.get_element(appium_driver, chosen_material)
     material_element.click()
-    sleep(3)
+    appium_driver_helper.wait_until_stable(appium_driver)
 
     # Verify that the time is set to "AUTO"
     bart.step("Check if time is set to Auto")
@@ -122,7 +115,7 @@ def test_running_time(appium_driver):
 
     # Verify that all time options are available
     bart.step("Swipe through all time options")
-    sleep(1)
+    appium_driver_helper.wait_for_screen(appium_driver, ["0:30", "Auto"])
     appium_driver_helper.swipe(appium_driver, "0:30", "Auto", 1)
     appium_driver_helper.swipe(appium_driver, "0:40", "0:30", 1)
     appium_driver_helper.swipe(appium_driver, "0:50", "0:40", 1)
@@ -134,7 +127,7 @@ def test_running_time(appium_driver):
     bart.step(f"Selecting random time: {chosen_time}")
     time_element = appium_driver_helper.get_element(appium_driver, chosen_time)
     time_element.click()
-    sleep(3)
+    appium_driver_helper.wait_until_stable(appium_driver)
 
     # Click Confirm to return to settings page
     bart.step("Click on confirm for chosen time option")
@@ -156,7 +149,7 @@ def test_running_time(appium_driver):
     # Displays current cycle state
     bart.step("Checks for current cycle state")
     cycle_status = ["Fill", "Wash", "Rinse", "Spin", "Dry", "Cooling"," Load sensing", "Steam"]
-    sleep(3)
+    appium_driver_helper.wait_until_stable(appium_driver)
     appium_driver_helper.get_element(appium_driver, cycle_status)
     
     # Wait for 30 seconds of no interaction
@@ -166,15 +159,10 @@ def test_running_time(appium_driver):
     # Check footer and hamburger menu dissapears
     bart.step("Hamburger and Footer Menu Dissapears") 
     menu_btns = ["Cancel", "Options", "Add item"] # Create list of elements
-    all_disappeared = True # Set to true all elements are gone
-    for element in menu_btns:
-        try:
-            appium_driver_helper.get_element(appium_driver, element, max_attempts=1) # Search for elements, allow one try
-            print(f"{element} did not disappear.")
-            all_disappeared = False # Returns false if any listed elements are found 
-        except RuntimeError:
-            pass # All elements dissapeared
-    if all_disappeared:
+    present_btns = appium_driver_helper.get_present_elements(appium_driver, menu_btns) # Check them all in one snapshot
+    for element in present_btns:
+        print(f"{element} did not disappear.")
+    if not present_btns:
         print("Footer and hamburger menu disappeared as expected.")
 
 
@@ -15,9 +15,13 @@ Fisher & Paykel Appliances Limited.
 """
 
 import logging
+import weakref
 
 from appium.webdriver import Remote
 from appium.webdriver.common.appiumby import AppiumBy
+from modules.appium_driver.locator_cache import get_locator_cache
+from modules.appium_driver.ui_snapshot import UISnapshot
+from modules.appium_driver.webdriver_metrics import record_app_restart, waiting
 from selenium.common import TimeoutException,  InvalidSelectorException
 from selenium.webdriver.remote.webelement import WebElement
 from selenium.webdriver.support import expected_conditions
@@ -27,11 +31,17 @@ from selenium.webdriver.common.actions.action_builder import ActionBuilder
 from selenium.webdriver.common.actions.pointer_input import PointerInput
 from selenium.webdriver.common.actions import interaction
 
-from time import sleep
+from time import monotonic, sleep
+from typing import NamedTuple
 
 
 logger = logging.getLogger(__name__)
 
+SNAPSHOT_MAX_AGE = 1.0  # How long a UI snapshot is trusted for if nothing invalidates it, in seconds.
+
+_snapshots = weakref.WeakKeyDictionary()  # The latest UI snapshot for each Appium driver.
+_element_ids = weakref.WeakKeyDictionary()  # The element ID used to find each element returned by 'locate_element'.
+
 
 def _get_search_modes(element_id: str) -> list:
     """Get a list of search modes for the provided element ID.
@@ -55,6 +65,171 @@ def _get_search_modes(element_id: str) -> list:
     return search_modes
 
 
+def _xpath_literal(value: str) -> str:
+    """Quote a value so it can be used as a literal in an XPath expression.
+
+    Args:
+        value (str): The value to quote.
+
+    Returns:
+        str: The quoted value. Values containing both kinds of quotes are built with 'concat()'.
+    """
+    if '"' not in value:
+        return f'"{value}"'
+
+    if "'" not in value:
+        return f"'{value}'"
+
+    parts = [f'"{part}"' for part in value.split('"')]
+
+    return "concat(" + ", '\"', ".join(parts) + ")"
+
+
+def _get_union_locator(element_id: str) -> str:
+    """Get a single XPath locator which matches every search mode for the provided element ID.
+
+    The locator matches the element's resource-id (with or without the '<package>:id/' prefix) and its content-desc,
+    which covers the resource-id, ID, accessibility ID, and content-desc search modes in one server query.
+
+    Args:
+        element_id (str): The element's ID.
+
+    Returns:
+        str: The XPath locator.
+    """
+    literal = _xpath_literal(element_id)
+
+    return (
+        f"//*[@resource-id={literal} "
+        f'or substring-after(@resource-id, ":id/")={literal} '
+        f"or @content-desc={literal}]"
+    )
+
+
+def _get_matched_search_mode_index(element: WebElement, element_id: str) -> int:
+    """Work out which search mode matched an element found with the union locator.
+
+    The accessibility ID and content-desc search modes both match the content-desc attribute on Android, so the
+    accessibility ID search mode is reported for both.
+
+    Args:
+        element (WebElement): The element found with the union locator.
+        element_id (str): The element's ID.
+
+    Returns:
+        int: The index of the matching search mode in the list from '_get_search_modes'.
+    """
+    resource_id = element.get_attribute("resource-id") or ""
+
+    if resource_id == element_id:
+        return 0
+
+    if resource_id.endswith(f":id/{element_id}"):
+        return 2
+
+    return 1
+
+
+def get_app_package(appium_driver: Remote) -> str:
+    """Get the package name of the app under test from the session's capabilities.
+
+    Args:
+        appium_driver (Remote): The Appium driver.
+
+    Returns:
+        str: The package name, or an empty string if the capabilities do not name one.
+    """
+    capabilities = appium_driver.capabilities or {}
+
+    return capabilities.get("appPackage") or capabilities.get("appium:appPackage") or ""
+
+
+def _find_with_learned_search_mode(appium_driver: Remote, element_id: str) -> tuple | None:
+    """Try the search mode which last found the element, with a single query and no waiting.
+
+    Args:
+        appium_driver (Remote): The Appium driver.
+        element_id (str): The element's ID.
+
+    Returns:
+        tuple | None: The element, search mode, and locator, or 'None' if the element has not been found before or
+            the learned search mode no longer finds it.
+    """
+    search_mode_index = get_locator_cache().get(get_app_package(appium_driver), element_id)
+
+    if search_mode_index is None:
+        return None
+
+    search_mode, locator = _get_search_modes(element_id)[search_mode_index]
+    elements = appium_driver.find_elements(search_mode, locator)
+
+    if not elements:
+        logger.debug(f"Learned search mode '{search_mode}' no longer finds '{element_id}'")
+        return None
+
+    return elements[0], search_mode, locator
+
+
+class LocatedElement(NamedTuple):
+    """An element found by 'locate_element' and the search mode which matched it."""
+
+    element: WebElement
+    search_mode: str
+    locator: str
+
+
+ATTEMPT_DURATION = 2.0  # The duration of one search attempt, in seconds.
+POLL_INTERVAL = 0.25  # The time between queries to the Appium server, in seconds.
+
+
+def locate_element(appium_driver: Remote, element_id: str, max_attempts: int = 5) -> LocatedElement:
+    """Wait for an element to appear on the UI and report which search mode matched it.
+
+    The search mode which last found the element (see 'locator_cache') is tried first with a single native query.
+    Otherwise every search mode is checked in a single server query per poll, rather than one wait per search mode,
+    and the search mode which matched is remembered for next time.
+
+    Args:
+        appium_driver (Remote): The Appium driver.
+        element_id (str): The element's ID.
+        max_attempts (int): The maximum number of times to search for the element. Each attempt takes approximately
+            2 seconds. Defaults to 5.
+
+    Returns:
+        LocatedElement: The element and the search mode and locator which matched it.
+
+    Raises:
+        RuntimeError: If the element could not be found.
+    """
+    logger.info(f"Looking for element '{element_id}'...")
+    learned_match = _find_with_learned_search_mode(appium_driver, element_id)
+
+    if learned_match is not None:
+        logger.info(f"Found element '{element_id}' with learned search mode '{learned_match[1]}'!")
+        _element_ids[learned_match[0]] = element_id
+        return LocatedElement(*learned_match)
+
+    locator = _get_union_locator(element_id)
+    logger.debug(f"Union locator for '{element_id}': {locator}")
+
+    wait = WebDriverWait(appium_driver, timeout=max_attempts * ATTEMPT_DURATION, poll_frequency=POLL_INTERVAL)
+
+    try:
+        with waiting(appium_driver):
+            elements = wait.until(lambda driver: driver.find_elements(AppiumBy.XPATH, locator))
+    except TimeoutException:
+        raise RuntimeError(f"Could not find element '{element_id}' after {max_attempts} attempts!") from None
+
+    element = elements[0]
+    search_mode_index = _get_matched_search_mode_index(element, element_id)
+    search_mode, matched_locator = _get_search_modes(element_id)[search_mode_index]
+    get_locator_cache().record(get_app_package(appium_driver), element_id, search_mode_index)
+    logger.info(f"Found element '{element_id}' with search mode '{search_mode}' and locator '{matched_locator}'!")
+    _element_ids[element] = element_id
+
+    return LocatedElement(element, search_mode, matched_locator)
+
+
 def get_element(appium_driver: Remote, element_id: str, max_attempts: int = 5) -> WebElement:
     """Wait for an element to appear on the UI and return the element.
 
@@ -62,123 +237,372 @@ def get_element(appium_driver: Remote, element_id: str, max_attempts: int = 5) -
         appium_driver (Remote): The Appium driver.
         element_id (str): The element's ID.
         max_attempts (int): The maximum number of times to search for the element. Each attempt takes approximately
-            2 seconds. Defau it was found, or 'None' if it was not.
+            2 seconds. Defaults to 5.
+
+    Returns:
+        WebElement: The element.
+
+    Raises:
+        RuntimeError: If the element could not be found.
     """
-    logger.info(f"Looking for element '{element_id}'...")
-    element = None
-    wait = WebDriverWait(appium_driver, timeout=0.5, poll_frequency=0.5)
+    return locate_element(appium_driver, element_id, max_attempts).element
 
-    for attempt_index in range(max_attempts):
-        logger.debug(f"Searching for element '{element_id}. Attempt {attempt_index + 1}/{max_attempts}")
 
-        for search_mode, locator in _get_search_modes(element_id):
-            try:
-                logger.debug(f"Waiting for locator '{locator}' with search mode '{search_mode}'...")
-                wait.until(expected_conditions.presence_of_all_elements_located((search_mode, locator)))
-                logger.info(f"Found element '{element_id}' with search mode '{search_mode}' and locator '{locator}'!")
+def get_snapshot(appium_driver: Remote, max_age: float = SNAPSHOT_MAX_AGE) -> UISnapshot:
+    """Get a snapshot of the UI hierarchy, reusing the latest one if it is still valid.
 
-                element = appium_driver.find_element(search_mode, value=locator)
+    Snapshots are invalidated by clicks, swipes, and app restarts which go through this module, and expire after
+    'max_age' seconds in case the UI changed some other way.
 
-                break
+    Args:
+        appium_driver (Remote): The Appium driver.
+        max_age (float): The oldest snapshot to reuse, in seconds. Use 0 to always take a new snapshot. Defaults to
+            'SNAPSHOT_MAX_AGE'.
+
+    Returns:
+        UISnapshot: The snapshot.
+    """
+    snapshot = _snapshots.get(appium_driver)
 
-            except TimeoutException:
-                logger.warning(
-                    f"Timed out looking for element '{element_id}' with search mode "
-                    f"{search_mode}' and locator'{locator}'!"
-                )
+    if snapshot is None or snapshot.age > max_age:
+        snapshot = UISnapshot.take(appium_driver)
+        _snapshots[appium_driver] = snapshot
 
-        if element is not None:
-            break
+    return snapshot
 
-    if element is None:
-        raise RuntimeError(f"Could not find element '{element_id}' after {max_attempts} attempts!")
+
+def invalidate_snapshot(appium_driver: Remote) -> None:
+    """Discard the latest UI snapshot because the UI is about to change.
+
+    Args:
+        appium_driver (Remote): The Appium driver.
+    """
+    _snapshots.pop(appium_driver, None)
+
+
+def _get_snapshot_node(element: WebElement, snapshot: UISnapshot, match_bounds: bool = True):
+    """Find the snapshot node for an element.
+
+    Elements returned by 'get_element' are matched by the element ID they were found with, which needs no round-trip.
+    Other elements are matched by their bounds, which costs one round-trip to read the element's rectangle.
+
+    Args:
+        element (WebElement): The element.
+        snapshot (UISnapshot): The snapshot to search.
+        match_bounds (bool): Whether to fall back to matching the element's bounds. Defaults to True.
+
+    Returns:
+        Element | None: The node, or 'None' if the element is not in the snapshot.
+    """
+    element_id = _element_ids.get(element)
+
+    if element_id is not None:
+        node = snapshot.find(element_id)
+
+        if node is not None:
+            return node
+
+    if not match_bounds:
+        return None
+
+    rect = element.rect
+    left, top = int(rect["x"]), int(rect["y"])
+    bounds = f"[{left},{top}][{left + int(rect['width'])},{top + int(rect['height'])}]"
+    nodes = snapshot.find_by_bounds(bounds)
+
+    return nodes[0] if nodes else None
+
+
+def get_present_elements(appium_driver: Remote, element_ids: list) -> list:
+    """Get the elements which are currently on the UI, from a single new snapshot.
+
+    Args:
+        appium_driver (Remote): The Appium driver.
+        element_ids (list): The element IDs to check.
+
+    Returns:
+        list: The element IDs which are on the UI. An empty list means all of them are absent.
+    """
+    return get_snapshot(appium_driver, max_age=0).get_present(element_ids)
+
+
+WAIT_INITIAL_INTERVAL = 0.1  # The first delay between polls while waiting for the UI, in seconds.
+WAIT_MAX_INTERVAL = 1.0  # The longest delay between polls while waiting for the UI, in seconds.
+WAIT_BACKOFF_FACTOR = 1.5  # How much the delay between polls grows after each poll.
+
+
+def _get_poll_delays(timeout: float):
+    """Generate the delays between polls while waiting for the UI, backing off until the timeout runs out.
+
+    The first polls come quickly so a UI which is already settled costs very little. Later polls back off so a slow
+    UI is not flooded with page source requests.
+
+    Args:
+        timeout (float): The total time to wait, in seconds.
+
+    Yields:
+        float: The number of seconds to sleep before the next poll.
+    """
+    deadline = monotonic() + timeout
+    interval = WAIT_INITIAL_INTERVAL
+
+    while True:
+        remaining = deadline - monotonic()
+
+        if remaining <= 0:
+            return
+
+        yield min(interval, remaining)
+        interval = min(interval * WAIT_BACKOFF_FACTOR, WAIT_MAX_INTERVAL)
+
+
+def wait_for_screen(appium_driver: Remote, signature: list, timeout: float = 10.0) -> UISnapshot:
+    """Wait until every element in a screen's signature is on the UI.
+
+    Args:
+        appium_driver (Remote): The Appium driver.
+        signature (list): The IDs of the elements which identify the screen.
+        timeout (float): The maximum time to wait, in seconds. Defaults to 10.
+
+    Returns:
+        UISnapshot: The first snapshot which contains every element in the signature.
+
+    Raises:
+        RuntimeError: If the screen does not appear before the timeout.
+    """
+    logger.info(f"Waiting for screen with elements {signature}...")
+    start_time = monotonic()
+    delays = _get_poll_delays(timeout)
+
+    with waiting(appium_driver):
+        while True:
+            snapshot = get_snapshot(appium_driver, max_age=0)
+            missing_element_ids = [element_id for element_id in signature if not snapshot.is_present(element_id)]
+
+            if not missing_element_ids:
+                logger.info(f"Screen with elements {signature} appeared after {monotonic() - start_time:.2f} s!")
+                return snapshot
+
+            delay = next(delays, None)
+
+            if delay is None:
+                raise RuntimeError(f"Screen did not appear after {timeout} s! Missing elements: {missing_element_ids}")
+
+            sleep(delay)
+
+
+def wait_until_stable(appium_driver: Remote, timeout: float = 5.0) -> UISnapshot:
+    """Wait until the UI hierarchy stops changing, for example after a click starts a screen transition.
+
+    Args:
+        appium_driver (Remote): The Appium driver.
+        timeout (float): The maximum time to wait, in seconds. Defaults to 5.
+
+    Returns:
+        UISnapshot: The latest snapshot. If the UI was still changing when the timeout ran out, a warning is logged
+            and the latest snapshot is returned anyway.
+    """
+    start_time = monotonic()
+
+    with waiting(appium_driver):
+        previous_snapshot = get_snapshot(appium_driver, max_age=0)
+
+        for delay in _get_poll_delays(timeout):
+            sleep(delay)
+            snapshot = get_snapshot(appium_driver, max_age=0)
+
+            if snapshot.page_source == previous_snapshot.page_source:
+                logger.debug(f"UI was stable after {monotonic() - start_time:.2f} s")
+                return snapshot
+
+            previous_snapshot = snapshot
+
+    logger.warning(f"UI was still changing after {timeout} s!")
+
+    return previous_snapshot
+
+
+def click(appium_driver: Remote, element_id: str) -> WebElement:
+    """Find an element, click it, and invalidate the UI snapshot.
+
+    Args:
+        appium_driver (Remote): The Appium driver.
+        element_id (str): The element's ID.
+
+    Returns:
+        WebElement: The element which was clicked.
+    """
+    element = get_element(appium_driver, element_id)
+    element.click()
+    invalidate_snapshot(appium_driver)
 
     return element
 
 
-def restart_app(appium_driver: Remote):
-    """Restart the UI application.
+APP_STATE_RUNNING_IN_FOREGROUND = 4  # See 'query_app_state'.
+HOME_SCREEN_SIGNATURE = ["title"]  # The elements which show the app is back on its home screen.
+RESTART_TIMEOUT = 20.0  # The maximum time for the app to become usable after a restart, in seconds.
+
+
+def restart_app(
+    appium_driver: Remote, signature: list = HOME_SCREEN_SIGNATURE, timeout: float = RESTART_TIMEOUT
+) -> float:
+    """Restart the app under test and wait until it is usable again.
+
+    The app's package is taken from the session's capabilities. After the app is activated, the app state and the UI
+    are polled (quickly at first, then backing off) until the app is in the foreground and every element of the
+    signature is present, so the restart costs no more than the app takes to start.
 
     Args:
         appium_driver (Remote): The Appium driver.
+        signature (list): The IDs of the elements which show the app is usable. Defaults to 'HOME_SCREEN_SIGNATURE'.
+        timeout (float): The maximum time to wait after activating the app, in seconds. Defaults to 'RESTART_TIMEOUT'.
+
+    Returns:
+        float: The restart latency: the time from terminating the app until it was usable, in seconds. It is also
+            recorded in the step's WebDriver metrics.
+
+    Raises:
+        RuntimeError: If the capabilities do not name the app's package, or the app is not usable before the timeout.
     """
-    appium_driver.terminate_app("com.fpa.cook_ui_cavity_flutter")
-    sleep(2)  # Wait for a couple of seconds.
-    appium_driver.activate_app("com.fpa.cook_ui_cavity_flutter")
+    package = get_app_package(appium_driver)
+
+    if not package:
+        raise RuntimeError("The session's capabilities do not name the app's package ('appPackage')!")
+
+    logger.info(f"Restarting {package}...")
+    invalidate_snapshot(appium_driver)
+    start_time = monotonic()
+    appium_driver.terminate_app(package)
+    appium_driver.activate_app(package)
+    delays = _get_poll_delays(timeout)
+
+    with waiting(appium_driver):
+        while True:
+            if appium_driver.query_app_state(package) == APP_STATE_RUNNING_IN_FOREGROUND:
+                snapshot = get_snapshot(appium_driver, max_age=0)
+
+                if all(snapshot.is_present(element_id) for element_id in signature):
+                    break
+
+            delay = next(delays, None)
+
+            if delay is None:
+                raise RuntimeError(f"{package} was not usable {timeout} s after restarting! Expected: {signature}")
+
+            sleep(delay)
+
+    latency = monotonic() - start_time
+    record_app_restart(appium_driver, latency)
+    logger.info(f"{package} was usable {latency:.2f} s after restarting!")
+
+    return latency
 
 
 MAX_DEPTH = 5
 
 
-def get_text(appium_driver, element, depth=MAX_DEPTH):
+def get_text(appium_driver: Remote, element: WebElement, depth: int = MAX_DEPTH) -> list:
     """Retrieve the "innerText" of a provided element.
 
-    It will also retrieve text from children elements.
-    It returns a list of texts [string].
+    It will also retrieve text from children elements. The whole subtree is read from a UI snapshot, so it costs at
+    most one round-trip, and the result is cached until the snapshot is invalidated.
+
+    Args:
+        appium_driver (Remote): The Appium driver.
+        element (WebElement): The element.
+        depth (int): The number of levels of descendants to include. Defaults to 'MAX_DEPTH'.
+
+    Returns:
+        list: The texts of the element and its descendants, in document order, without duplicates.
     """
-    if depth < 0:
-        return []  # Return an empty list if maximum depth is exceeded
     if element is None:
         return []
 
-    texts = []
+    snapshot = get_snapshot(appium_driver)
+    node = _get_snapshot_node(element, snapshot)
 
-    try:
-        # Retrieve the content description text
-        text = element.get_attribute(appium_driver, "content-desc")
-        if text not in [None, "", "null"]:
-            texts.append(text)
-    except TypeError as e:
-        print(f"Error retrieving text: {e}")
-    except AttributeError as e:
-        print(f"Error retrieving text: {e}")
-    except ValueError as e:
-        print(f"Error retrieving text: {e}")
+    if node is None:
+        # The snapshot may be older than the element, so try once more with a new snapshot.
+        snapshot = get_snapshot(appium_driver, max_age=0)
+        node = _get_snapshot_node(element, snapshot)
 
-    # Find child elements
+    if node is None:
+        logger.warning(f"Could not find element {element} in the UI snapshot!")
+        return []
 
-    try:
-        children = element.get_element(appium_driver, AppiumBy.XPATH, ".//*/child::*")
-        for child in children:
-            child_texts = get_text(child, depth - 1)
-            texts.extend(child_texts)  # Append texts from children
-    except TypeError as e:
-        print(f"Error retrieving text: {e}")
-    except AttributeError as e:
-        print(f"Error retrieving text: {e}")
-    except ValueError as e:
-        print(f"Error retrieving text: {e}")
+    return snapshot.get_text(node, depth)
+
+
+ELEMENT_PROPERTIES = ["location", "tag_name", "size"]  # 'text', 'rect'
+ELEMENT_ATTRIBUTES = [
+    "package",
+    "class",
+    "content-desc",
+    "resource-id",
+    "enabled",
+    "checkable",
+    "checked",
+    "clickable",
+    "focusable",
+    "focused",
+    "long-clickable",
+    "scrollable",
+    "selected",
+    "displayed",
+]  # 'password', 'bounds'
+
+
+def get_attributes_bulk(appium_driver: Remote, elements: list) -> list:
+    """Extract the attributes of several elements from one UI snapshot.
+
+    Elements returned by 'get_element' need no extra round-trips. Other elements cost one round-trip each to match
+    their bounds. Elements which are not in the snapshot fall back to reading each attribute from the server.
 
-    return texts
+    Args:
+        appium_driver (Remote): The Appium driver.
+        elements (list): The elements.
+
+    Returns:
+        list: One dictionary of attributes per element, in the same order as the elements. The dictionaries have the
+            same keys as those returned by 'get_attributes'.
+    """
+    snapshot = get_snapshot(appium_driver)
+    attributes = []
+
+    for element in elements:
+        node = _get_snapshot_node(element, snapshot) if element is not None else None
+
+        if node is not None:
+            attributes.append(snapshot.get_attributes(node, ELEMENT_ATTRIBUTES))
+        else:
+            attributes.append(_get_attributes_individually(element))
+
+    return attributes
 
 
 def get_attributes(element):
     """Extract the attributes of a given element.
 
+    The attributes are read from a UI snapshot (see 'get_attributes_bulk').
     It returns a dictionary of attributes.
     """
     if element is None:
         return {}
 
-    attrs = ["location", "tag_name", "size"]
-    # 'text', 'rect'
-    attributes = [
-        "package",
-        "class",
-        "content-desc",
-        "resource-id",
-        "enabled",
-        "checkable",
-        "checked",
-        "clickable",
-        "focusable",
-        "focused",
-        "long-clickable",
-        "scrollable",
-        "selected",
-        "displayed",
-    ]
-    # 'password', 'bounds'
+    return get_attributes_bulk(element.parent, [element])[0]
+
+
+def _get_attributes_individually(element):
+    """Extract the attributes of a given element with one round-trip per attribute.
+
+    It returns a dictionary of attributes.
+    """
+    if element is None:
+        return {}
+
+    attrs = ELEMENT_PROPERTIES
+    attributes = ELEMENT_ATTRIBUTES
 
     data = {}
     try:
@@ -233,6 +657,8 @@ def swipe(appium_driver, start_location_id, end_location_id, repetitions):
         actions.w3c_actions.pointer_action.release()
         actions.perform()
 
+    invalidate_snapshot(appium_driver)
+
 
 # def verify_text(appium_driver, element_id: str, expected_text: str):
 #     """."""
@@ -248,37 +674,48 @@ def swipe(appium_driver, start_location_id, end_location_id, repetitions):
 
 def verify_text(appium_driver: Remote, element_id: str, expected_text: str) -> bool:
     """Verify an element contains a specified piece of text.
- 
+
+    The text is read from a UI snapshot, so checking several elements on the same screen costs one round-trip.
+
     Args:
         appium_driver: The Appium driver.
         element_id (str): The element's ID.
         expected_text (str): The text the element should contain.
- 
+
     Returns:
         bool: True if the text matches or false if it does not.
     """
-    element = get_element(appium_driver, element_id)
-    element_text = get_text(element)
- 
+    snapshot = get_snapshot(appium_driver)
+    node = snapshot.find(element_id)
+
+    if node is None:
+        # The element may not have appeared yet, so wait for it and try again with a new snapshot.
+        get_element(appium_driver, element_id)
+        snapshot = get_snapshot(appium_driver, max_age=0)
+        node = snapshot.find(element_id)
+
+    element_text = snapshot.get_text(node, MAX_DEPTH) if node is not None else []
+
     logger.debug(f"Expected text in element '{element_id}': {expected_text}")
     logger.debug(f"Actual text in element '{element_id}': {element_text}")
- 
-    text_is_correct = element_text == expected_text
- 
+
+    text_is_correct = expected_text in element_text
+
     if text_is_correct:
         logger.debug(f"The text in '{element_id}' is correct!")
     else:
         logger.error(f"The text in '{element_id}' is INCORRECT!")
- 
+
     return text_is_correct
 
 
 def find_element(appium_driver, element_id):
     """Get the WebElement by ID."""
     try:
-        element = WebDriverWait(appium_driver, 10).until(
-            expected_conditions.presence_of_element_located((AppiumBy.ID, element_id))
-        )
+        with waiting(appium_driver):
+            element = WebDriverWait(appium_driver, 10).until(
+                expected_conditions.presence_of_element_located((AppiumBy.ID, element_id))
+            )
         print(f"Element found with ID: {element_id} - Type: {type(element)}")
         return element
     except (TimeoutException, InvalidSelectorException) as e:
@@ -290,7 +727,11 @@ def is_focused(element):
     """Check if the 'selected' attribute of the element is true or false."""
     if not isinstance(element, WebElement):
         raise ValueError("Invalid argument: 'element' must be a WebElement, not a different type.")
-    checked_value = element.get_attribute("selected")
+    node = _get_snapshot_node(element, get_snapshot(element.parent), match_bounds=False)
+    if node is not None:
+        checked_value = node.get("selected")
+    else:
+        checked_value = element.get_attribute("selected")
     return checked_value.lower() == "true" if checked_value else False
 
 
@@ -302,9 +743,11 @@ def click_correct_button(off_button, on_button):
     # Determine which button is focused and click on it.
     if off_focused:
         on_button.click()
+        invalidate_snapshot(on_button.parent)
         print("Clicked on the Off button")
     elif on_focused:
         off_button.click()
+        invalidate_snapshot(off_button.parent)
         print("Click on the ON button")
     else:
         print("Test Failed")
@@ -318,4 +761,5 @@ def ensure_button_selected(element):
         print("Button is already selected.")
     else:
         element.click()
+        invalidate_snapshot(element.parent)
         print("Button was not selected; now it is selected.")
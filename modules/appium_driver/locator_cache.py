@@ -0,0 +1,140 @@
+"""Remember which search mode found each element so later searches can try it first.
+
+&copy; Copyright 2024, Fisher & Paykel Appliances Ltd
+
+All rights reserved. Fisher & Paykel's source code is an
+unpublished work and the use of a copyright notice does not imply otherwise.
+This source code contains confidential, trade secret material of
+Fisher & Paykel Appliances Ltd.
+Any attempt or participation in deciphering, decoding, reverse engineering
+or in any way altering the source code is strictly prohibited,
+unless the prior written consent of Fisher & Paykel is obtained.
+Permission to use, copy, publish, modify and distribute for any purpose
+is not permitted without specific, written prior permission from
+Fisher & Paykel Appliances Limited.
+"""
+
+import json
+import logging
+
+from pathlib import Path
+
+
+# The search modes in the order both 'appium_driver_helper._get_search_modes' and 'Start.search_modes' list them.
+SEARCH_MODE_NAMES = ("resource-id", "accessibility id", "id", "content-desc")
+
+LOCATOR_CACHE_FILE_RELATIVE_PATH = Path(".locator_cache.json")
+
+
+logger = logging.getLogger(__name__)
+
+_locator_cache = None
+
+
+class LocatorCache:
+    """A persistent map of (app package, element ID) to the search mode which last found the element.
+
+    The cache is stored as JSON so it survives across pytest sessions. It is written every time a new search mode is
+    learned, which only happens the first time an element is found or when the UI changes.
+    """
+
+    def __init__(self, path: Path = LOCATOR_CACHE_FILE_RELATIVE_PATH) -> None:
+        """Load the cache from disk.
+
+        Args:
+            path (Path): The cache file. It is created the first time a search mode is learned.
+        """
+        self._path = path
+        self._search_modes = {}
+
+        try:
+            with open(self._path, "r") as file:
+                self._search_modes = json.load(file)
+        except FileNotFoundError:
+            pass
+        except (json.JSONDecodeError, OSError) as e:
+            logger.warning(f"Ignoring unreadable locator cache '{self._path}': {e}")
+
+    def get(self, app_package: str, element_id: str) -> int | None:
+        """Get the index of the search mode which last found an element.
+
+        Args:
+            app_package (str): The app's package name.
+            element_id (str): The element's ID.
+
+        Returns:
+            int | None: An index into the search mode list, or 'None' if the element has not been found before.
+        """
+        search_mode_name = self._search_modes.get(app_package, {}).get(element_id)
+
+        if search_mode_name not in SEARCH_MODE_NAMES:
+            return None
+
+        return SEARCH_MODE_NAMES.index(search_mode_name)
+
+    def record(self, app_package: str, element_id: str, search_mode_index: int) -> None:
+        """Record the search mode which found an element and save the cache if it changed.
+
+        Args:
+            app_package (str): The app's package name.
+            element_id (str): The element's ID.
+            search_mode_index (int): An index into the search mode list.
+        """
+        search_mode_name = SEARCH_MODE_NAMES[search_mode_index]
+        app_search_modes = self._search_modes.setdefault(app_package, {})
+
+        if app_search_modes.get(element_id) == search_mode_name:
+            return
+
+        logger.debug(f"Learned search mode '{search_mode_name}' for element '{element_id}' in '{app_package}'")
+        app_search_modes[element_id] = search_mode_name
+        self._save()
+
+    def order(self, app_package: str, element_id: str, search_modes: list) -> list:
+        """Order a list of search modes so the one which last found the element comes first.
+
+        Args:
+            app_package (str): The app's package name.
+            element_id (str): The element's ID.
+            search_modes (list): The search modes, in the order given by 'SEARCH_MODE_NAMES'.
+
+        Returns:
+            list: A list of (search mode index, search mode) tuples.
+        """
+        indexed_search_modes = list(enumerate(search_modes))
+        learned_index = self.get(app_package, element_id)
+
+        if learned_index is not None:
+            indexed_search_modes.insert(0, indexed_search_modes.pop(learned_index))
+
+        return indexed_search_modes
+
+    def _save(self) -> None:
+        """Write the cache to disk.
+
+        The file is written to a temporary file first and then renamed, so a crashed test run cannot leave a partly
+        written cache behind.
+        """
+        temporary_path = self._path.with_name(self._path.name + ".tmp")
+
+        try:
+            with open(temporary_path, "w") as file:
+                json.dump(self._search_modes, file, indent=4)
+
+            temporary_path.replace(self._path)
+        except OSError as e:
+            logger.warning(f"Could not save the locator cache to '{self._path}': {e}")
+
+
+def get_locator_cache() -> LocatorCache:
+    """Get the locator cache shared by everything in this process.
+
+    Returns:
+        LocatorCache: The locator cache.
+    """
+    global _locator_cache
+
+    if _locator_cache is None:
+        _locator_cache = LocatorCache()
+
+    return _locator_cache
@@ -0,0 +1,248 @@
+"""Navigate the FCS200 dryer UI between its screens by the shortest known path.
+
+The screens are identified by signatures: the elements which are present only on that screen. The transitions are the
+actions the helpers can perform to get from one screen to another. 'goto' recognises the current screen from one UI
+snapshot and takes the fewest transitions to the target, so a scenario can start from wherever the last one left the
+app instead of restarting it and repeating the same prelude.
+
+    home               --select a material--> material settings
+    material settings  --More options-------> options
+    options            --Done---------------> material settings
+    material settings  --Start--------------> running
+    running            --Cancel-------------> cancel dialog
+    cancel dialog      --Back---------------> running
+    cancel dialog      --Cancel cycle-------> home
+    running            --fast forward-------> complete alert    (needs the dryer's IPB connection)
+    complete alert     --Done---------------> home
+
+Example:
+    screen_navigator.goto(appium_driver, screen_navigator.RUNNING)
+
+&copy; Copyright 2024, Fisher & Paykel Appliances Ltd
+
+All rights reserved. Fisher & Paykel's source code is an
+unpublished work and the use of a copyright notice does not imply otherwise.
+This source code contains confidential, trade secret material of
+Fisher & Paykel Appliances Ltd.
+Any attempt or participation in deciphering, decoding, reverse engineering
+or in any way altering the source code is strictly prohibited,
+unless the prior written consent of Fisher & Paykel is obtained.
+Permission to use, copy, publish, modify and distribute for any purpose
+is not permitted without specific, written prior permission from
+Fisher & Paykel Appliances Limited.
+"""
+
+import logging
+import modules.appium_driver.appium_driver_helper as appium_driver_helper
+import random
+
+from appium.webdriver import Remote
+from collections import deque
+from collections.abc import Callable
+from typing import NamedTuple
+
+
+HOME = "home"
+MATERIAL_SETTINGS = "material settings"
+OPTIONS = "options"
+RUNNING = "running"
+CANCEL_DIALOG = "cancel dialog"
+COMPLETE_ALERT = "complete alert"
+
+# The elements which identify each screen. Screens which can appear over others are listed first, so 'detect_screen'
+# checks them before the screens they cover.
+SCREEN_SIGNATURES = {
+    COMPLETE_ALERT: ["Add more time", "Done"],
+    CANCEL_DIALOG: ["button-back", "Confirm"],
+    OPTIONS: ["Crease free", "damp dry alert"],
+    RUNNING: ["button-cancel", "button-options"],
+    MATERIAL_SETTINGS: ["button-start", "button-delay", "button-save"],
+    HOME: ["title"],
+}
+
+MATERIALS = ["Cashmere", "Acrylic", "Viscose", "Lyocell", "Hemp", "Ramie", "Nylon"]  # Below the fold of the list.
+
+SCREEN_TIMEOUT = 10.0  # The maximum time for a transition's target screen to appear, in seconds.
+MAX_TRANSITIONS = 10  # The most transitions 'goto' takes, including ones which land on an unexpected screen.
+
+
+logger = logging.getLogger(__name__)
+
+
+class Transition(NamedTuple):
+    """An action which takes the UI from one screen to another."""
+
+    source: str
+    target: str
+    description: str
+    action: Callable  # Called with the Appium driver and the dryer's IPB controller (or 'None').
+    needs_dryer_control: bool = False
+
+
+def _select_material(appium_driver: Remote, _) -> None:
+    """Scroll the materials list and select a random material.
+
+    Args:
+        appium_driver (Remote): The Appium driver.
+    """
+    appium_driver_helper.wait_for_screen(appium_driver, ["Down", "Mixed"])
+    appium_driver_helper.swipe(appium_driver, "Down", "Mixed", 2)
+    material = random.choice(MATERIALS)
+    logger.info(f"Selecting random material: {material}")
+    appium_driver_helper.click(appium_driver, material)
+
+
+def _click_action(element_id: str) -> Callable:
+    """Make an action which clicks an element.
+
+    Args:
+        element_id (str): The element's ID.
+
+    Returns:
+        Callable: The action.
+    """
+    return lambda appium_driver, _: appium_driver_helper.click(appium_driver, element_id)
+
+
+def _fast_forward(_, dryer_control) -> None:
+    """Drive the running cycle to completion in test mode.
+
+    Args:
+        dryer_control (HD_control): The dryer's IPB controller.
+    """
+    dryer_control.fast_forward_to_complete()
+
+
+TRANSITIONS = [
+    Transition(HOME, MATERIAL_SETTINGS, "select a material", _select_material),
+    Transition(MATERIAL_SETTINGS, OPTIONS, "click More options", _click_action("More options")),
+    Transition(OPTIONS, MATERIAL_SETTINGS, "click Done", _click_action("Done")),
+    Transition(MATERIAL_SETTINGS, RUNNING, "click Start", _click_action("button-start")),
+    Transition(RUNNING, CANCEL_DIALOG, "click Cancel", _click_action("button-cancel")),
+    Transition(CANCEL_DIALOG, RUNNING, "click Back", _click_action("Back")),
+    Transition(CANCEL_DIALOG, HOME, "click Cancel cycle", _click_action("Cancel cycle")),
+    Transition(RUNNING, COMPLETE_ALERT, "fast forward the cycle", _fast_forward, needs_dryer_control=True),
+    Transition(COMPLETE_ALERT, HOME, "click Done", _click_action("Done")),
+]
+
+
+def detect_screen(appium_driver: Remote) -> str | None:
+    """Recognise the current screen from one UI snapshot.
+
+    Args:
+        appium_driver (Remote): The Appium driver.
+
+    Returns:
+        str | None: The screen, or 'None' if no screen's signature is complete.
+    """
+    snapshot = appium_driver_helper.get_snapshot(appium_driver, max_age=0)
+
+    for screen, signature in SCREEN_SIGNATURES.items():
+        if all(snapshot.is_present(element_id) for element_id in signature):
+            return screen
+
+    return None
+
+
+def find_path(source: str, target: str, can_fast_forward: bool = False) -> list | None:
+    """Find the fewest transitions from one screen to another, by breadth-first search.
+
+    Args:
+        source (str): The screen to start from.
+        target (str): The screen to reach.
+        can_fast_forward (bool): Whether transitions which need the dryer's IPB connection can be used. Defaults to
+            False.
+
+    Returns:
+        list | None: The transitions, in order (empty if the source is the target), or 'None' if there is no path.
+    """
+    previous = {source: None}  # Screen -> the transition which first reached it.
+    queue = deque([source])
+
+    while queue:
+        screen = queue.popleft()
+
+        if screen == target:
+            path = []
+
+            while previous[screen] is not None:
+                path.append(previous[screen])
+                screen = previous[screen].source
+
+            return path[::-1]
+
+        for transition in TRANSITIONS:
+            if (
+                transition.source == screen
+                and transition.target not in previous
+                and (can_fast_forward or not transition.needs_dryer_control)
+            ):
+                previous[transition.target] = transition
+                queue.append(transition.target)
+
+    return None
+
+
+def goto(appium_driver: Remote, target: str, dryer_control=None, timeout: float = SCREEN_TIMEOUT) -> list:
+    """Go to a screen by the shortest path from the current one.
+
+    The path is planned again after every transition, so a transition which lands on an unexpected screen costs one
+    detour rather than a failure. The app is restarted only if the current screen is unknown or the target cannot be
+    reached from it.
+
+    Args:
+        appium_driver (Remote): The Appium driver.
+        target (str): The screen to go to. For example: 'RUNNING'.
+        dryer_control (HD_control): The dryer's IPB controller, for transitions which need it. Defaults to 'None'.
+        timeout (float): The maximum time for each transition's target screen to appear, in seconds. Defaults to
+            'SCREEN_TIMEOUT'.
+
+    Returns:
+        list: The screens visited, starting with the current screen and ending with the target.
+
+    Raises:
+        RuntimeError: If the target is not reached within 'MAX_TRANSITIONS' transitions, or cannot be reached even
+            from the home screen.
+    """
+    screen = detect_screen(appium_driver)
+
+    if screen is None:
+        appium_driver_helper.wait_until_stable(appium_driver)  # The UI may be between screens.
+        screen = detect_screen(appium_driver)
+
+    visited = [screen]
+    restarted = False
+
+    while screen != target:
+        if len(visited) > MAX_TRANSITIONS:
+            raise RuntimeError(f"Could not reach the {target} screen! Screens visited: {visited}")
+
+        path = find_path(screen, target, dryer_control is not None) if screen is not None else None
+
+        if path is None:
+            if restarted:
+                raise RuntimeError(f"No path from the {screen} screen to the {target} screen! Visited: {visited}")
+
+            logger.info(f"No path from the {screen} screen to the {target} screen; restarting the app")
+            appium_driver_helper.restart_app(appium_driver)  # Returns on the home screen.
+            screen = HOME
+            visited.append(screen)
+            restarted = True
+            continue
+
+        transition = path[0]
+        logger.info(f"{transition.source} -> {transition.target}: {transition.description}")
+        transition.action(appium_driver, dryer_control)
+
+        try:
+            appium_driver_helper.wait_for_screen(appium_driver, SCREEN_SIGNATURES[transition.target], timeout)
+            screen = transition.target
+        except RuntimeError:
+            screen = detect_screen(appium_driver)
+            logger.warning(f"Expected the {transition.target} screen after '{transition.description}', got {screen}")
+
+        visited.append(screen)
+
+    logger.info(f"Reached the {target} screen: {' -> '.join(str(screen) for screen in visited)}")
+
+    return visited
@@ -0,0 +1,268 @@
+"""Reuse one Appium server and session across test runs instead of starting new ones every time.
+
+Starting the Appium server takes several seconds, and starting a UiAutomator2 session takes longer again (installing
+the server on the device and launching the app). The session broker:
+
+    - reuses a server already answering on the address and port, and only starts one (or restarts the one it started)
+      when the server's status check fails,
+    - leaves the servers it starts running when the process exits, with their output in a log file, so the next run
+      can reuse them,
+    - saves the ID of every session it creates, with the capabilities it was created with, and reattaches to it when
+      it is still alive and the capabilities match,
+    - creates sessions with a long 'newCommandTimeout', so they survive between runs.
+
+Example:
+    appium_driver = get_session_broker().get_driver(capabilities)
+
+&copy; Copyright 2024, Fisher & Paykel Appliances Ltd
+
+All rights reserved. Fisher & Paykel's source code is an
+unpublished work and the use of a copyright notice does not imply otherwise.
+This source code contains confidential, trade secret material of
+Fisher & Paykel Appliances Ltd.
+Any attempt or participation in deciphering, decoding, reverse engineering
+or in any way altering the source code is strictly prohibited,
+unless the prior written consent of Fisher & Paykel is obtained.
+Permission to use, copy, publish, modify and distribute for any purpose
+is not permitted without specific, written prior permission from
+Fisher & Paykel Appliances Limited.
+"""
+
+import json
+import logging
+import urllib.error
+import urllib.request
+
+from appium.options.android import UiAutomator2Options
+from appium.webdriver import Remote
+from appium.webdriver.appium_service import AppiumService
+from pathlib import Path
+
+
+APPIUM_ADDRESS = "127.0.0.1"
+APPIUM_PORT = 4723
+SERVER_START_TIMEOUT_MS = 20000
+STATUS_TIMEOUT = 2.0  # Seconds to wait for the server to answer a status or session check.
+NEW_COMMAND_TIMEOUT = 3600  # Seconds Appium keeps an idle session, long enough to reuse it in the next run.
+
+SESSION_FILE_RELATIVE_PATH = Path(".appium_session.json")
+SERVER_LOG_FILE_RELATIVE_PATH = Path("appium_server.log")
+
+
+logger = logging.getLogger(__name__)
+
+_session_brokers = {}  # The session broker of each port.
+
+
+def _get_json(url: str) -> dict | None:
+    """Send a GET request to the Appium server.
+
+    Args:
+        url (str): The URL.
+
+    Returns:
+        dict | None: The response's JSON, or 'None' if the server did not answer successfully in time.
+    """
+    try:
+        with urllib.request.urlopen(url, timeout=STATUS_TIMEOUT) as response:
+            return json.load(response)
+    except (OSError, ValueError):  # Includes connection errors, HTTP errors, and timeouts.
+        return None
+
+
+class _AttachedRemote(Remote):
+    """An Appium driver attached to an existing session instead of creating one."""
+
+    def __init__(self, server_url: str, session_id: str, capabilities: dict, options: UiAutomator2Options) -> None:
+        """Attach to a session.
+
+        Args:
+            server_url (str): The Appium server's URL.
+            session_id (str): The session's ID.
+            capabilities (dict): The capabilities the server returned when the session was created.
+            options (UiAutomator2Options): The options the session was created with.
+        """
+        self._attached_session_id = session_id
+        self._attached_capabilities = capabilities
+        super().__init__(server_url, options=options)
+
+    def start_session(self, *_, **__) -> None:
+        """Use the existing session rather than sending a new session request."""
+        self.session_id = self._attached_session_id
+        self.caps = self._attached_capabilities
+
+
+class AppiumSessionBroker:
+    """Finds or starts the Appium server, and finds or creates the session, for one address and port."""
+
+    def __init__(
+        self,
+        address: str = APPIUM_ADDRESS,
+        port: int = APPIUM_PORT,
+        session_file_path: Path = SESSION_FILE_RELATIVE_PATH,
+    ) -> None:
+        """Create a broker. Nothing is started until a server or driver is asked for.
+
+        Args:
+            address (str): The Appium server's address. Defaults to 'APPIUM_ADDRESS'.
+            port (int): The Appium server's port. Defaults to 'APPIUM_PORT'.
+            session_file_path (Path): The file the session to reuse is saved in. Defaults to
+                'SESSION_FILE_RELATIVE_PATH'.
+        """
+        self.address = address
+        self.port = port
+        self.server_url = f"http://{address}:{port}"
+        self.session_file_path = session_file_path
+        self.service = None  # The server this broker started, if it started one.
+
+    def is_server_healthy(self) -> bool:
+        """Check the server answers its status request and is ready for sessions.
+
+        Returns:
+            bool: True if the server is ready.
+        """
+        status = _get_json(f"{self.server_url}/status")
+
+        return status is not None and status.get("value", {}).get("ready", True) is not False
+
+    def ensure_server(self) -> str:
+        """Make sure a healthy server is running, starting (or restarting) one only if the status check fails.
+
+        Returns:
+            str: The server's URL.
+
+        Raises:
+            RuntimeError: If a server could not be started.
+        """
+        if self.is_server_healthy():
+            logger.debug(f"Reusing the Appium server at {self.server_url}")
+            return self.server_url
+
+        logger.info(f"No healthy Appium server at {self.server_url}; starting one")
+
+        if self.service is None:
+            self.service = AppiumService()
+
+        # Write the output to a file rather than a pipe, so the server keeps running after this process exits.
+        with open(SERVER_LOG_FILE_RELATIVE_PATH, "ab") as log_file:
+            self.service.start(
+                args=["--address", self.address, "-p", str(self.port)],
+                timeout_ms=SERVER_START_TIMEOUT_MS,
+                stdout=log_file,
+                stderr=log_file,
+            )
+
+        if not self.is_server_healthy():
+            raise RuntimeError(f"Could not start the Appium server at {self.server_url}!")
+
+        return self.server_url
+
+    def stop(self) -> None:
+        """Stop the server, if this broker started it. Servers started by other processes are left running."""
+        if self.service is not None:
+            self.service.stop()
+            self.service = None
+
+    def is_session_alive(self, session_id: str) -> bool:
+        """Check a session still exists on the server.
+
+        Args:
+            session_id (str): The session's ID.
+
+        Returns:
+            bool: True if the server still knows the session.
+        """
+        return _get_json(f"{self.server_url}/session/{session_id}/timeouts") is not None
+
+    def get_driver(self, capabilities: dict, reuse_session: bool = True) -> Remote:
+        """Get a driver, reattaching to the saved session if it is alive and was created with the same capabilities.
+
+        Args:
+            capabilities (dict): The capabilities. 'newCommandTimeout' defaults to 'NEW_COMMAND_TIMEOUT'.
+            reuse_session (bool): Whether to reattach to the saved session. False always creates a new session.
+                Defaults to True.
+
+        Returns:
+            Remote: The driver.
+        """
+        self.ensure_server()
+
+        options = UiAutomator2Options().load_capabilities(capabilities)
+
+        if options.new_command_timeout is None:
+            options.new_command_timeout = NEW_COMMAND_TIMEOUT
+
+        requested_capabilities = options.to_capabilities()
+        saved_session = self._load_session() if reuse_session else None
+
+        if (
+            saved_session is not None
+            and saved_session.get("server_url") == self.server_url
+            and saved_session.get("requested_capabilities") == requested_capabilities
+            and self.is_session_alive(saved_session["session_id"])
+        ):
+            logger.info(f"Reattaching to Appium session {saved_session['session_id']}")
+            return _AttachedRemote(
+                self.server_url, saved_session["session_id"], saved_session["capabilities"], options
+            )
+
+        logger.info(f"Creating an Appium session at {self.server_url}")
+        driver = Remote(self.server_url, options=options)
+        self._save_session(driver.session_id, requested_capabilities, driver.capabilities)
+
+        return driver
+
+    def _load_session(self) -> dict | None:
+        """Read the saved session.
+
+        Returns:
+            dict | None: The saved session, or 'None' if there is none or the file is unreadable.
+        """
+        try:
+            with open(self.session_file_path, "r") as file:
+                return json.load(file)
+        except FileNotFoundError:
+            return None
+        except (json.JSONDecodeError, OSError) as e:
+            logger.warning(f"Ignoring unreadable Appium session file '{self.session_file_path}': {e}")
+            return None
+
+    def _save_session(self, session_id: str, requested_capabilities: dict, capabilities: dict) -> None:
+        """Save a session so the next run can reattach to it.
+
+        Args:
+            session_id (str): The session's ID.
+            requested_capabilities (dict): The capabilities the session was requested with, to compare with later
+                requests.
+            capabilities (dict): The capabilities the server returned.
+        """
+        session = {
+            "server_url": self.server_url,
+            "session_id": session_id,
+            "requested_capabilities": requested_capabilities,
+            "capabilities": capabilities,
+        }
+        temporary_path = self.session_file_path.with_name(self.session_file_path.name + ".tmp")
+
+        try:
+            with open(temporary_path, "w") as file:
+                json.dump(session, file, indent=4)
+
+            temporary_path.replace(self.session_file_path)
+        except (OSError, TypeError) as e:
+            logger.warning(f"Could not save the Appium session to '{self.session_file_path}': {e}")
+
+
+def get_session_broker(port: int = APPIUM_PORT) -> AppiumSessionBroker:
+    """Get the session broker for the default address and a port, shared by everything in this process.
+
+    Args:
+        port (int): The Appium server's port. Defaults to 'APPIUM_PORT'.
+
+    Returns:
+        AppiumSessionBroker: The session broker.
+    """
+    if port not in _session_brokers:
+        _session_brokers[port] = AppiumSessionBroker(port=port)
+
+    return _session_brokers[port]
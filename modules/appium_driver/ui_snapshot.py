@@ -0,0 +1,252 @@
+"""Answer UI queries locally from one fetch of the UI hierarchy.
+
+A snapshot fetches 'driver.page_source' once, parses it, and indexes the nodes by resource-id, content-desc, class, and
+bounds. Text, attribute, presence, and absence queries are then answered without any further round-trips to the
+Appium server.
+
+&copy; Copyright 2024, Fisher & Paykel Appliances Ltd
+
+All rights reserved. Fisher & Paykel's source code is an
+unpublished work and the use of a copyright notice does not imply otherwise.
+This source code contains confidential, trade secret material of
+Fisher & Paykel Appliances Ltd.
+Any attempt or participation in deciphering, decoding, reverse engineering
+or in any way altering the source code is strictly prohibited,
+unless the prior written consent of Fisher & Paykel is obtained.
+Permission to use, copy, publish, modify and distribute for any purpose
+is not permitted without specific, written prior permission from
+Fisher & Paykel Appliances Limited.
+"""
+
+import logging
+import re
+import xml.etree.ElementTree as ElementTree
+
+from appium.webdriver import Remote
+from time import monotonic
+
+
+BOUNDS_REGEX = re.compile(r"\[(-?\d+),(-?\d+)\]\[(-?\d+),(-?\d+)\]")
+
+
+logger = logging.getLogger(__name__)
+
+
+class UISnapshot:
+    """An indexed, in-memory copy of the UI hierarchy at one point in time."""
+
+    def __init__(self, page_source: str) -> None:
+        """Parse and index the UI hierarchy.
+
+        Args:
+            page_source (str): The UI hierarchy XML from 'driver.page_source'.
+        """
+        self.page_source = page_source
+        self.timestamp = monotonic()
+
+        self._root = ElementTree.fromstring(page_source)
+        self._nodes = list(self._root.iter())
+        self._positions = {id(node): position for position, node in enumerate(self._nodes)}
+
+        self._by_resource_id = {}
+        self._by_content_desc = {}
+        self._by_class = {}
+        self._by_bounds = {}
+        self._texts = {}  # Cached results of 'get_text', keyed by (node ID, depth).
+
+        for node in self._nodes:
+            resource_id = node.get("resource-id")
+
+            if resource_id:
+                self._by_resource_id.setdefault(resource_id, []).append(node)
+
+                # Also index the ID without its '<package>:id/' prefix, as the ID search mode would match it.
+                _, separator, short_id = resource_id.partition(":id/")
+
+                if separator:
+                    self._by_resource_id.setdefault(short_id, []).append(node)
+
+            for index, attribute in (
+                (self._by_content_desc, "content-desc"),
+                (self._by_class, "class"),
+                (self._by_bounds, "bounds"),
+            ):
+                value = node.get(attribute)
+
+                if value:
+                    index.setdefault(value, []).append(node)
+
+    @classmethod
+    def take(cls, appium_driver: Remote) -> "UISnapshot":
+        """Fetch the UI hierarchy from the Appium server and create a snapshot of it.
+
+        Args:
+            appium_driver (Remote): The Appium driver.
+
+        Returns:
+            UISnapshot: The snapshot.
+        """
+        snapshot = cls(appium_driver.page_source)
+        logger.debug(f"Took a UI snapshot with {len(snapshot._nodes)} nodes")
+
+        return snapshot
+
+    @property
+    def age(self) -> float:
+        """The number of seconds since the snapshot was taken."""
+        return monotonic() - self.timestamp
+
+    def find_all(self, element_id: str) -> list:
+        """Find the nodes which match an element ID in any search mode, in document order.
+
+        A node matches if its resource-id (with or without the '<package>:id/' prefix) or its content-desc equals the
+        element ID, which are the same search modes used by 'appium_driver_helper.get_element'.
+
+        Args:
+            element_id (str): The element's ID.
+
+        Returns:
+            list: The matching nodes.
+        """
+        nodes = self._by_resource_id.get(element_id, []) + self._by_content_desc.get(element_id, [])
+        unique_nodes = {id(node): node for node in nodes}.values()
+
+        return sorted(unique_nodes, key=lambda node: self._positions[id(node)])
+
+    def find(self, element_id: str) -> ElementTree.Element | None:
+        """Find the first node which matches an element ID in any search mode.
+
+        Args:
+            element_id (str): The element's ID.
+
+        Returns:
+            Element | None: The first matching node in document order, or 'None' if there is no match.
+        """
+        nodes = self.find_all(element_id)
+
+        return nodes[0] if nodes else None
+
+    def find_by_class(self, class_name: str) -> list:
+        """Find the nodes with a class name, in document order.
+
+        Args:
+            class_name (str): The class name. For example: "android.widget.Button".
+
+        Returns:
+            list: The matching nodes.
+        """
+        return list(self._by_class.get(class_name, []))
+
+    def find_by_bounds(self, bounds: str) -> list:
+        """Find the nodes with the given bounds, in document order.
+
+        Args:
+            bounds (str): The bounds in the page source format. For example: "[0,0][1280,800]".
+
+        Returns:
+            list: The matching nodes.
+        """
+        return list(self._by_bounds.get(bounds, []))
+
+    def is_present(self, element_id: str) -> bool:
+        """Check whether an element is in the snapshot.
+
+        Args:
+            element_id (str): The element's ID.
+
+        Returns:
+            bool: True if at least one node matches the element ID.
+        """
+        return bool(self._by_resource_id.get(element_id) or self._by_content_desc.get(element_id))
+
+    def get_present(self, element_ids: list) -> list:
+        """Get the element IDs which are in the snapshot.
+
+        Args:
+            element_ids (list): The element IDs to check.
+
+        Returns:
+            list: The element IDs which are present, in the order they were given. An empty list means all of them are
+                absent.
+        """
+        return [element_id for element_id in element_ids if self.is_present(element_id)]
+
+    def get_text(self, node: ElementTree.Element, depth: int | None = None) -> list:
+        """Get the text of a node and its descendants.
+
+        The text of a node is its content-desc, which is where Flutter puts the text shown on screen. Results are
+        cached for the lifetime of the snapshot.
+
+        Args:
+            node (Element): The node.
+            depth (int | None): The number of levels of descendants to include, or 'None' to include all of them.
+                Defaults to None.
+
+        Returns:
+            list: The non-empty texts, in document order, without duplicates.
+        """
+        cache_key = (id(node), depth)
+
+        if cache_key in self._texts:
+            return list(self._texts[cache_key])
+
+        texts = []
+        seen_texts = set()
+        stack = [(node, 0)]
+
+        while stack:
+            current_node, current_depth = stack.pop()
+            text = current_node.get("content-desc")
+
+            if text not in [None, "", "null"] and text not in seen_texts:
+                seen_texts.add(text)
+                texts.append(text)
+
+            if depth is None or current_depth < depth:
+                # Push the children in reverse so they are popped in document order.
+                stack.extend((child, current_depth + 1) for child in reversed(current_node))
+
+        self._texts[cache_key] = texts
+
+        return list(texts)
+
+    def get_attribute(self, node: ElementTree.Element, attribute: str) -> str | None:
+        """Get one of a node's attributes.
+
+        Args:
+            node (Element): The node.
+            attribute (str): The attribute's name. For example: "selected".
+
+        Returns:
+            str | None: The attribute's value, or 'None' if the node does not have the attribute.
+        """
+        return node.get(attribute)
+
+    def get_attributes(self, node: ElementTree.Element, attribute_names: list) -> dict:
+        """Get a dictionary of a node's attributes, as 'appium_driver_helper.get_attributes' reports them.
+
+        The location, tag name, and size are worked out from the node's bounds and class, so they do not need to be
+        read from the server.
+
+        Args:
+            node (Element): The node.
+            attribute_names (list): The attributes to include. Attributes the node does not have are set to 'None'.
+
+        Returns:
+            dict: The attributes, plus "location" ({"x", "y"}), "tag_name", and "size" ({"width", "height"}).
+        """
+        data = {}
+        bounds_match = BOUNDS_REGEX.fullmatch(node.get("bounds", ""))
+
+        if bounds_match is not None:
+            left, top, right, bottom = (int(value) for value in bounds_match.groups())
+            data["location"] = {"x": left, "y": top}
+            data["tag_name"] = node.get("class", node.tag)
+            data["size"] = {"width": right - left, "height": bottom - top}
+        else:
+            data["tag_name"] = node.get("class", node.tag)
+
+        for attribute_name in attribute_names:
+            data[attribute_name] = node.get(attribute_name)
+
+        return data
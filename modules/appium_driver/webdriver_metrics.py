@@ -0,0 +1,338 @@
+"""Count and time every WebDriver command an Appium driver sends, and summarise them per test step.
+
+'instrument' wraps the driver's command executor, so every command (whichever helper or test sent it) is timed and
+classified by its name, the locator it used, and its outcome. Commands are grouped by what they spend time on:
+
+    lookup   - finding elements and reading the page source
+    gesture  - clicks, key presses, touch actions, and 'mobile:' gesture scripts
+    other    - everything else, for example reading attributes or restarting the app
+
+The time inside 'waiting' blocks which no command accounts for (the sleeps between polls) is reported as wait; the
+commands sent while polling still count as lookups.
+
+The time in a step which no command accounts for (test code, 'sleep' calls, IPB traffic) is reported as idle. The test
+hooks write each step's summary (see 'WebDriverMetrics.end_step') to its step attributes, and the report shows which
+group dominated each step. App restarts made with 'appium_driver_helper.restart_app' are listed with how long the app
+took to become usable again.
+
+&copy; Copyright 2024, Fisher & Paykel Appliances Ltd
+
+All rights reserved. Fisher & Paykel's source code is an
+unpublished work and the use of a copyright notice does not imply otherwise.
+This source code contains confidential, trade secret material of
+Fisher & Paykel Appliances Ltd.
+Any attempt or participation in deciphering, decoding, reverse engineering
+or in any way altering the source code is strictly prohibited,
+unless the prior written consent of Fisher & Paykel is obtained.
+Permission to use, copy, publish, modify and distribute for any purpose
+is not permitted without specific, written prior permission from
+Fisher & Paykel Appliances Limited.
+"""
+
+import heapq
+import logging
+import weakref
+
+from appium.webdriver import Remote
+from contextlib import contextmanager, nullcontext
+from time import perf_counter
+from typing import NamedTuple
+
+
+LOOKUP = "lookup"
+WAIT = "wait"
+GESTURE = "gesture"
+OTHER = "other"
+IDLE = "idle"
+GROUPS = (LOOKUP, WAIT, GESTURE, OTHER)
+
+LOOKUP_COMMANDS = {"findElement", "findElements", "findChildElement", "findChildElements", "getPageSource"}
+GESTURE_COMMANDS = {"actions", "clickElement", "sendKeysToElement", "clearElement", "touchAction", "multiTouchAction"}
+SCRIPT_COMMANDS = {"w3cExecuteScript", "w3cExecuteScriptAsync", "executeScript", "executeAsyncScript"}
+
+MAX_LOCATOR_LENGTH = 120  # Union XPath locators can be very long; the start is enough to recognise them.
+MAX_REMEMBERED_ELEMENTS = 1024  # Element IDs remembered so commands on an element can name the locator it was found by.
+NUM_SLOWEST_COMMANDS = 5  # The slowest commands listed in each step's summary.
+
+OK = "ok"
+
+
+logger = logging.getLogger(__name__)
+
+_metrics = weakref.WeakKeyDictionary()  # The metrics of each instrumented Appium driver.
+_active_metrics = None
+
+
+class CommandRecord(NamedTuple):
+    """One WebDriver command and how long it took."""
+
+    name: str  # The WebDriver command. For example: "findElements".
+    locator: str  # The locator, script, or element locator the command used, or an empty string.
+    group: str  # 'LOOKUP', 'GESTURE', or 'OTHER'.
+    latency: float  # Seconds from sending the command to receiving the response.
+    outcome: str  # 'OK', or the name of the exception the command raised.
+
+
+def _shorten(locator: str) -> str:
+    """Shorten a locator for the report.
+
+    Args:
+        locator (str): The locator.
+
+    Returns:
+        str: The locator, cut to 'MAX_LOCATOR_LENGTH' characters.
+    """
+    return locator if len(locator) <= MAX_LOCATOR_LENGTH else locator[: MAX_LOCATOR_LENGTH - 3] + "..."
+
+
+class WebDriverMetrics:
+    """The WebDriver commands of one Appium driver, collected step by step."""
+
+    def __init__(self, appium_driver: Remote) -> None:
+        """Wrap the driver's command executor. Use 'instrument' rather than creating this directly.
+
+        Args:
+            appium_driver (Remote): The Appium driver.
+        """
+        self.app_restarts = []  # The latencies of the app restarts since the current step started, in seconds.
+        self.total_commands = 0
+
+        self._executor = appium_driver.command_executor
+        self._execute = self._executor.execute
+        self._element_locators = {}  # WebDriver element ID -> the locator which found it.
+        self._wait_depth = 0
+        self._wait_start_time = 0.0
+        self._wait_start_command_time = 0.0
+        self._command_time = 0.0  # Seconds spent in commands since the instrumenting started.
+        self.start_step()
+
+        self._executor.execute = self._timed_execute
+
+    def uninstall(self) -> None:
+        """Restore the driver's original command executor."""
+        self._executor.execute = self._execute
+
+    def start_step(self) -> None:
+        """Forget the commands of the previous step and start timing a new one."""
+        self.app_restarts = []
+        self._totals = dict.fromkeys(GROUPS, 0.0)
+        self._counts = dict.fromkeys(GROUPS, 0)
+        self._errors = 0
+        self._slowest = []  # A min-heap of (latency, sequence number, CommandRecord), the slowest commands of the step.
+        self._step_start_time = perf_counter()
+
+    def end_step(self) -> dict:
+        """Summarise the commands sent since 'start_step'.
+
+        Returns:
+            dict: A JSON-friendly summary with "duration" (seconds), "commands", "errors", "totals" and "counts" (per
+                group, including 'IDLE' in "totals"; the 'WAIT' count is the number of 'waiting' blocks), "dominant"
+                (the group with the largest total), "slowest"
+                (the slowest commands, each with "name", "locator", "group", "latency", and "outcome"), and
+                "app_restarts" (the latency of each app restart, in seconds).
+        """
+        duration = perf_counter() - self._step_start_time
+        totals = dict(self._totals)
+        totals[IDLE] = max(0.0, duration - sum(totals.values()))
+
+        slowest = [record for _, _, record in sorted(self._slowest, reverse=True)]
+
+        return {
+            "duration": round(duration, 3),
+            "commands": sum(count for group, count in self._counts.items() if group != WAIT),
+            "errors": self._errors,
+            "totals": {group: round(total, 3) for group, total in totals.items()},
+            "counts": dict(self._counts),
+            "dominant": max(totals, key=totals.get),
+            "slowest": [{**record._asdict(), "latency": round(record.latency, 3)} for record in slowest],
+            "app_restarts": [round(latency, 3) for latency in self.app_restarts],
+        }
+
+    @contextmanager
+    def waiting(self):
+        """Count the time in a with block which its commands do not account for as waiting for the UI.
+
+        Blocks can be nested; only the outermost block's time is counted.
+        """
+        if self._wait_depth == 0:
+            self._wait_start_time = perf_counter()
+            self._wait_start_command_time = self._command_time
+
+        self._wait_depth += 1
+
+        try:
+            yield self
+        finally:
+            self._wait_depth -= 1
+
+            if self._wait_depth == 0:
+                block_time = perf_counter() - self._wait_start_time
+                block_command_time = self._command_time - self._wait_start_command_time
+                self._totals[WAIT] += max(0.0, block_time - block_command_time)
+                self._counts[WAIT] += 1
+
+    def _timed_execute(self, command: str, params: dict | None = None):
+        """Send a command through the original executor and add it to the step's totals.
+
+        Args:
+            command (str): The WebDriver command.
+            params (dict | None): The command's parameters.
+
+        Returns:
+            The executor's response.
+        """
+        start_time = perf_counter()
+        outcome = OK
+
+        try:
+            response = self._execute(command, params)
+        except Exception as e:
+            outcome = type(e).__name__
+            raise
+        finally:
+            latency = perf_counter() - start_time
+            locator = self._get_locator(command, params or {})
+            self._record(CommandRecord(command, locator, self._get_group(command, locator), latency, outcome))
+
+        if command in LOOKUP_COMMANDS:
+            self._remember_elements(response, locator)
+
+        return response
+
+    def _record(self, record: CommandRecord) -> None:
+        """Add a command to the step's totals, keeping only the slowest commands themselves.
+
+        Args:
+            record (CommandRecord): The command.
+        """
+        self._totals[record.group] += record.latency
+        self._counts[record.group] += 1
+        self._command_time += record.latency
+        self.total_commands += 1
+
+        if record.outcome != OK:
+            self._errors += 1
+
+        entry = (record.latency, self.total_commands, record)
+
+        if len(self._slowest) < NUM_SLOWEST_COMMANDS:
+            heapq.heappush(self._slowest, entry)
+        elif entry > self._slowest[0]:
+            heapq.heapreplace(self._slowest, entry)
+
+    def _get_group(self, command: str, locator: str) -> str:
+        """Choose a command's group by the kind of command it is.
+
+        Args:
+            command (str): The WebDriver command.
+            locator (str): The command's locator, from '_get_locator'.
+
+        Returns:
+            str: 'LOOKUP', 'GESTURE', or 'OTHER'.
+        """
+        if command in LOOKUP_COMMANDS:
+            return LOOKUP
+
+        if command in GESTURE_COMMANDS or (command in SCRIPT_COMMANDS and locator.startswith("mobile:")):
+            return GESTURE
+
+        return OTHER
+
+    def _get_locator(self, command: str, params: dict) -> str:
+        """Describe what a command acted on.
+
+        Args:
+            command (str): The WebDriver command.
+            params (dict): The command's parameters.
+
+        Returns:
+            str: "<strategy>=<value>" for lookups, the script for scripts, the locator which found the element for
+                element commands, or an empty string.
+        """
+        if "using" in params:
+            return _shorten(f"{params['using']}={params.get('value', '')}")
+
+        if command in SCRIPT_COMMANDS:
+            return _shorten(str(params.get("script", "")))
+
+        return self._element_locators.get(params.get("id"), "")
+
+    def _remember_elements(self, response: dict | None, locator: str) -> None:
+        """Remember the locator which found the elements in a lookup's response.
+
+        Args:
+            response (dict | None): The lookup's response.
+            locator (str): The lookup's locator.
+        """
+        value = (response or {}).get("value")
+        elements = value if isinstance(value, list) else [value]
+
+        if len(self._element_locators) + len(elements) > MAX_REMEMBERED_ELEMENTS:
+            self._element_locators.clear()
+
+        for element in elements:
+            if isinstance(element, dict):
+                for element_id in element.values():
+                    self._element_locators[element_id] = locator
+
+
+def instrument(appium_driver: Remote) -> WebDriverMetrics:
+    """Start recording an Appium driver's commands, and make its metrics the ones the test hooks report.
+
+    Args:
+        appium_driver (Remote): The Appium driver.
+
+    Returns:
+        WebDriverMetrics: The driver's metrics. Instrumenting a driver twice returns the same metrics.
+    """
+    global _active_metrics
+
+    metrics = _metrics.get(appium_driver)
+
+    if metrics is None:
+        metrics = WebDriverMetrics(appium_driver)
+        _metrics[appium_driver] = metrics
+
+    _active_metrics = metrics
+
+    return metrics
+
+
+def get_active_metrics() -> WebDriverMetrics | None:
+    """Get the metrics of the driver instrumented last.
+
+    Returns:
+        WebDriverMetrics | None: The metrics, or 'None' if no driver has been instrumented.
+    """
+    return _active_metrics
+
+
+def waiting(appium_driver: Remote):
+    """Count a with block as waiting for the UI, if the driver is instrumented.
+
+    Example:
+        with webdriver_metrics.waiting(appium_driver):
+            wait.until(...)
+
+    Args:
+        appium_driver (Remote): The Appium driver.
+
+    Returns:
+        The context manager.
+    """
+    metrics = _metrics.get(appium_driver)
+
+    return metrics.waiting() if metrics is not None else nullcontext()
+
+
+def record_app_restart(appium_driver: Remote, latency: float) -> None:
+    """Record how long an app restart took, if the driver is instrumented.
+
+    Args:
+        appium_driver (Remote): The Appium driver.
+        latency (float): Seconds from terminating the app to it being usable again.
+    """
+    metrics = _metrics.get(appium_driver)
+
+    if metrics is not None:
+        metrics.app_restarts.append(latency)
@@ -0,0 +1,264 @@
+"""Describe the test rigs available, split scenarios between them by expected duration, and merge their results.
+
+The device inventory is a JSON file listing one entry per rig:
+
+    {
+        "rigs": [
+            {
+                "name": "rig-1",
+                "capabilities": {"platformName": "Android", "udid": "R58N123", ...},
+                "ipb_port": "/dev/ttyUSB0"
+            },
+            {
+                "name": "rig-2",
+                "capabilities_file": "rig-2/capabilities.json",
+                "ipb_port": "/dev/ttyUSB1",
+                "appium_port": 4730
+            }
+        ]
+    }
+
+Capabilities are given inline or as a file in the format of 'capabilities.json' (relative paths are relative to the
+inventory). Each rig gets its own Appium server port and UiAutomator2 system port, assigned from 'BASE_APPIUM_PORT' and
+'BASE_SYSTEM_PORT' unless the inventory sets them, so the rigs' sessions do not interfere.
+
+Scenarios are assigned to rigs longest first, each to the rig with the least work so far, using the durations measured
+in earlier runs. Scenarios which have never run are assumed to take the median of the known durations.
+
+&copy; Copyright 2024, Fisher & Paykel Appliances Ltd
+
+All rights reserved. Fisher & Paykel's source code is an
+unpublished work and the use of a copyright notice does not imply otherwise.
+This source code contains confidential, trade secret material of
+Fisher & Paykel Appliances Ltd.
+Any attempt or participation in deciphering, decoding, reverse engineering
+or in any way altering the source code is strictly prohibited,
+unless the prior written consent of Fisher & Paykel is obtained.
+Permission to use, copy, publish, modify and distribute for any purpose
+is not permitted without specific, written prior permission from
+Fisher & Paykel Appliances Limited.
+"""
+
+import heapq
+import json
+import logging
+import statistics
+
+from pathlib import Path
+from typing import NamedTuple
+
+
+BASE_APPIUM_PORT = 4723
+BASE_SYSTEM_PORT = 8200  # UiAutomator2's port on the host for talking to its server on the device.
+DEFAULT_SCENARIO_DURATION = 60.0  # Seconds assumed for every scenario when no durations are known.
+
+DURATIONS_FILE_RELATIVE_PATH = Path(".scenario_durations.json")
+
+RIG_ATTRIBUTE_KEY = "rig"  # The scenario attribute 'merge_results' records each scenario's rig in.
+
+
+logger = logging.getLogger(__name__)
+
+
+class Rig(NamedTuple):
+    """One test rig: a display with its own Appium session, and optionally an IPB connection to its appliance."""
+
+    name: str
+    capabilities: dict
+    ipb_port: str | None
+    appium_port: int
+
+
+def load_inventory(path: Path) -> list:
+    """Load the device inventory.
+
+    Args:
+        path (Path): The inventory file.
+
+    Returns:
+        list: The rigs, as 'Rig's, in the inventory's order.
+
+    Raises:
+        ValueError: If the inventory is empty, or rigs share a name or port.
+    """
+    path = Path(path)
+
+    with open(path, "r") as file:
+        entries = json.load(file).get("rigs", [])
+
+    if not entries:
+        raise ValueError(f"The device inventory '{path}' lists no rigs!")
+
+    rigs = []
+
+    for index, entry in enumerate(entries):
+        if "capabilities_file" in entry:
+            with open(path.parent / entry["capabilities_file"], "r") as file:
+                capabilities = json.load(file)
+        else:
+            capabilities = dict(entry.get("capabilities", {}))
+
+        if "systemPort" not in capabilities and "appium:systemPort" not in capabilities:
+            capabilities["appium:systemPort"] = BASE_SYSTEM_PORT + index
+
+        rigs.append(
+            Rig(
+                entry.get("name", f"rig-{index + 1}"),
+                capabilities,
+                entry.get("ipb_port"),
+                entry.get("appium_port", BASE_APPIUM_PORT + index),
+            )
+        )
+
+    for field in ("name", "appium_port", "ipb_port"):
+        values = [getattr(rig, field) for rig in rigs if getattr(rig, field) is not None]
+
+        if len(values) != len(set(values)):
+            raise ValueError(f"Rigs in the device inventory '{path}' must not share a {field}: {values}")
+
+    return rigs
+
+
+class DurationHistory:
+    """The latest measured duration of each scenario, by pytest node ID, kept in a JSON file between runs."""
+
+    def __init__(self, path: Path = DURATIONS_FILE_RELATIVE_PATH) -> None:
+        """Load the durations from disk.
+
+        Args:
+            path (Path): The durations file. It is created the first time durations are saved.
+        """
+        self._path = path
+        self._durations = {}
+
+        try:
+            with open(self._path, "r") as file:
+                self._durations = json.load(file)
+        except FileNotFoundError:
+            pass
+        except (json.JSONDecodeError, OSError) as e:
+            logger.warning(f"Ignoring unreadable scenario durations '{self._path}': {e}")
+
+    def get(self, node_id: str) -> float:
+        """Get a scenario's expected duration.
+
+        Args:
+            node_id (str): The scenario's pytest node ID. For example: "tests/functions/test_end.py::test_end_auto".
+
+        Returns:
+            float: Its last measured duration in seconds, or the median of the known durations if it has never run.
+        """
+        if node_id in self._durations:
+            return self._durations[node_id]
+
+        return statistics.median(self._durations.values()) if self._durations else DEFAULT_SCENARIO_DURATION
+
+    def update(self, durations: dict) -> None:
+        """Record measured durations and save them.
+
+        Args:
+            durations (dict): Node IDs mapped to durations in seconds.
+        """
+        self._durations.update(durations)
+        temporary_path = self._path.with_name(self._path.name + ".tmp")
+
+        try:
+            with open(temporary_path, "w") as file:
+                json.dump(self._durations, file, indent=4, sort_keys=True)
+
+            temporary_path.replace(self._path)
+        except OSError as e:
+            logger.warning(f"Could not save the scenario durations to '{self._path}': {e}")
+
+
+def assign_shards(node_ids: list, num_shards: int, history: DurationHistory) -> list:
+    """Split scenarios between rigs so they all finish at about the same time.
+
+    Uses the longest-processing-time rule: scenarios are taken longest first and each goes to the shard with the least
+    expected work so far. Within a shard, scenarios keep the order they were collected in, so scenarios of the same
+    file still run in file order.
+
+    Args:
+        node_ids (list): The scenarios' pytest node IDs, in collection order.
+        num_shards (int): The number of rigs.
+        history (DurationHistory): The scenarios' expected durations.
+
+    Returns:
+        list: One list of node IDs per rig. Some lists are empty if there are fewer scenarios than rigs.
+    """
+    shards = [[] for _ in range(num_shards)]
+    loads = [(0.0, shard_index) for shard_index in range(num_shards)]  # A heap of (expected seconds, shard index).
+    order = {node_id: index for index, node_id in enumerate(node_ids)}
+
+    for node_id in sorted(node_ids, key=lambda node_id: (-history.get(node_id), order[node_id])):
+        load, shard_index = heapq.heappop(loads)
+        shards[shard_index].append(node_id)
+        heapq.heappush(loads, (load + history.get(node_id), shard_index))
+
+    for shard in shards:
+        shard.sort(key=order.get)
+
+    return shards
+
+
+def _merge_timestamp(attributes: dict, other_attributes: dict, key: str, choose) -> None:
+    """Merge one timestamp attribute, keeping the earliest or latest.
+
+    Args:
+        attributes (dict): The merged attributes, updated in place.
+        other_attributes (dict): The attributes to merge in.
+        key (str): The attribute's key.
+        choose (Callable): 'min' to keep the earliest timestamp or 'max' to keep the latest.
+    """
+    timestamps = [timestamp for timestamp in (attributes.get(key), other_attributes.get(key)) if timestamp]
+
+    if timestamps:
+        attributes[key] = choose(timestamps)  # The timestamp format sorts as text.
+
+
+def merge_results(results: dict) -> dict:
+    """Merge the 'fpabart.json' data of several rigs into the data of one run.
+
+    Features which ran on several rigs are combined into one feature. Each scenario records the rig it ran on in its
+    'RIG_ATTRIBUTE_KEY' attribute, and scenarios are ordered by when they started.
+
+    Args:
+        results (dict): Rig names mapped to the JSON data of their 'fpabart.json' files.
+
+    Returns:
+        dict: The merged JSON data, in the format of 'fpabart.json'. It passes only if every rig's run passed.
+    """
+    merged = {"attributes": {}, "features": [], "result": bool(results)}
+    features_by_name = {}
+
+    for rig_name, json_data in results.items():
+        attributes = json_data.get("attributes", {})
+
+        for key, choose in (("start_timestamp", min), ("end_timestamp", max)):
+            _merge_timestamp(merged["attributes"], attributes, key, choose)
+
+        merged["result"] = merged["result"] and bool(json_data.get("result"))
+
+        for feature in json_data.get("features", []):
+            merged_feature = features_by_name.get(feature.get("name"))
+
+            if merged_feature is None:
+                merged_feature = {"name": feature.get("name"), "attributes": {}, "scenarios": [], "result": True}
+                features_by_name[feature.get("name")] = merged_feature
+                merged["features"].append(merged_feature)
+
+            for key, choose in (("start_timestamp", min), ("end_timestamp", max)):
+                _merge_timestamp(merged_feature["attributes"], feature.get("attributes", {}), key, choose)
+
+            for scenario in feature.get("scenarios", []):
+                scenario.setdefault("attributes", {})[RIG_ATTRIBUTE_KEY] = rig_name
+                merged_feature["scenarios"].append(scenario)
+
+            merged_feature["result"] = merged_feature["result"] and bool(feature.get("result"))
+
+    for feature in merged["features"]:
+        feature["scenarios"].sort(key=lambda scenario: scenario["attributes"].get("start_timestamp", ""))
+
+    merged["features"].sort(key=lambda feature: feature["attributes"].get("start_timestamp", ""))
+
+    return merged
@@ -0,0 +1,281 @@
+"""Run the test suite on several rigs at once and combine the results into one report.
+
+The scheduler collects the scenarios (pytest test functions) to run, splits them between the rigs in the device
+inventory by expected duration (see 'device_pool'), and runs one pytest worker process per rig. Each worker runs in
+its own directory under 'reports/workers', with environment variables telling the fixtures which rig to use:
+
+    FPABART_WORKER              The rig's name. The hooks leave 'fpabart.json' for the scheduler instead of reporting.
+    FPABART_APPIUM_PORT         The port of the rig's Appium server.
+    FPABART_CAPABILITIES_FILE   The rig's capabilities, in the format of 'capabilities.json'.
+    FPABART_IPB_PORT            The rig's IPB port, if it has one.
+
+When every worker has finished, the scenario durations are saved for next time, the workers' 'fpabart.json' files are
+merged, and the report is created in 'reports/latest' (and archived) as for a normal run.
+
+Usage (from the 'fpabart_tests' directory):
+    python3 ../modules/device_pool/scheduler.py --inventory devices.json tests/functions/test_end.py ...
+
+    The exit code is 0 if every scenario passed.
+
+&copy; Copyright 2024, Fisher & Paykel Appliances Ltd
+
+All rights reserved. Fisher & Paykel's source code is an
+unpublished work and the use of a copyright notice does not imply otherwise.
+This source code contains confidential, trade secret material of
+Fisher & Paykel Appliances Ltd.
+Any attempt or participation in deciphering, decoding, reverse engineering
+or in any way altering the source code is strictly prohibited,
+unless the prior written consent of Fisher & Paykel is obtained.
+Permission to use, copy, publish, modify and distribute for any purpose
+is not permitted without specific, written prior permission from
+Fisher & Paykel Appliances Limited.
+"""
+
+import argparse
+import json
+import logging
+import os
+import shutil
+import subprocess
+import sys
+import xml.etree.ElementTree as ElementTree
+
+from datetime import datetime
+from pathlib import Path
+from time import monotonic
+
+sys.path.append(str(Path(__file__).resolve().parents[2]))  # The root of the repository.
+
+from modules.device_pool.device_pool import (  # noqa: E402
+    DurationHistory,
+    Rig,
+    assign_shards,
+    load_inventory,
+    merge_results,
+)
+
+
+WORKER_ENVIRONMENT_VARIABLE = "FPABART_WORKER"
+APPIUM_PORT_ENVIRONMENT_VARIABLE = "FPABART_APPIUM_PORT"
+CAPABILITIES_ENVIRONMENT_VARIABLE = "FPABART_CAPABILITIES_FILE"
+IPB_PORT_ENVIRONMENT_VARIABLE = "FPABART_IPB_PORT"
+
+FPABART_JSON_FILE_NAME = "fpabart.json"
+JUNIT_XML_FILE_NAME = "junit.xml"
+LOG_FILE_NAME = "all.log"
+PYTEST_OUTPUT_FILE_NAME = "pytest_output.log"
+CAPABILITIES_FILE_NAME = "capabilities.json"
+
+REPORTS_DIRECTORY_RELATIVE_PATH = Path("reports")
+LATEST_REPORT_DIRECTORY_RELATIVE_PATH = REPORTS_DIRECTORY_RELATIVE_PATH / Path("latest")
+WORKERS_DIRECTORY_RELATIVE_PATH = REPORTS_DIRECTORY_RELATIVE_PATH / Path("workers")
+
+
+logger = logging.getLogger(__name__)
+
+
+def collect_scenarios(test_paths: list) -> list:
+    """Ask pytest which scenarios the test paths contain, without running them.
+
+    Args:
+        test_paths (list): Test files, directories, or node IDs, as they would be given to pytest.
+
+    Returns:
+        list: The scenarios' node IDs, in collection order.
+
+    Raises:
+        RuntimeError: If pytest could not collect the tests.
+    """
+    process = subprocess.run(
+        [sys.executable, "-m", "pytest", "--collect-only", "-q", *test_paths], capture_output=True, text=True
+    )
+
+    if process.returncode != 0:
+        raise RuntimeError(f"pytest could not collect {test_paths}!\n{process.stdout}{process.stderr}")
+
+    return [line.strip() for line in process.stdout.splitlines() if "::" in line]
+
+
+def _get_worker_environment(rig: Rig, worker_directory: Path) -> dict:
+    """Get the environment of a rig's worker.
+
+    Args:
+        rig (Rig): The rig.
+        worker_directory (Path): The worker's directory.
+
+    Returns:
+        dict: The environment variables.
+    """
+    environment = dict(os.environ)
+    environment[WORKER_ENVIRONMENT_VARIABLE] = rig.name
+    environment[APPIUM_PORT_ENVIRONMENT_VARIABLE] = str(rig.appium_port)
+    environment[CAPABILITIES_ENVIRONMENT_VARIABLE] = str((worker_directory / CAPABILITIES_FILE_NAME).resolve())
+
+    if rig.ipb_port is not None:
+        environment[IPB_PORT_ENVIRONMENT_VARIABLE] = rig.ipb_port
+    else:
+        environment.pop(IPB_PORT_ENVIRONMENT_VARIABLE, None)
+
+    # The worker runs in its own directory, so the hooks, the fixtures, and the 'modules' package must be found
+    # through the Python path rather than the current working directory.
+    python_path = [str(Path.cwd()), str(Path.cwd().parent), environment.get("PYTHONPATH", "")]
+    environment["PYTHONPATH"] = os.pathsep.join(path for path in python_path if path)
+
+    return environment
+
+
+def start_worker(rig: Rig, node_ids: list) -> subprocess.Popen:
+    """Start a pytest worker which runs scenarios on a rig.
+
+    Args:
+        rig (Rig): The rig.
+        node_ids (list): The scenarios' node IDs.
+
+    Returns:
+        subprocess.Popen: The worker process. Its output goes to 'pytest_output.log' in its directory.
+    """
+    worker_directory = WORKERS_DIRECTORY_RELATIVE_PATH / rig.name
+    worker_directory.mkdir(parents=True, exist_ok=True)
+
+    # Remove the last run's results, but keep the saved Appium session so the worker can reattach to it.
+    for file_name in (FPABART_JSON_FILE_NAME, JUNIT_XML_FILE_NAME, LOG_FILE_NAME, PYTEST_OUTPUT_FILE_NAME):
+        (worker_directory / file_name).unlink(missing_ok=True)
+
+    with open(worker_directory / CAPABILITIES_FILE_NAME, "w") as file:
+        json.dump(rig.capabilities, file, indent=4)
+
+    arguments = [
+        sys.executable,
+        "-m",
+        "pytest",
+        f"--rootdir={Path.cwd()}",  # Keep the node IDs (and the test report's class names) the same as when collected.
+        f"--junitxml={JUNIT_XML_FILE_NAME}",
+        *[str(Path.cwd() / node_id) for node_id in node_ids],
+    ]
+
+    logger.info(f"Running {len(node_ids)} scenario(s) on {rig.name} (Appium port {rig.appium_port})")
+
+    with open(worker_directory / PYTEST_OUTPUT_FILE_NAME, "w") as output_file:
+        return subprocess.Popen(
+            arguments,
+            cwd=worker_directory,
+            env=_get_worker_environment(rig, worker_directory),
+            stdout=output_file,
+            stderr=subprocess.STDOUT,
+        )
+
+
+def read_durations(junit_xml_path: Path) -> dict:
+    """Read the scenario durations a worker measured.
+
+    Args:
+        junit_xml_path (Path): The worker's JUnit XML test report.
+
+    Returns:
+        dict: Node IDs mapped to durations in seconds. Empty if the report is missing or unreadable.
+    """
+    try:
+        root = ElementTree.parse(junit_xml_path).getroot()
+    except (OSError, ElementTree.ParseError) as e:
+        logger.warning(f"Could not read the scenario durations in '{junit_xml_path}': {e}")
+        return {}
+
+    durations = {}
+
+    for test_case in root.iter("testcase"):
+        module_path = test_case.get("classname", "").replace(".", "/")
+        durations[f"{module_path}.py::{test_case.get('name')}"] = float(test_case.get("time", 0))
+
+    return durations
+
+
+def create_merged_report(results: dict) -> dict:
+    """Merge the workers' results and create and archive the report, as 'fpabart_hooks' does for a normal run.
+
+    Args:
+        results (dict): Rig names mapped to the JSON data of their 'fpabart.json' files.
+
+    Returns:
+        dict: The merged JSON data.
+    """
+    import modules.fpabart_reporting.reporter as reporter
+
+    if LATEST_REPORT_DIRECTORY_RELATIVE_PATH.exists():
+        shutil.rmtree(LATEST_REPORT_DIRECTORY_RELATIVE_PATH)
+
+    LATEST_REPORT_DIRECTORY_RELATIVE_PATH.mkdir(parents=True)
+
+    merged = merge_results(results)
+
+    with open(LATEST_REPORT_DIRECTORY_RELATIVE_PATH / FPABART_JSON_FILE_NAME, "w") as file:
+        json.dump(merged, file, indent=4)
+
+    # Keep each rig's log next to the report.
+    for rig_name in results:
+        log_path = WORKERS_DIRECTORY_RELATIVE_PATH / rig_name / LOG_FILE_NAME
+
+        if log_path.exists():
+            shutil.copy(log_path, LATEST_REPORT_DIRECTORY_RELATIVE_PATH / f"{rig_name}.log")
+
+    reporter.create_report(Path.cwd() / LATEST_REPORT_DIRECTORY_RELATIVE_PATH)
+
+    timestamp = str(datetime.now().strftime("%Y-%m-%d_%H-%M-%S"))  # noqa: DTZ005
+    shutil.copytree(LATEST_REPORT_DIRECTORY_RELATIVE_PATH, REPORTS_DIRECTORY_RELATIVE_PATH / Path(timestamp))
+
+    return merged
+
+
+def run(inventory_path: Path, test_paths: list) -> bool:
+    """Run scenarios on every rig in the inventory and create one report.
+
+    Args:
+        inventory_path (Path): The device inventory.
+        test_paths (list): Test files, directories, or node IDs, as they would be given to pytest.
+
+    Returns:
+        bool: True if every scenario passed.
+    """
+    rigs = load_inventory(inventory_path)
+    node_ids = collect_scenarios(test_paths)
+    history = DurationHistory()
+    shards = assign_shards(node_ids, len(rigs), history)
+
+    for rig, shard in zip(rigs, shards):
+        expected_duration = sum(history.get(node_id) for node_id in shard)
+        logger.info(f"{rig.name}: {len(shard)} scenario(s), about {expected_duration:.0f} s")
+
+    start_time = monotonic()
+    workers = {rig.name: start_worker(rig, shard) for rig, shard in zip(rigs, shards) if shard}
+    results = {}
+    durations = {}
+    all_workers_reported = True
+
+    for rig_name, worker in workers.items():
+        worker.wait()
+        worker_directory = WORKERS_DIRECTORY_RELATIVE_PATH / rig_name
+        durations.update(read_durations(worker_directory / JUNIT_XML_FILE_NAME))
+
+        try:
+            with open(worker_directory / FPABART_JSON_FILE_NAME, "r") as file:
+                results[rig_name] = json.load(file)
+        except (OSError, json.JSONDecodeError) as e:
+            logger.error(f"{rig_name} did not produce results (exit code {worker.returncode}): {e}")
+            all_workers_reported = False
+
+    logger.info(f"All {len(workers)} worker(s) finished after {monotonic() - start_time:.0f} s")
+
+    history.update(durations)
+    merged = create_merged_report(results)
+
+    return all_workers_reported and merged["result"]
+
+
+if __name__ == "__main__":
+    argument_parser = argparse.ArgumentParser(description="Run the test suite on every rig in a device inventory.")
+    argument_parser.add_argument("--inventory", type=Path, required=True, help="the device inventory JSON file")
+    argument_parser.add_argument("test_paths", nargs="+", help="test files, directories, or node IDs")
+    arguments = argument_parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO)
+
+    sys.exit(0 if run(arguments.inventory, arguments.test_paths) else 1)
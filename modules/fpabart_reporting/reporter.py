@@ -31,6 +31,14 @@ INDEX_HTML_FILE_NAME = "index.html"
 REPORT_PDF_FILE_NAME = "report.pdf"
 STYLES_CSS_FILE_NAME = "styles.css"
 
+ERD_TIME_SERIES_KEY = "erd_time_series"  # The scenario attribute written by 'fpabart_hooks.after_scenario'.
+CHART_WIDTH = 600
+CHART_HEIGHT = 120
+
+WEBDRIVER_METRICS_KEY = "webdriver_metrics"  # The step attribute written by 'fpabart_hooks.after_step'.
+TIMING_GROUPS = ("lookup", "wait", "gesture", "other", "idle")  # See 'modules.appium_driver.webdriver_metrics'.
+NUM_SLOWEST_STEPS = 10
+
 _directory = Path.cwd()  # The CWD is a default path. The public method will update this variable.
 
 
@@ -219,6 +227,133 @@ def _get_toc_entries(json_data: dict) -> list:
     return toc_entries
 
 
+def _get_charts(scenario: dict) -> list:
+    """Get the charts of the ERD values received during a scenario.
+
+    Args:
+        scenario (dict): The scenario from "fpabart.json".
+
+    Returns:
+        list: A list of dictionaries, one for each ERD field. Each dictionary defines: "name" (string), "points" (the
+            SVG polyline points, a string), "min_value" (float), "max_value" (float), and "duration" (the seconds
+            covered by the chart, a float). The list is empty if the scenario did not use the IPB.
+    """
+    time_series = scenario.get("attributes", {}).get(ERD_TIME_SERIES_KEY, {})
+    charts = []
+
+    for name, series in time_series.items():
+        times = series.get("times")
+        values = series.get("values")
+
+        if not times:
+            continue
+
+        min_value, max_value = min(values), max(values)
+        duration = max(times[-1], 1e-3)
+        value_range = max(max_value - min_value, 1e-9)
+
+        points = []
+        previous_y = None
+
+        for index in range(len(times)):
+            x = round(times[index] / duration * CHART_WIDTH, 1)
+            y = round(CHART_HEIGHT - (values[index] - min_value) / value_range * CHART_HEIGHT, 1)
+
+            # Draw steps rather than slopes, since an ERD keeps its value until the next publish.
+            if previous_y is not None:
+                points.append(f"{x},{previous_y}")
+
+            points.append(f"{x},{y}")
+            previous_y = y
+
+        charts.append(
+            {
+                "name": name,
+                "points": " ".join(points),
+                "min_value": min_value,
+                "max_value": max_value,
+                "duration": round(duration, 1),
+            }
+        )
+
+    return charts
+
+
+def _get_step_timing(step: dict) -> dict | None:
+    """Get where a step's time went, from the WebDriver metrics the hooks saved.
+
+    Args:
+        step (dict): The step from "fpabart.json".
+
+    Returns:
+        dict | None: A dictionary which defines "duration" (seconds, a float), "dominant" (the group which took the
+            most time, a string), "commands" (integer), "errors" (integer), "parts" (a list of dictionaries, one for
+            each group which took any time, defining "group" (string), "seconds" (float), and "percent" (float)), and
+            "app_restarts" (the seconds each app restart took, a list of floats). 'None' if the step has no metrics.
+    """
+    metrics = step.get("attributes", {}).get(WEBDRIVER_METRICS_KEY)
+
+    if not metrics:
+        return None
+
+    duration = metrics.get("duration", 0)
+    totals = metrics.get("totals", {})
+    parts = []
+
+    for group in TIMING_GROUPS:
+        seconds = totals.get(group, 0)
+
+        if seconds > 0:
+            percent = round(seconds / duration * 100, 1) if duration > 0 else 0
+            parts.append({"group": group, "seconds": round(seconds, 2), "percent": percent})
+
+    return {
+        "duration": round(duration, 2),
+        "dominant": metrics.get("dominant", ""),
+        "commands": metrics.get("commands", 0),
+        "errors": metrics.get("errors", 0),
+        "parts": parts,
+        "app_restarts": [round(latency, 2) for latency in metrics.get("app_restarts", [])],
+    }
+
+
+def _get_slowest_steps(json_data: dict) -> list:
+    """Get the slowest steps of the whole session, so the ones worth tuning first are listed together.
+
+    Args:
+        json_data (dict): The JSON data from "fpabart.json".
+
+    Returns:
+        list: Up to 'NUM_SLOWEST_STEPS' dictionaries, slowest first, each defining: "scenario_number" (integer, for HTML
+            links), "scenario_name" (string), "name" (string), and "timing" (see '_get_step_timing'). Steps without
+            WebDriver metrics are left out.
+    """
+    steps = []
+
+    for feature in json_data.get("features"):
+        scenario_number = 1
+
+        for scenario in feature.get("scenarios"):
+            for step in scenario.get("steps"):
+                timing = _get_step_timing(step)
+
+                if timing is not None:
+                    steps.append(
+                        {
+                            "scenario_number": scenario_number,
+                            "scenario_name": scenario.get("name"),
+                            "name": step.get("name"),
+                            "timing": timing,
+                        }
+                    )
+
+            scenario_number += 1
+
+    steps.sort(key=lambda step: step["timing"]["duration"], reverse=True)
+
+    return steps[:NUM_SLOWEST_STEPS]
+
+
 def _get_features(json_data: dict) -> list:
     """Get the feature data.
 
@@ -229,8 +364,9 @@ def _get_features(json_data: dict) -> list:
         list: A list of dictionaries, one for each feature. The features contain one or more scenarios and the
             scenarios contain zero or more steps. A feature dictionary has a name (string), a result class (string),
             result text (string), a list of scenarios, and a feature number (an integer, for HTML links). A scenario
-            dictionary has a name (string), a result class (string), result text (string), a list of steps, and a
-            scenario number (an integer, for HTML links). A step has a name (string), and a result class (string).
+            dictionary has a name (string), a result class (string), result text (string), a list of steps, a
+            scenario number (an integer, for HTML links), and a list of charts (see '_get_charts'). A step has a name
+            (string), a result class (string), and its timing (see '_get_step_timing').
     """
     features = json_data.get("features")
 
@@ -263,7 +399,7 @@ def _get_features(json_data: dict) -> list:
             step_dicts = []
 
             for step in scenario.get("steps"):
-                step_dict = {"name": step.get("name")}
+                step_dict = {"name": step.get("name"), "timing": _get_step_timing(step)}
 
                 if step.get("result"):
                     step_dict.update({"result_class": "pass"})
@@ -273,6 +409,7 @@ def _get_features(json_data: dict) -> list:
                 step_dicts.append(step_dict)
 
             scenario_dict.update({"steps": step_dicts})
+            scenario_dict.update({"charts": _get_charts(scenario)})
             scenario_dicts.append(scenario_dict)
             scenario_number += 1
 
@@ -298,6 +435,7 @@ def _create_html_report(
     summary_data: dict,
     toc_entries: list,
     features: list,
+    slowest_steps: list,
     year_report_generated: int,
 ) -> None:
     """Create the HTML report using the template.
@@ -318,6 +456,7 @@ def _create_html_report(
             result text (string), a list of scenarios, and a feature number (an integer, for HTML links). A scenario
             dictionary has a name (string), a result class (string), result text (string), a list of steps, and a
             scenario number (an integer, for HTML links). A step has a name (string), and a result class (string).
+        slowest_steps (list): The slowest steps, see '_get_slowest_steps'.
         year_report_generated (int): The current year (for the copyright statement).
     """
     environment = Environment(autoescape=True, loader=FileSystemLoader(_get_script_parent_directory()))
@@ -330,7 +469,10 @@ def _create_html_report(
         summary_data=summary_data,
         toc_entries=toc_entries,
         features=features,
+        slowest_steps=slowest_steps,
         year_report_generated=year_report_generated,
+        chart_width=CHART_WIDTH,
+        chart_height=CHART_HEIGHT,
     )
 
     with open(_directory / INDEX_HTML_FILE_NAME, "w") as file:
@@ -404,7 +546,10 @@ def create_report(directory: Path) -> None:
     summary_data = _get_summary_data(json_data)
     toc_entries = _get_toc_entries(json_data)
     features = _get_features(json_data)
+    slowest_steps = _get_slowest_steps(json_data)
     year_report_generated = _get_current_year()
 
-    _create_html_report(overall_result, session_attributes, summary_data, toc_entries, features, year_report_generated)
+    _create_html_report(
+        overall_result, session_attributes, summary_data, toc_entries, features, slowest_steps, year_report_generated
+    )
     _create_pdf_file()
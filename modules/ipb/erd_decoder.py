@@ -0,0 +1,263 @@
+"""Decode ERD data into typed values with decoders compiled once per ERD.
+
+An ERD definition from ERDLib (through the ERD index, see 'modules.ipb.erd_index') lists the ERD's data fields with
+their offsets, sizes, and types. Each definition is compiled the first time its ERD is seen into an 'ErdDecoder':
+integers are read with precompiled 'struct' formats (or 'int.from_bytes' for odd sizes), bit fields with precomputed
+byte indexes and masks, and enum names with a dictionary keyed by integer. Decoding a field is then a single unpack or
+lookup, however often the ERD is published.
+
+Field types are decoded as follows:
+
+    u8, u16, u32 -> int (big-endian)
+    enum         -> int (see 'FieldDecoder.get_value_name' for its name)
+    bool         -> bool
+    string       -> str (trailing NUL bytes removed)
+    raw          -> bytes
+    bit fields   -> bool for single bits, int for wider fields
+
+&copy; Copyright 2024, Fisher & Paykel Appliances Ltd
+
+All rights reserved. Fisher & Paykel's source code is an
+unpublished work and the use of a copyright notice does not imply otherwise.
+This source code contains confidential, trade secret material of
+Fisher & Paykel Appliances Ltd.
+Any attempt or participation in deciphering, decoding, reverse engineering
+or in any way altering the source code is strictly prohibited,
+unless the prior written consent of Fisher & Paykel is obtained.
+Permission to use, copy, publish, modify and distribute for any purpose
+is not permitted without specific, written prior permission from
+Fisher & Paykel Appliances Limited.
+"""
+
+import logging
+import struct
+import threading
+
+from PythonCommsBusHijack.erd_lib import ERDLib
+
+from modules.ipb.erd_index import get_erd_index
+
+
+INTEGER_FORMATS = {1: struct.Struct(">B"), 2: struct.Struct(">H"), 4: struct.Struct(">I")}  # Size -> format.
+INTEGER_TYPES = ("u8", "u16", "u32", "enum")
+
+
+logger = logging.getLogger(__name__)
+
+
+class FieldDecoder:
+    """A compiled decoder for one data field of an ERD."""
+
+    def __init__(self, definition: dict) -> None:
+        """Compile a data field definition.
+
+        Args:
+            definition (dict): One entry of the ERD definition's "data" list, with "name", "offset", "size", "type",
+                and optionally "values" (for enums) and "bits" (for bit fields).
+        """
+        self.name = definition["name"]
+        self.type = definition["type"]
+        self.offset = definition["offset"]
+        self.size = definition["size"]
+        self.end = self.offset + self.size
+        self.value_names = {int(value): name for value, name in definition.get("values", {}).items()}
+        self._value_numbers = {name.lower(): value for value, name in self.value_names.items()}
+
+        bits = definition.get("bits")
+        self.is_bit_field = bits is not None
+
+        if self.is_bit_field:
+            # Bits are numbered from the least significant bit of the field's first byte onwards.
+            self._bit_offset = bits["offset"]
+            self._bit_size = bits["size"]
+            self._byte_index = self.offset + self._bit_offset // 8
+            self._bit_mask = 1 << (self._bit_offset % 8)
+            self._bits_mask = (1 << self._bit_size) - 1
+
+        self._format = INTEGER_FORMATS.get(self.size)
+
+    def decode(self, data: bytes):
+        """Decode the field from an ERD's data.
+
+        Args:
+            data (bytes): The ERD's data. It must be at least 'end' bytes long.
+
+        Returns:
+            int | bool | str | bytes: The field's value. See the module docstring for the type of each field type.
+        """
+        if self.is_bit_field:
+            if self._bit_size == 1:
+                return bool(data[self._byte_index] & self._bit_mask)
+
+            field = int.from_bytes(data[self.offset : self.end], "little")
+
+            return (field >> self._bit_offset) & self._bits_mask
+
+        if self.type in INTEGER_TYPES:
+            if self._format is not None:
+                return self._format.unpack_from(data, self.offset)[0]
+
+            return int.from_bytes(data[self.offset : self.end], "big")
+
+        if self.type == "bool":
+            return bool(data[self.offset])
+
+        if self.type == "string":
+            return bytes(data[self.offset : self.end]).decode("latin-1").rstrip("\x00")
+
+        return bytes(data[self.offset : self.end])
+
+    def get_value_name(self, value: int) -> str | None:
+        """Get the name of an enum value.
+
+        Args:
+            value (int): The value.
+
+        Returns:
+            str | None: The value's name, or 'None' if the value is not in the ERD definition.
+        """
+        return self.value_names.get(value)
+
+    def get_enum_value(self, name: str) -> int:
+        """Look up an enum value by name.
+
+        Args:
+            name (str): The value's name, or a case-insensitive part of it. For example: "complete".
+
+        Returns:
+            int: The value. An exact (case-insensitive) match is preferred over a partial one.
+
+        Raises:
+            ValueError: If no value's name matches.
+        """
+        name = name.lower()
+
+        if name in self._value_numbers:
+            return self._value_numbers[name]
+
+        for value_name, value in self._value_numbers.items():
+            if name in value_name:
+                return value
+
+        raise ValueError(f"No value named '{name}' in field '{self.name}'")
+
+    def describe(self, value) -> str:
+        """Describe a decoded value in the same words the old text decoder used.
+
+        Args:
+            value (int | bool | str | bytes): The value from 'decode'.
+
+        Returns:
+            str: The description.
+        """
+        if self.is_bit_field:
+            if self._bit_size > 1:
+                return "Reserved. "
+
+            return f"{self.name}; " if value else ""
+
+        if self.type == "string":
+            return f"{value}. "
+
+        if self.type == "enum":
+            return f"{self.name}: {self.value_names.get(value, value)}. "
+
+        if self.type == "raw":
+            return f"{self.name}: {value.hex()}. "
+
+        return f"{self.name}: {value}. "
+
+
+class ErdDecoder:
+    """A compiled decoder for all of an ERD's data fields."""
+
+    def __init__(self, definition: dict) -> None:
+        """Compile an ERD definition.
+
+        Args:
+            definition (dict): The ERD definition from 'ERDLib.search_ERD'.
+        """
+        self.erd_id = int(definition["id"], 16)
+        self.name = definition["name"]
+        self.fields = [FieldDecoder(field) for field in definition["data"]]
+        self.fields_by_name = {field.name: field for field in self.fields}
+        self.size = max((field.end for field in self.fields), default=0)
+
+    def decode(self, data: bytes) -> dict:
+        """Decode every field of the ERD.
+
+        Args:
+            data (bytes): The ERD's data, without the IPB header, ERD ID, size, or CRC.
+
+        Returns:
+            dict: The field names and their values. Fields which do not fit in 'data' are left out.
+        """
+        if len(data) >= self.size:
+            return {field.name: field.decode(data) for field in self.fields}
+
+        logger.debug(f"ERD 0x{self.erd_id:04X} data is {len(data)} bytes, shorter than its {self.size} byte definition")
+
+        return {field.name: field.decode(data) for field in self.fields if field.end <= len(data)}
+
+    def describe(self, values: dict) -> str:
+        """Describe decoded values as readable text.
+
+        Args:
+            values (dict): The values from 'decode'.
+
+        Returns:
+            str: The ERD's name followed by a description of each field.
+        """
+        descriptions = (field.describe(values[field.name]) for field in self.fields if field.name in values)
+
+        return self.name + "-" + "".join(descriptions)
+
+
+class ErdDecoderTable:
+    """ERD decoders keyed by ERD ID, each compiled from the ERD index the first time it is needed."""
+
+    def __init__(self, erd_lib: ERDLib | None = None) -> None:
+        """Create an empty table.
+
+        Args:
+            erd_lib (ERDLib | None): The ERD library to look up ERDs missing from the process-wide ERD index in, or
+                'None' to let the index construct one if it needs to. Defaults to None.
+        """
+        self._erd_index = get_erd_index(erd_lib)
+        self._decoders = {}  # ERD ID -> ErdDecoder, or 'None' if ERDLib does not define the ERD.
+        self._lock = threading.Lock()
+
+    def get(self, erd_id: int) -> ErdDecoder | None:
+        """Get the decoder for an ERD, compiling it if this is the first time it has been needed.
+
+        Args:
+            erd_id (int): The ERD ID. For example: 0xF301.
+
+        Returns:
+            ErdDecoder | None: The decoder, or 'None' if ERDLib does not define the ERD.
+        """
+        try:
+            return self._decoders[erd_id]
+        except KeyError:
+            pass
+
+        with self._lock:
+            if erd_id not in self._decoders:
+                definition = self._erd_index.get_definition(erd_id)
+                self._decoders[erd_id] = ErdDecoder(definition) if definition is not None else None
+
+            return self._decoders[erd_id]
+
+    def decode(self, erd_id: int, data: bytes) -> dict | None:
+        """Decode an ERD's data.
+
+        Args:
+            erd_id (int): The ERD ID.
+            data (bytes): The ERD's data.
+
+        Returns:
+            dict | None: The field names and their values, or 'None' if ERDLib does not define the ERD.
+        """
+        decoder = self.get(erd_id)
+
+        return decoder.decode(data) if decoder is not None else None
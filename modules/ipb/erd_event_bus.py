@@ -0,0 +1,145 @@
+"""Publish ERD events decoded from the IPB to subscribers.
+
+The IPB reader puts events on a bounded queue and goes straight back to reading the port. A dispatcher thread takes
+events off the queue and passes them to the subscribers of each ERD, so slow subscribers never hold up the reader.
+
+&copy; Copyright 2024, Fisher & Paykel Appliances Ltd
+
+All rights reserved. Fisher & Paykel's source code is an
+unpublished work and the use of a copyright notice does not imply otherwise.
+This source code contains confidential, trade secret material of
+Fisher & Paykel Appliances Ltd.
+Any attempt or participation in deciphering, decoding, reverse engineering
+or in any way altering the source code is strictly prohibited,
+unless the prior written consent of Fisher & Paykel is obtained.
+Permission to use, copy, publish, modify and distribute for any purpose
+is not permitted without specific, written prior permission from
+Fisher & Paykel Appliances Limited.
+"""
+
+import logging
+import queue
+import threading
+
+from concurrent.futures import Future
+from typing import Callable, NamedTuple
+
+
+DEFAULT_MAX_QUEUE_SIZE = 4096  # Several seconds of back-to-back frames at 115200 baud.
+
+
+logger = logging.getLogger(__name__)
+
+
+class ErdEvent(NamedTuple):
+    """An ERD value received from the product."""
+
+    erd_id: int  # For example: 0xF301.
+    message_type: int  # The IPB message type, for example 0x22 for a publish.
+    data: bytes  # The ERD's data, without the IPB header, ERD ID, size, or CRC.
+    timestamp: float  # When the frame was read, from 'time.monotonic()'.
+    values: dict | None = None  # The decoded fields by name, or 'None' if the ERD is not in the ERD library.
+
+
+class ErdEventBus:
+    """A bounded queue of ERD events with per-ERD subscribers."""
+
+    def __init__(self, max_queue_size: int = DEFAULT_MAX_QUEUE_SIZE) -> None:
+        """Create the queue and start the dispatcher thread.
+
+        Args:
+            max_queue_size (int): The most events which can wait to be dispatched. Events published while the queue
+                is full are dropped and counted. Defaults to 'DEFAULT_MAX_QUEUE_SIZE'.
+        """
+        self.dropped_events = 0
+
+        self._queue = queue.Queue(maxsize=max_queue_size)
+        self._subscribers = {}  # ERD ID -> list of callbacks.
+        self._lock = threading.Lock()
+
+        self._dispatcher = threading.Thread(target=self._dispatch, name="ErdEventBus", daemon=True)
+        self._dispatcher.start()
+
+    def publish(self, event: ErdEvent) -> bool:
+        """Queue an event for the subscribers without blocking.
+
+        Args:
+            event (ErdEvent): The event.
+
+        Returns:
+            bool: True if the event was queued, False if the queue was full and the event was dropped.
+        """
+        try:
+            self._queue.put_nowait(event)
+        except queue.Full:
+            self.dropped_events += 1
+            logger.warning(f"ERD event queue is full! Dropped {self.dropped_events} event(s) so far.")
+            return False
+
+        return True
+
+    def subscribe(self, erd_id: int, callback: Callable[[ErdEvent], None]) -> None:
+        """Call a function with every event for an ERD.
+
+        Callbacks run on the dispatcher thread, one at a time, in the order the events were received.
+
+        Args:
+            erd_id (int): The ERD ID. For example: 0xF301.
+            callback (Callable[[ErdEvent], None]): The function to call.
+        """
+        with self._lock:
+            self._subscribers.setdefault(erd_id, []).append(callback)
+
+    def unsubscribe(self, erd_id: int, callback: Callable[[ErdEvent], None]) -> None:
+        """Stop calling a function subscribed with 'subscribe'.
+
+        Args:
+            erd_id (int): The ERD ID.
+            callback (Callable[[ErdEvent], None]): The subscribed function.
+        """
+        with self._lock:
+            callbacks = self._subscribers.get(erd_id, [])
+
+            if callback in callbacks:
+                callbacks.remove(callback)
+
+    def next_event(self, erd_id: int, predicate: Callable[[ErdEvent], bool] | None = None) -> Future:
+        """Get a future for the next event for an ERD which matches a condition.
+
+        The future can be waited on with 'result(timeout)', or awaited in asyncio code with 'asyncio.wrap_future'.
+
+        Args:
+            erd_id (int): The ERD ID.
+            predicate (Callable[[ErdEvent], bool] | None): The condition, or 'None' to accept any event. Defaults to
+                None.
+
+        Returns:
+            Future: A future which resolves to the matching 'ErdEvent'. Cancelling it unsubscribes it.
+        """
+        future = Future()
+
+        def on_event(event: ErdEvent) -> None:
+            if future.done() or (predicate is not None and not predicate(event)):
+                return
+
+            self.unsubscribe(erd_id, on_event)
+            future.set_result(event)
+
+        future.add_done_callback(lambda _: self.unsubscribe(erd_id, on_event))
+        self.subscribe(erd_id, on_event)
+
+        return future
+
+    def _dispatch(self) -> None:
+        """Pass queued events to their subscribers, forever."""
+        while True:
+            event = self._queue.get()
+
+            with self._lock:
+                callbacks = list(self._subscribers.get(event.erd_id, []))
+
+            for callback in callbacks:
+                try:
+                    callback(event)
+                except Exception:
+                    logger.exception(f"ERD 0x{event.erd_id:04X} subscriber {callback} failed!")
@@ -0,0 +1,201 @@
+"""A process-wide index of ERD definitions by integer ID, cached on disk between runs.
+
+'ERDLib' loads every definition when it is constructed and looks ERDs up by hex string. The index looks them up by
+integer ID with a single dictionary access, and only constructs 'ERDLib' the first time it is asked for an ERD it does
+not know. The definitions it has looked up (and the IDs ERDLib does not define) are saved to a JSON cache file when the
+process exits, so later runs start without constructing ERDLib at all.
+
+The cache file records a hash of ERDLib's package files. When the ERD definitions are updated the hash changes, and the
+cache is ignored and rebuilt.
+
+The cache file is 'DEFAULT_CACHE_PATH', or the path in the 'ERD_INDEX_CACHE' environment variable.
+
+&copy; Copyright 2024, Fisher & Paykel Appliances Ltd
+
+All rights reserved. Fisher & Paykel's source code is an
+unpublished work and the use of a copyright notice does not imply otherwise.
+This source code contains confidential, trade secret material of
+Fisher & Paykel Appliances Ltd.
+Any attempt or participation in deciphering, decoding, reverse engineering
+or in any way altering the source code is strictly prohibited,
+unless the prior written consent of Fisher & Paykel is obtained.
+Permission to use, copy, publish, modify and distribute for any purpose
+is not permitted without specific, written prior permission from
+Fisher & Paykel Appliances Limited.
+"""
+
+import atexit
+import hashlib
+import json
+import logging
+import os
+import threading
+
+from pathlib import Path
+
+import PythonCommsBusHijack.erd_lib as erd_lib_module
+
+from PythonCommsBusHijack.erd_lib import ERDLib
+
+
+CACHE_ENVIRONMENT_VARIABLE = "ERD_INDEX_CACHE"
+DEFAULT_CACHE_PATH = Path.home() / ".cache" / "fpa_appium_test_functions" / "erd_index.json"
+CACHE_VERSION = 1  # Increase when the cache file's layout changes.
+
+
+logger = logging.getLogger(__name__)
+
+
+_index = None
+_index_lock = threading.Lock()
+
+
+def get_source_hash() -> str:
+    """Hash the files of ERDLib's package, which hold the ERD definitions.
+
+    Returns:
+        str: The SHA-256 of every file's relative path and contents, in hex.
+    """
+    package_directory = Path(erd_lib_module.__file__).resolve().parent
+    source_hash = hashlib.sha256()
+
+    for path in sorted(package_directory.rglob("*")):
+        if path.is_file() and "__pycache__" not in path.parts:
+            source_hash.update(path.relative_to(package_directory).as_posix().encode())
+            source_hash.update(path.read_bytes())
+
+    return source_hash.hexdigest()
+
+
+class ErdIndex:
+    """ERD definitions keyed by integer ERD ID, filled from a cache file and, when that misses, from ERDLib."""
+
+    def __init__(self, erd_lib: ERDLib | None = None, cache_path: Path | None = None) -> None:
+        """Load the cache file if it was made from the current ERD definitions.
+
+        Args:
+            erd_lib (ERDLib | None): The ERD library to look up ERDs missing from the cache in, or 'None' to construct
+                one the first time it is needed. Defaults to None.
+            cache_path (Path | None): The cache file. Defaults to the 'ERD_INDEX_CACHE' environment variable, or
+                'DEFAULT_CACHE_PATH'.
+        """
+        self.cache_path = Path(cache_path or os.environ.get(CACHE_ENVIRONMENT_VARIABLE) or DEFAULT_CACHE_PATH)
+        self.source_hash = get_source_hash()
+        self.misses = 0  # Lookups which needed ERDLib.
+
+        self._erd_lib = erd_lib
+        self._definitions = self._load()  # ERD ID -> definition, or 'None' if ERDLib does not define the ERD.
+        self._dirty = False
+        self._lock = threading.Lock()
+
+    def __len__(self) -> int:
+        return len(self._definitions)
+
+    def __contains__(self, erd_id: int) -> bool:
+        return self.get_definition(erd_id) is not None
+
+    @property
+    def erd_lib(self) -> ERDLib:
+        """The ERD library, constructed the first time it is needed."""
+        if self._erd_lib is None:
+            logger.debug("Loading ERDLib to look up ERDs missing from the ERD index")
+            self._erd_lib = ERDLib()
+
+        return self._erd_lib
+
+    @erd_lib.setter
+    def erd_lib(self, erd_lib: ERDLib) -> None:
+        self._erd_lib = erd_lib
+
+    def get_definition(self, erd_id: int) -> dict | None:
+        """Get an ERD's definition.
+
+        Args:
+            erd_id (int): The ERD ID. For example: 0xF301.
+
+        Returns:
+            dict | None: The definition, as 'ERDLib.search_ERD' returns it, or 'None' if ERDLib does not define the
+                ERD.
+        """
+        try:
+            return self._definitions[erd_id]
+        except KeyError:
+            pass
+
+        with self._lock:
+            if erd_id not in self._definitions:
+                self.misses += 1
+
+                try:
+                    self._definitions[erd_id] = self.erd_lib.search_ERD(f"{erd_id:04x}")
+                except (KeyError, TypeError):
+                    logger.warning(f"ERD 0x{erd_id:04X} is not defined in the ERD library")
+                    self._definitions[erd_id] = None
+
+                self._dirty = True
+
+            return self._definitions[erd_id]
+
+    def save(self) -> None:
+        """Write the definitions looked up so far to the cache file, if any were added since it was loaded."""
+        with self._lock:
+            if not self._dirty:
+                return
+
+            cache = {
+                "version": CACHE_VERSION,
+                "source_hash": self.source_hash,
+                "definitions": {f"{erd_id:04x}": definition for erd_id, definition in self._definitions.items()},
+            }
+
+            try:
+                self.cache_path.parent.mkdir(parents=True, exist_ok=True)
+                temporary_path = self.cache_path.with_name(f"{self.cache_path.name}.{os.getpid()}.tmp")
+                temporary_path.write_text(json.dumps(cache))
+                os.replace(temporary_path, self.cache_path)  # Atomic, so other processes never read half a file.
+            except (OSError, TypeError) as e:
+                logger.warning(f"Could not save the ERD index to '{self.cache_path}': {e}")
+                return
+
+            self._dirty = False
+            logger.debug(f"Saved {len(self._definitions)} ERD definitions to '{self.cache_path}'")
+
+    def _load(self) -> dict:
+        """Read the cache file.
+
+        Returns:
+            dict: The cached definitions by ERD ID, or an empty dictionary if the cache file is missing, unreadable,
+                or was made from other ERD definitions.
+        """
+        try:
+            cache = json.loads(self.cache_path.read_text())
+        except (OSError, ValueError):
+            return {}
+
+        if cache.get("version") != CACHE_VERSION or cache.get("source_hash") != self.source_hash:
+            logger.debug(f"'{self.cache_path}' was made from other ERD definitions; rebuilding it")
+            return {}
+
+        return {int(erd_id, 16): definition for erd_id, definition in cache["definitions"].items()}
+
+
+def get_erd_index(erd_lib: ERDLib | None = None) -> ErdIndex:
+    """Get the process-wide ERD index, creating it the first time. It is saved to its cache file at exit.
+
+    Args:
+        erd_lib (ERDLib | None): An ERD library the caller already has, to use for ERDs missing from the cache
+            instead of constructing another. Defaults to None.
+
+    Returns:
+        ErdIndex: The index.
+    """
+    global _index
+
+    with _index_lock:
+        if _index is None:
+            _index = ErdIndex(erd_lib)
+            atexit.register(_index.save)
+        elif erd_lib is not None and _index._erd_lib is None:
+            _index.erd_lib = erd_lib
+
+    return _index
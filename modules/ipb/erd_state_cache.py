@@ -0,0 +1,84 @@
+"""Keep the latest value of every ERD the product has sent, with when it was received.
+
+The IPB reader thread stores each decoded publish and read answer. Any thread can ask for an ERD's latest value, with a
+maximum age, and get it straight from memory when it is fresh enough rather than sending a read request.
+
+Each entry is an immutable 'ErdEvent' which is swapped into a dictionary in a single step, so readers never need a lock
+and never see a partly updated entry.
+
+&copy; Copyright 2024, Fisher & Paykel Appliances Ltd
+
+All rights reserved. Fisher & Paykel's source code is an
+unpublished work and the use of a copyright notice does not imply otherwise.
+This source code contains confidential, trade secret material of
+Fisher & Paykel Appliances Ltd.
+Any attempt or participation in deciphering, decoding, reverse engineering
+or in any way altering the source code is strictly prohibited,
+unless the prior written consent of Fisher & Paykel is obtained.
+Permission to use, copy, publish, modify and distribute for any purpose
+is not permitted without specific, written prior permission from
+Fisher & Paykel Appliances Limited.
+"""
+
+from time import monotonic
+
+from modules.ipb.erd_event_bus import ErdEvent
+
+
+class ErdStateCache:
+    """The latest 'ErdEvent' of each ERD, keyed by ERD ID."""
+
+    def __init__(self) -> None:
+        """Create an empty cache."""
+        self._events = {}  # ERD ID -> latest ErdEvent.
+
+    def update(self, event: ErdEvent) -> None:
+        """Store an ERD's latest value.
+
+        Args:
+            event (ErdEvent): The event the value was received in.
+        """
+        self._events[event.erd_id] = event
+
+    def get(self, erd_id: int, max_age: float | None = None) -> ErdEvent | None:
+        """Get an ERD's latest value if it is fresh enough.
+
+        Args:
+            erd_id (int): The ERD ID. For example: 0xF301.
+            max_age (float | None): The oldest value to accept, in seconds, or 'None' to accept any age. Defaults to
+                None.
+
+        Returns:
+            ErdEvent | None: The latest event, or 'None' if the ERD has not been received or its value is too old.
+        """
+        event = self._events.get(erd_id)
+
+        if event is None or (max_age is not None and monotonic() - event.timestamp > max_age):
+            return None
+
+        return event
+
+    def get_age(self, erd_id: int) -> float | None:
+        """Get how long ago an ERD's latest value was received.
+
+        Args:
+            erd_id (int): The ERD ID.
+
+        Returns:
+            float | None: The age in seconds, or 'None' if the ERD has not been received.
+        """
+        event = self._events.get(erd_id)
+
+        return None if event is None else monotonic() - event.timestamp
+
+    def snapshot(self) -> dict:
+        """Get the latest value of every ERD received so far.
+
+        Returns:
+            dict: ERD IDs and their latest events. Later updates do not change it.
+        """
+        return dict(self._events)
+
+    def clear(self) -> None:
+        """Forget every value, for example after the product is power cycled."""
+        self._events.clear()
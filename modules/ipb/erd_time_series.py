@@ -0,0 +1,260 @@
+"""Keep every numeric ERD value received during a test, for querying and plotting.
+
+Each field of each ERD gets its own pair of 'array' buffers (timestamps and values, as C doubles) which double in size
+when they fill up. A sample costs 16 bytes, against several hundred for a dictionary per sample, so an hour-long dry
+cycle fits easily in memory. Range queries use binary search on the timestamps, and 'downsample' keeps the minimum and
+maximum of each time bucket so steps in enums and status values survive in plots.
+
+The IPB reader is the only writer. Readers on other threads may query at any time: a sample's value and timestamp are
+stored before the series' length is increased, so readers never see half-written samples.
+
+&copy; Copyright 2024, Fisher & Paykel Appliances Ltd
+
+All rights reserved. Fisher & Paykel's source code is an
+unpublished work and the use of a copyright notice does not imply otherwise.
+This source code contains confidential, trade secret material of
+Fisher & Paykel Appliances Ltd.
+Any attempt or participation in deciphering, decoding, reverse engineering
+or in any way altering the source code is strictly prohibited,
+unless the prior written consent of Fisher & Paykel is obtained.
+Permission to use, copy, publish, modify and distribute for any purpose
+is not permitted without specific, written prior permission from
+Fisher & Paykel Appliances Limited.
+"""
+
+import bisect
+import threading
+
+from array import array
+
+from modules.ipb.erd_event_bus import ErdEvent
+
+
+INITIAL_CAPACITY = 256  # Samples per series before the first doubling.
+DEFAULT_MAX_POINTS = 500  # Enough for a plot a page wide.
+
+
+_active_store = None
+
+
+class FieldSeries:
+    """The samples of one ERD field, in the order they were received."""
+
+    def __init__(self, name: str) -> None:
+        """Create an empty series.
+
+        Args:
+            name (str): A name for the series. For example: "Machine Status: status".
+        """
+        self.name = name
+        self.length = 0
+
+        self._times = array("d", bytes(8 * INITIAL_CAPACITY))
+        self._values = array("d", bytes(8 * INITIAL_CAPACITY))
+
+    def append(self, timestamp: float, value: float) -> None:
+        """Add a sample. Samples must be added in time order.
+
+        Args:
+            timestamp (float): When the value was received, from 'time.monotonic()'.
+            value (float): The value.
+        """
+        if self.length == len(self._times):
+            # Double the capacity; the new half is zeros which are overwritten as samples arrive.
+            self._times.frombytes(bytes(8 * self.length))
+            self._values.frombytes(bytes(8 * self.length))
+
+        self._times[self.length] = timestamp
+        self._values[self.length] = value
+        self.length += 1
+
+    def last(self) -> tuple | None:
+        """Get the latest sample.
+
+        Returns:
+            tuple | None: The (timestamp, value) of the latest sample, or 'None' if the series is empty.
+        """
+        length = self.length
+
+        return (self._times[length - 1], self._values[length - 1]) if length else None
+
+    def value_at(self, timestamp: float) -> float | None:
+        """Get the value the field had at a time.
+
+        Args:
+            timestamp (float): The time, from 'time.monotonic()'.
+
+        Returns:
+            float | None: The value of the latest sample at or before the time, or 'None' if there is none.
+        """
+        index = bisect.bisect_right(self._times, timestamp, 0, self.length) - 1
+
+        return self._values[index] if index >= 0 else None
+
+    def range(self, start: float | None = None, end: float | None = None) -> tuple:
+        """Get the samples in a time range.
+
+        Args:
+            start (float | None): The earliest timestamp to include, or 'None' for the first sample. Defaults to None.
+            end (float | None): The latest timestamp to include, or 'None' for the latest sample. Defaults to None.
+
+        Returns:
+            tuple: The timestamps and values, as two 'array's of the same length.
+        """
+        first, last = self._get_bounds(start, end)
+
+        return self._times[first:last], self._values[first:last]
+
+    def downsample(
+        self, max_points: int = DEFAULT_MAX_POINTS, start: float | None = None, end: float | None = None
+    ) -> tuple:
+        """Reduce the samples in a time range to about 'max_points' points, keeping each bucket's minimum and maximum.
+
+        Args:
+            max_points (int): The most points to return. Defaults to 'DEFAULT_MAX_POINTS'.
+            start (float | None): The earliest timestamp to include. Defaults to None.
+            end (float | None): The latest timestamp to include. Defaults to None.
+
+        Returns:
+            tuple: The timestamps and values, as two lists of the same length, in time order.
+        """
+        first, last = self._get_bounds(start, end)
+        count = last - first
+
+        if count <= max_points:
+            return list(self._times[first:last]), list(self._values[first:last])
+
+        times = []
+        values = []
+        num_buckets = max(1, max_points // 2)
+
+        for bucket in range(num_buckets):
+            bucket_start = first + bucket * count // num_buckets
+            bucket_end = first + (bucket + 1) * count // num_buckets
+            bucket_values = self._values[bucket_start:bucket_end]
+
+            low_index = bucket_start + bucket_values.index(min(bucket_values))
+            high_index = bucket_start + bucket_values.index(max(bucket_values))
+
+            for index in sorted({low_index, high_index}):
+                times.append(self._times[index])
+                values.append(self._values[index])
+
+        return times, values
+
+    def _get_bounds(self, start: float | None, end: float | None) -> tuple:
+        """Find the indexes of the samples in a time range.
+
+        Args:
+            start (float | None): The earliest timestamp to include, or 'None' for the first sample.
+            end (float | None): The latest timestamp to include, or 'None' for the latest sample.
+
+        Returns:
+            tuple: The index of the first sample and the index after the last sample.
+        """
+        length = self.length
+        first = 0 if start is None else bisect.bisect_left(self._times, start, 0, length)
+        last = length if end is None else bisect.bisect_right(self._times, end, first, length)
+
+        return first, last
+
+
+class ErdTimeSeriesStore:
+    """The series of every numeric field of every ERD received."""
+
+    def __init__(self) -> None:
+        """Create an empty store."""
+        self._series = {}  # (ERD ID, field name) -> FieldSeries.
+        self._lock = threading.Lock()
+
+    def record(self, event: ErdEvent, erd_name: str | None = None) -> None:
+        """Add the numeric fields of a decoded ERD event. Text and raw fields are skipped.
+
+        Args:
+            event (ErdEvent): The event. Events without decoded values are skipped.
+            erd_name (str | None): The ERD's name, used to name new series. Defaults to the ERD ID in hex.
+        """
+        if not event.values:
+            return
+
+        for field_name, value in event.values.items():
+            if not isinstance(value, (int, float)):
+                continue
+
+            series = self._series.get((event.erd_id, field_name))
+
+            if series is None:
+                with self._lock:
+                    series = self._series.setdefault(
+                        (event.erd_id, field_name),
+                        FieldSeries(f"{erd_name or f'0x{event.erd_id:04X}'}: {field_name}"),
+                    )
+
+            series.append(event.timestamp, float(value))
+
+    def get(self, erd_id: int, field_name: str) -> FieldSeries | None:
+        """Get the series of an ERD field.
+
+        Args:
+            erd_id (int): The ERD ID. For example: 0xF301.
+            field_name (str): The field's name in the ERD definition.
+
+        Returns:
+            FieldSeries | None: The series, or 'None' if no value has been received for the field.
+        """
+        return self._series.get((erd_id, field_name))
+
+    def get_all(self) -> list:
+        """Get every series.
+
+        Returns:
+            list: The series, ordered by ERD ID and then field name.
+        """
+        with self._lock:
+            return [self._series[key] for key in sorted(self._series)]
+
+    def export(self, start: float, end: float, max_points: int = DEFAULT_MAX_POINTS) -> dict:
+        """Downsample every series over a time range into a JSON-friendly dictionary, for the test report.
+
+        Args:
+            start (float): The start of the range, from 'time.monotonic()'. Exported times are relative to it.
+            end (float): The end of the range.
+            max_points (int): The most points per series. Defaults to 'DEFAULT_MAX_POINTS'.
+
+        Returns:
+            dict: Series names mapped to {"times": [...], "values": [...]}, where times are seconds since 'start'.
+                Series with no samples in the range are left out.
+        """
+        exported = {}
+
+        for series in self.get_all():
+            times, values = series.downsample(max_points, start, end)
+
+            if times:
+                exported[series.name] = {"times": [round(time - start, 3) for time in times], "values": values}
+
+        return exported
+
+    def clear(self) -> None:
+        """Forget every sample."""
+        with self._lock:
+            self._series = {}
+
+
+def set_active_store(store: ErdTimeSeriesStore | None) -> None:
+    """Set the store the test hooks export to the report, usually the one of the connected IPB controller.
+
+    Args:
+        store (ErdTimeSeriesStore | None): The store, or 'None' to stop exporting.
+    """
+    global _active_store
+    _active_store = store
+
+
+def get_active_store() -> ErdTimeSeriesStore | None:
+    """Get the store set by 'set_active_store'.
+
+    Returns:
+        ErdTimeSeriesStore | None: The store, or 'None' if no IPB controller is connected.
+    """
+    return _active_store
@@ -0,0 +1,197 @@
+import time
+from concurrent.futures import Future, wait
+
+from PythonCommsBusHijack.erd_lib import ERDLib
+from modules.ipb.ipb_control import IPB_Control, READ_REQUEST_TIMEOUT
+
+CAP_TOUCH_ERD = 0xF012
+SET_CYCLE_ERD = 0xF403
+MACHINE_STATUS_ERD = 0xF301
+MACHINE_SUBSTATUS_ERD = 0xF302
+SELECTED_CYCLE_ERD = 0xF307
+TEST_MODE_ERD = 0xF42A
+MOISTURE_ERD = 0xF42B
+
+# (2D moisture, seconds to hold it) steps which take a drying load from wet to dry.
+FAST_FORWARD_SCHEDULE = [(80, 2.0), (50, 2.0), (20, 2.0), (0, 0.0)]
+CONFIRM_ATTEMPTS = 3
+
+
+class HD_control(IPB_Control):
+    def __init__(self, port: str, erd_lib: ERDLib | None = None, write_window: float = 0.0) -> None:
+        super().__init__(port, erd_lib, write_window)
+
+    def cap_touch_command(self, command: str):
+        erd = self.erd_index.get_definition(CAP_TOUCH_ERD)
+        if command not in erd["data"][0]["values"]:
+            raise ValueError("Command '" + command + "' not in Cap Touch commands")
+        cmd = int(command).to_bytes(1, "big")
+        cnt = self.key_count.to_bytes(1, "big")
+        self.key_count += 1
+        outarr = bytes.fromhex(erd["id"][2:]) + b"\x02" + cmd + cnt
+        self.construct_message(outarr, 0x22)
+
+    def dryer_start_pause(self):
+        self.cap_touch_command("11")
+
+    def washer_start_pause(self):
+        self.cap_touch_command("10")
+
+    def power_key_press(self):
+        self.cap_touch_command("1")
+
+    def power_key_quickhold(self):
+        self.cap_touch_command("2")
+
+    def power_key_shorthold(self):
+        self.cap_touch_command("3")
+
+    def power_key_longhold(self):
+        self.cap_touch_command("4")
+
+    def get_machine_status(self, timeout: float = READ_REQUEST_TIMEOUT) -> Future:
+        return self.read_erd(MACHINE_STATUS_ERD, timeout)
+
+    def get_machine_substatus(self, timeout: float = READ_REQUEST_TIMEOUT) -> Future:
+        return self.read_erd(MACHINE_SUBSTATUS_ERD, timeout)
+
+    def get_machine_state(self, timeout: float = READ_REQUEST_TIMEOUT) -> list:
+        """Request the machine status, substatus and selected cycle in one write.
+
+        Returns:
+            list: Futures for the status, substatus and selected cycle ErdEvents.
+        """
+        with self.batch():
+            return [
+                self.get_machine_status(timeout),
+                self.get_machine_substatus(timeout),
+                self.get_selected_cycle(timeout),
+            ]
+
+    def get_enum_value(self, erd: int, name: str) -> int:
+        """Look up the value of an ERD's enum by name.
+
+        Args:
+            erd (int): ERD id, e.g. 0xF301.
+            name (str): Case-insensitive part of the value's name, e.g. "complete".
+
+        Returns:
+            int: The enum value.
+        """
+        decoder = self.erd_decoders.get(erd)
+        if decoder is None:
+            raise ValueError(f"ERD 0x{erd:04X} not in the ERD library")
+        return decoder.fields[0].get_enum_value(name)
+
+    def wait_for_machine_status(self, status: str, timeout: float, request_interval: float = 5.0):
+        """Wait until the machine status ERD (0xF301) reports a status.
+
+        Listens for the product's status publishes and re-requests the status every request_interval seconds, so it
+        returns as soon as the status changes rather than after a fixed sleep. Statuses are compared by their decoded
+        value, so the comparison follows the ERD definition's size and encoding. Starts the background reader if it is
+        not running.
+
+        Args:
+            status (str): Case-insensitive part of the status name, e.g. "complete".
+            timeout (float): Seconds to wait before giving up.
+            request_interval (float): Seconds between status read requests.
+        """
+        expected = self.get_enum_value(MACHINE_STATUS_ERD, status)
+        field = self.erd_decoders.get(MACHINE_STATUS_ERD).fields[0].name
+        def has_status(event) -> bool:
+            return event.values is not None and event.values.get(field) == expected
+        latest = self.erd_state.get(MACHINE_STATUS_ERD, request_interval)
+        if latest is not None and has_status(latest):
+            return
+        reached = self.event_bus.next_event(MACHINE_STATUS_ERD, has_status)
+        try:
+            deadline = time.monotonic() + timeout
+            next_request = time.monotonic()
+            while not reached.done():
+                now = time.monotonic()
+                if now >= deadline:
+                    raise RuntimeError("Machine status did not reach '" + status + "' after " + str(timeout) + " s")
+                if now >= next_request:
+                    self.get_machine_status()
+                    next_request = now + request_interval
+                wait([reached], timeout=min(next_request, deadline) - now)
+        finally:
+            reached.cancel()
+
+    def wait_for_cycle_complete(self, timeout: float = 3600):
+        """Wait until the machine reports the cycle is complete.
+
+        Args:
+            timeout (float): Seconds to wait before giving up. Defaults to an hour, the longest dry cycle.
+        """
+        self.wait_for_machine_status("complete", timeout)
+
+    def fast_forward_to_complete(self, schedule: list = FAST_FORWARD_SCHEDULE, timeout: float = 60):
+        """Drive the running cycle to completion in test mode instead of waiting out a real cycle.
+
+        Enables test mode, then steps the 2D moisture down through the schedule, confirming every write with an ERD
+        read, and waits for the machine to report the cycle is complete.
+
+        Args:
+            schedule (list): (2D moisture, seconds to hold it) steps, ending with the load dry.
+            timeout (float): Seconds to wait for the cycle to complete after the last step.
+        """
+        self._write_and_confirm(self.enable_test_mode, TEST_MODE_ERD, b"\x01")
+        for moisture, hold in schedule:
+            self._write_and_confirm(lambda: self.set_2d_moisture(str(moisture)), MOISTURE_ERD, bytes([moisture]))
+            time.sleep(hold)
+        self.wait_for_cycle_complete(timeout)
+
+    def _write_and_confirm(self, write, erd: int, expected: bytes):
+        """Write an ERD and read it back until it has the expected value.
+
+        Args:
+            write (Callable): Sends the write.
+            erd (int): ERD id, e.g. 0xF42A.
+            expected (bytes): The value the ERD should have after the write.
+        """
+        for _ in range(CONFIRM_ATTEMPTS):
+            write()
+            try:
+                if self.read_erd(erd).result().data == expected:
+                    return
+            except TimeoutError:
+                pass
+        raise RuntimeError(
+            "ERD " + hex(erd) + " did not change to " + expected.hex() + " after " + str(CONFIRM_ATTEMPTS) + " writes"
+        )
+
+    def get_selected_cycle(self, timeout: float = READ_REQUEST_TIMEOUT) -> Future:
+        return self.read_erd(SELECTED_CYCLE_ERD, timeout)
+
+    def set_cycle(self, cycle: str):
+        # Does not work
+        erd = self.erd_index.get_definition(SET_CYCLE_ERD)
+        if cycle not in erd["data"][0]["values"]:
+            raise ValueError("Command '" + cycle + "' not in Cap Touch commands")
+        cmd = int(cycle).to_bytes(1, "big")
+        outarr = bytes.fromhex(erd["id"][2:]) + b"\x01" + cmd
+        self.construct_message(outarr, 0x22)
+
+    def stop_cycle(self):
+        erd = self.erd_index.get_definition(SELECTED_CYCLE_ERD)
+        outarr = bytes.fromhex(erd["id"][2:])
+        self.construct_message(outarr, 0x27)
+
+    def enable_test_mode(self):
+        erd = self.erd_index.get_definition(TEST_MODE_ERD)
+        cmd = b"\x01"
+        outarr = bytes.fromhex(erd["id"][2:]) + b"\x01" + cmd
+        self.construct_message(outarr, 0x21)
+
+    def set_2d_moisture(self, moisture: str):
+        erd = self.erd_index.get_definition(MOISTURE_ERD)
+        cmd = int(moisture).to_bytes(1, "big")
+        outarr = bytes.fromhex(erd["id"][2:]) + b"\x01" + cmd
+        self.construct_message(outarr, 0x21)
+
+    def tete(self):
+        self.output(self.frame_builder.encode(0x23, b""))
+
+    def get_erd(self, erd: str, timeout: float = READ_REQUEST_TIMEOUT) -> Future:
+        return self.read_erd(int(erd, 16), timeout)
@@ -0,0 +1,362 @@
+"""Talk to several appliances' IPB ports from one asyncio event loop.
+
+'IPB_Control' blocks a thread on each port. Here each port is opened non-blocking and watched with the event loop's
+'add_reader', so one thread can monitor a whole rack of washers and dryers. Each 'AsyncIpbPort' has its own frame
+parser, ERD decoders, and ERD state cache, as each appliance may be a different product.
+
+'IpbMultiplexer' merges the ports' ERD events into one stream. Events are queued in the order their frames were read,
+and each is stamped with 'time.monotonic()' when its data was read, so the stream is ordered by time across appliances.
+
+Example:
+    async with IpbMultiplexer() as multiplexer:
+        dryer = multiplexer.add_port("dryer", "/dev/ttyUSB0")
+        washer = multiplexer.add_port("washer", "/dev/ttyUSB1")
+
+        print(await dryer.read_erd(0xF301))
+
+        async for appliance_event in multiplexer.events():
+            print(appliance_event.appliance, appliance_event.event)
+
+Only POSIX systems are supported.
+
+&copy; Copyright 2024, Fisher & Paykel Appliances Ltd
+
+All rights reserved. Fisher & Paykel's source code is an
+unpublished work and the use of a copyright notice does not imply otherwise.
+This source code contains confidential, trade secret material of
+Fisher & Paykel Appliances Ltd.
+Any attempt or participation in deciphering, decoding, reverse engineering
+or in any way altering the source code is strictly prohibited,
+unless the prior written consent of Fisher & Paykel is obtained.
+Permission to use, copy, publish, modify and distribute for any purpose
+is not permitted without specific, written prior permission from
+Fisher & Paykel Appliances Limited.
+"""
+
+import asyncio
+import crcmod
+import logging
+import os
+import termios
+import tty
+
+from time import monotonic
+from typing import AsyncIterator, Callable, NamedTuple
+
+from PythonCommsBusHijack.erd_lib import ERDLib
+
+from modules.ipb.erd_decoder import ErdDecoderTable
+from modules.ipb.erd_event_bus import ErdEvent
+from modules.ipb.erd_state_cache import ErdStateCache
+from modules.ipb.ipb_frame_builder import IpbFrameBuilder
+from modules.ipb.ipb_frame_parser import BODY_OFFSET, IpbFrameParser
+
+
+BAUD_RATE = termios.B115200
+READ_SIZE = 4096
+READ_REQUEST_TIMEOUT = 1.0  # Seconds to wait for the appliance to answer an ERD read request.
+DEFAULT_MAX_QUEUE_SIZE = 4096  # Merged events waiting for the consumer, across every port.
+
+
+logger = logging.getLogger(__name__)
+
+
+class ApplianceEvent(NamedTuple):
+    """An ERD event and the appliance it came from."""
+
+    appliance: str  # The name the port was added with. For example: "dryer".
+    event: ErdEvent
+
+
+class AsyncIpbPort:
+    """One appliance's IPB port, read and written without blocking from an asyncio event loop."""
+
+    def __init__(
+        self,
+        name: str,
+        port: str,
+        erd_lib: ERDLib | None = None,
+        on_event: Callable[[str, ErdEvent], None] | None = None,
+        loop: asyncio.AbstractEventLoop | None = None,
+    ) -> None:
+        """Open the port in raw mode at 115200 baud and start watching it.
+
+        Must be called from the event loop's thread.
+
+        Args:
+            name (str): A name for the appliance. For example: "dryer".
+            port (str): The port's device path. For example: "/dev/ttyUSB0".
+            erd_lib (ERDLib | None): ERDLib instance, only used to look up ERDs missing from the cached ERD index.
+                Defaults to None, which loads ERDLib only if an ERD is missing.
+            on_event (Callable[[str, ErdEvent], None] | None): Called with the name and every ERD event received, on
+                the event loop's thread. Defaults to None.
+            loop (asyncio.AbstractEventLoop | None): The event loop. Defaults to the running loop.
+        """
+        self.name = name
+        self.port = port
+        self.on_event = on_event
+
+        crc16 = crcmod.mkCrcFun(0x11021, rev=False, initCrc=0x1021)
+        self.frame_parser = IpbFrameParser(crc16)
+        self.frame_builder = IpbFrameBuilder(crc16)
+        self.erd_decoders = ErdDecoderTable(erd_lib)
+        self.erd_state = ErdStateCache()
+
+        self._loop = loop or asyncio.get_running_loop()
+        self._pending_reads = {}  # ERD ID -> list of asyncio futures.
+        self._write_buffer = bytearray()
+
+        self._fd = os.open(port, os.O_RDWR | os.O_NOCTTY | os.O_NONBLOCK)
+
+        try:
+            self._configure()
+        except termios.error:
+            os.close(self._fd)
+            raise
+
+        self._loop.add_reader(self._fd, self._on_readable)
+
+    def _configure(self) -> None:
+        """Put the port in raw mode at 'BAUD_RATE' and discard anything already received."""
+        tty.setraw(self._fd)
+
+        attributes = termios.tcgetattr(self._fd)
+        attributes[4] = attributes[5] = BAUD_RATE  # Input and output speeds.
+        termios.tcsetattr(self._fd, termios.TCSANOW, attributes)
+        termios.tcflush(self._fd, termios.TCIFLUSH)
+
+    @property
+    def closed(self) -> bool:
+        """Whether the port has been closed."""
+        return self._fd is None
+
+    def close(self) -> None:
+        """Stop watching the port, fail outstanding reads, and close the port."""
+        if self._fd is None:
+            return
+
+        self._loop.remove_reader(self._fd)
+        self._loop.remove_writer(self._fd)
+        os.close(self._fd)
+        self._fd = None
+
+        for futures in self._pending_reads.values():
+            for future in futures:
+                if not future.done():
+                    future.set_exception(ConnectionError(f"IPB port '{self.port}' was closed"))
+
+        self._pending_reads.clear()
+
+    def send(self, message_type: int, data: bytes) -> None:
+        """Queue a message to the appliance. It is written as soon as the port can take it.
+
+        Args:
+            message_type (int): The IPB message type. For example: 0x21 for a write request.
+            data (bytes): The message data, starting with the ERD ID for ERD messages.
+        """
+        if self._fd is None:
+            raise ConnectionError(f"IPB port '{self.port}' is closed")
+
+        was_empty = not self._write_buffer
+        self._write_buffer += self.frame_builder.encode(message_type, data)
+
+        if was_empty:
+            self._on_writable()
+
+            if self._write_buffer:
+                self._loop.add_writer(self._fd, self._on_writable)
+
+    def write_erd(self, erd_id: int, value: bytes) -> None:
+        """Send a write request for an ERD.
+
+        Args:
+            erd_id (int): The ERD ID. For example: 0xF42A.
+            value (bytes): The ERD's new value.
+        """
+        self.send(0x21, erd_id.to_bytes(2, "big") + bytes([len(value)]) + value)
+
+    async def read_erd(self, erd_id: int, timeout: float = READ_REQUEST_TIMEOUT) -> ErdEvent:
+        """Send a read request for an ERD and wait for the appliance's answer.
+
+        Args:
+            erd_id (int): The ERD ID. For example: 0xF301.
+            timeout (float): Seconds to wait for the answer. Defaults to 'READ_REQUEST_TIMEOUT'.
+
+        Returns:
+            ErdEvent: The answer.
+
+        Raises:
+            TimeoutError: If the appliance did not answer in time.
+        """
+        future = self._loop.create_future()
+        self._pending_reads.setdefault(erd_id, []).append(future)
+
+        try:
+            self.send(0x27, erd_id.to_bytes(2, "big"))
+            return await asyncio.wait_for(future, timeout)
+        except asyncio.TimeoutError:
+            raise TimeoutError(f"{self.name} did not answer the read request for ERD 0x{erd_id:04X}") from None
+        finally:
+            futures = self._pending_reads.get(erd_id)
+
+            if futures and future in futures:
+                futures.remove(future)
+
+                if not futures:
+                    del self._pending_reads[erd_id]
+
+    async def get_erd_value(self, erd_id: int, max_age: float, timeout: float = READ_REQUEST_TIMEOUT) -> ErdEvent:
+        """Get an ERD's value, from the latest value the appliance sent if it is fresh enough.
+
+        Args:
+            erd_id (int): The ERD ID.
+            max_age (float): Seconds old the latest value can be.
+            timeout (float): Seconds to wait for the answer if a read request is needed. Defaults to
+                'READ_REQUEST_TIMEOUT'.
+
+        Returns:
+            ErdEvent: The ERD's value.
+        """
+        event = self.erd_state.get(erd_id, max_age)
+
+        return event if event is not None else await self.read_erd(erd_id, timeout)
+
+    def _on_readable(self) -> None:
+        """Read whatever has arrived and handle every complete frame."""
+        try:
+            data = os.read(self._fd, READ_SIZE)
+        except BlockingIOError:
+            return
+        except OSError as e:
+            logger.error(f"Could not read from IPB port '{self.port}': {e}")
+            self.close()
+            return
+
+        timestamp = monotonic()
+
+        for frame in self.frame_parser.feed(data):
+            self._handle_frame(memoryview(frame)[BODY_OFFSET:], timestamp)
+
+    def _on_writable(self) -> None:
+        """Write as much of the queued data as the port will take."""
+        try:
+            written = os.write(self._fd, self._write_buffer)
+        except BlockingIOError:
+            return
+        except OSError as e:
+            logger.error(f"Could not write to IPB port '{self.port}': {e}")
+            self.close()
+            return
+
+        del self._write_buffer[:written]
+
+        if not self._write_buffer:
+            self._loop.remove_writer(self._fd)
+
+    def _handle_frame(self, body: memoryview, timestamp: float) -> None:
+        """Decode a publish, update the cache, answer reads, and pass the event on.
+
+        Args:
+            body (memoryview): The frame's body: message type, data, and body CRC.
+            timestamp (float): When the frame's data was read, from 'time.monotonic()'.
+        """
+        if len(body) < 6 or body[0] != 0x22:
+            return  # Only publishes carry ERD values to the tester.
+
+        erd_id = (body[1] << 8) | body[2]
+        data = bytes(body[4 : 4 + body[3]])
+        event = ErdEvent(erd_id, 0x22, data, timestamp, self.erd_decoders.decode(erd_id, data))
+
+        self.erd_state.update(event)
+
+        for future in self._pending_reads.pop(erd_id, []):
+            if not future.done():
+                future.set_result(event)
+
+        if self.on_event is not None:
+            self.on_event(self.name, event)
+
+
+class IpbMultiplexer:
+    """Several 'AsyncIpbPort's whose ERD events are merged into one time-ordered stream."""
+
+    def __init__(self, erd_lib: ERDLib | None = None, max_queue_size: int = DEFAULT_MAX_QUEUE_SIZE) -> None:
+        """Create a multiplexer with no ports.
+
+        Args:
+            erd_lib (ERDLib | None): ERDLib instance the ports look up ERDs missing from the cached ERD index in.
+                Defaults to None, which loads ERDLib only if an ERD is missing.
+            max_queue_size (int): The most events which can wait for 'events' to take them. Events received while the
+                queue is full are dropped and counted. Defaults to 'DEFAULT_MAX_QUEUE_SIZE'.
+        """
+        self.erd_lib = erd_lib
+        self.ports = {}  # Appliance name -> AsyncIpbPort.
+        self.dropped_events = 0
+
+        self._queue = asyncio.Queue(maxsize=max_queue_size)
+
+    async def __aenter__(self) -> "IpbMultiplexer":
+        return self
+
+    async def __aexit__(self, *_) -> None:
+        self.close()
+
+    def add_port(self, name: str, port: str) -> AsyncIpbPort:
+        """Open an appliance's port and merge its events into the stream.
+
+        Must be called from the event loop's thread.
+
+        Args:
+            name (str): A unique name for the appliance. For example: "dryer".
+            port (str): The port's device path.
+
+        Returns:
+            AsyncIpbPort: The port, for sending messages to the appliance.
+
+        Raises:
+            ValueError: If a port with the name has already been added.
+        """
+        if name in self.ports:
+            raise ValueError(f"An IPB port named '{name}' has already been added")
+
+        self.ports[name] = AsyncIpbPort(name, port, self.erd_lib, self._on_event)
+
+        return self.ports[name]
+
+    def remove_port(self, name: str) -> None:
+        """Close an appliance's port and stop merging its events.
+
+        Args:
+            name (str): The name the port was added with.
+        """
+        port = self.ports.pop(name, None)
+
+        if port is not None:
+            port.close()
+
+    def close(self) -> None:
+        """Close every port."""
+        for name in list(self.ports):
+            self.remove_port(name)
+
+    async def events(self) -> AsyncIterator[ApplianceEvent]:
+        """Iterate over the ERD events of every port, in the order they were received.
+
+        Yields:
+            ApplianceEvent: The events, with non-decreasing timestamps.
+        """
+        while True:
+            yield await self._queue.get()
+
+    def _on_event(self, name: str, event: ErdEvent) -> None:
+        """Queue an event from a port without blocking the event loop.
+
+        Args:
+            name (str): The appliance's name.
+            event (ErdEvent): The event.
+        """
+        try:
+            self._queue.put_nowait(ApplianceEvent(name, event))
+        except asyncio.QueueFull:
+            self.dropped_events += 1
+            logger.warning(f"Merged IPB event queue is full! Dropped {self.dropped_events} event(s) so far.")
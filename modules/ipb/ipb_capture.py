@@ -0,0 +1,313 @@
+"""Record the frames sent over the IPB to a compact binary file, and replay them without loading the whole file.
+
+A capture file starts with a header, followed by one record per frame:
+
+    Header:  magic (8 bytes) | wall clock time at the start, ns (8) | monotonic time at the start, ns (8)
+    Record:  monotonic time, ns (8) | direction (1) | frame length (2) | frame
+
+All integers are little-endian. Every record holds one frame; frames written to the port in one go get one record each,
+with the same timestamp. Records are in time order: a record whose timestamp is earlier than the one before it (a read
+which completed before a write, but was recorded after it) is given the previous record's timestamp.
+
+Every 'INDEX_INTERVAL_NS' of capture time, the time and file offset of the next record are appended to an index file
+next to the capture (the capture's name plus '.idx'). The reader memory-maps the capture and uses the index to seek to
+a time without scanning from the start. If the index is missing or was cut short, the reader scans forward from the
+last indexed record.
+
+&copy; Copyright 2024, Fisher & Paykel Appliances Ltd
+
+All rights reserved. Fisher & Paykel's source code is an
+unpublished work and the use of a copyright notice does not imply otherwise.
+This source code contains confidential, trade secret material of
+Fisher & Paykel Appliances Ltd.
+Any attempt or participation in deciphering, decoding, reverse engineering
+or in any way altering the source code is strictly prohibited,
+unless the prior written consent of Fisher & Paykel is obtained.
+Permission to use, copy, publish, modify and distribute for any purpose
+is not permitted without specific, written prior permission from
+Fisher & Paykel Appliances Limited.
+"""
+
+import bisect
+import logging
+import mmap
+import struct
+import threading
+
+from pathlib import Path
+from time import monotonic_ns, time_ns
+from typing import Iterator, NamedTuple
+
+from modules.ipb.erd_decoder import ErdDecoderTable
+from modules.ipb.erd_event_bus import ErdEvent
+from modules.ipb.ipb_frame_parser import BODY_OFFSET
+
+
+CAPTURE_MAGIC = b"IPBCAP01"
+CAPTURE_HEADER = struct.Struct("<8sQQ")  # Magic, wall clock time (ns), monotonic time (ns).
+RECORD_HEADER = struct.Struct("<QBH")  # Monotonic time (ns), direction, frame length.
+INDEX_ENTRY = struct.Struct("<QQ")  # Monotonic time (ns), file offset of the record.
+INDEX_FILE_SUFFIX = ".idx"
+INDEX_INTERVAL_NS = 1_000_000_000
+
+RECEIVED = 0
+SENT = 1
+
+ERD_MESSAGE_TYPES = (0x21, 0x22, 0x27)  # The message types whose data starts with an ERD ID.
+
+
+logger = logging.getLogger(__name__)
+
+
+class CaptureRecord(NamedTuple):
+    """One record of a capture file."""
+
+    timestamp_ns: int  # From 'time.monotonic_ns()' on the machine which made the capture.
+    direction: int  # 'RECEIVED' or 'SENT'.
+    frame: memoryview  # Valid until the reader is closed. Copy it with 'bytes()' to keep it.
+
+
+def get_erd_id(frame: bytes) -> int | None:
+    """Get the ERD ID of a frame.
+
+    Args:
+        frame (bytes): The frame, including its header.
+
+    Returns:
+        int | None: The ERD ID, or 'None' if the frame's message type does not carry one.
+    """
+    if len(frame) < BODY_OFFSET + 3 or frame[BODY_OFFSET] not in ERD_MESSAGE_TYPES:
+        return None
+
+    return (frame[BODY_OFFSET + 1] << 8) | frame[BODY_OFFSET + 2]
+
+
+class IpbCaptureWriter:
+    """Appends frames to a capture file and its index."""
+
+    def __init__(self, path: Path) -> None:
+        """Create the capture file (replacing any existing one) and its index.
+
+        Args:
+            path (Path): The capture file.
+        """
+        self.path = Path(path)
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+
+        self._file = open(self.path, "wb")
+        self._index_file = open(self.path.with_name(self.path.name + INDEX_FILE_SUFFIX), "wb")
+        self._lock = threading.Lock()
+        self._offset = CAPTURE_HEADER.size
+        self._next_index_ns = 0
+        self._last_timestamp_ns = 0
+
+        self._file.write(CAPTURE_HEADER.pack(CAPTURE_MAGIC, time_ns(), monotonic_ns()))
+
+    def write(self, frame: bytes, direction: int = RECEIVED, timestamp_ns: int | None = None) -> None:
+        """Append a frame.
+
+        Args:
+            frame (bytes): The frame.
+            direction (int): 'RECEIVED' or 'SENT'. Defaults to 'RECEIVED'.
+            timestamp_ns (int | None): When the frame was read or written, from 'time.monotonic_ns()'. Defaults to
+                now. It is raised to the previous record's timestamp if it is earlier, so the file stays in time order
+                for the reader's index and time range filters.
+        """
+        if timestamp_ns is None:
+            timestamp_ns = monotonic_ns()
+
+        with self._lock:
+            if self._file.closed:
+                return
+
+            timestamp_ns = max(timestamp_ns, self._last_timestamp_ns)
+            self._last_timestamp_ns = timestamp_ns
+
+            if timestamp_ns >= self._next_index_ns:
+                self._index_file.write(INDEX_ENTRY.pack(timestamp_ns, self._offset))
+                self._next_index_ns = timestamp_ns + INDEX_INTERVAL_NS
+
+            self._file.write(RECORD_HEADER.pack(timestamp_ns, direction, len(frame)))
+            self._file.write(frame)
+            self._offset += RECORD_HEADER.size + len(frame)
+
+    def flush(self) -> None:
+        """Write buffered records to disk."""
+        with self._lock:
+            if not self._file.closed:
+                self._file.flush()
+                self._index_file.flush()
+
+    def close(self) -> None:
+        """Write buffered records to disk and close the files."""
+        with self._lock:
+            self._file.close()
+            self._index_file.close()
+
+
+class IpbCaptureReader:
+    """Reads a capture file through a memory map."""
+
+    def __init__(self, path: Path) -> None:
+        """Map the capture file and load its index.
+
+        Args:
+            path (Path): The capture file.
+
+        Raises:
+            ValueError: If the file is not a capture file.
+        """
+        self.path = Path(path)
+
+        with open(self.path, "rb") as file:
+            self._map = mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ)
+
+        self._view = memoryview(self._map)
+
+        if len(self._map) < CAPTURE_HEADER.size:
+            self.close()
+            raise ValueError(f"'{self.path}' is not an IPB capture file")
+
+        magic, self.start_wall_time_ns, self.start_monotonic_ns = CAPTURE_HEADER.unpack_from(self._map, 0)
+
+        if magic != CAPTURE_MAGIC:
+            self.close()
+            raise ValueError(f"'{self.path}' is not an IPB capture file")
+
+        self._index_timestamps, self._index_offsets = self._load_index()
+
+    def __enter__(self) -> "IpbCaptureReader":
+        return self
+
+    def __exit__(self, *_) -> None:
+        self.close()
+
+    def __iter__(self) -> Iterator[CaptureRecord]:
+        return self.records()
+
+    def close(self) -> None:
+        """Unmap the file. Frames from the reader cannot be used afterwards."""
+        try:
+            self._view.release()
+            self._map.close()
+        except BufferError:
+            # A caller still holds a frame; the map is closed when the last frame is garbage collected.
+            logger.debug(f"Frames from '{self.path}' are still in use; leaving it mapped")
+
+    def to_wall_time_ns(self, timestamp_ns: int) -> int:
+        """Convert a record's monotonic timestamp to wall clock time.
+
+        Args:
+            timestamp_ns (int): The record's timestamp.
+
+        Returns:
+            int: The wall clock time, in nanoseconds since the epoch, for comparing with test logs and reports.
+        """
+        return self.start_wall_time_ns + (timestamp_ns - self.start_monotonic_ns)
+
+    def records(
+        self,
+        start_ns: int | None = None,
+        end_ns: int | None = None,
+        erd_id: int | None = None,
+        direction: int | None = None,
+    ) -> Iterator[CaptureRecord]:
+        """Iterate over the records, optionally only those in a time range or for an ERD.
+
+        Args:
+            start_ns (int | None): The earliest timestamp to include, or 'None' to start at the beginning. The reader
+                seeks to it with the index. Defaults to None.
+            end_ns (int | None): The timestamp to stop before, or 'None' to read to the end. Defaults to None.
+            erd_id (int | None): Only include frames for this ERD. Defaults to None.
+            direction (int | None): Only include 'RECEIVED' or 'SENT' records. Defaults to None.
+
+        Yields:
+            CaptureRecord: The records, in the order they were written.
+        """
+        offset = CAPTURE_HEADER.size if start_ns is None else self._seek(start_ns)
+        size = len(self._map)
+
+        while offset + RECORD_HEADER.size <= size:
+            timestamp_ns, record_direction, length = RECORD_HEADER.unpack_from(self._map, offset)
+            frame_offset = offset + RECORD_HEADER.size
+            offset = frame_offset + length
+
+            if offset > size:
+                break  # The capture was cut short while this record was being written.
+
+            if end_ns is not None and timestamp_ns >= end_ns:
+                break
+
+            if start_ns is not None and timestamp_ns < start_ns:
+                continue
+
+            if direction is not None and record_direction != direction:
+                continue
+
+            frame = self._view[frame_offset:offset]
+
+            if erd_id is not None and get_erd_id(frame) != erd_id:
+                continue
+
+            yield CaptureRecord(timestamp_ns, record_direction, frame)
+
+    def events(self, erd_decoders: ErdDecoderTable, **filters) -> Iterator[ErdEvent]:
+        """Decode the ERD publishes received during the capture, as 'IPB_Control' would have.
+
+        Args:
+            erd_decoders (ErdDecoderTable): The decoders to use.
+            **filters: The filters 'records' accepts, except 'direction'.
+
+        Yields:
+            ErdEvent: The events, with timestamps in seconds on the capturing machine's 'time.monotonic()' clock.
+        """
+        for record in self.records(direction=RECEIVED, **filters):
+            frame = record.frame
+
+            if len(frame) < BODY_OFFSET + 4 or frame[BODY_OFFSET] != 0x22:
+                continue
+
+            erd_id = get_erd_id(frame)
+            data_offset = BODY_OFFSET + 4
+            data = bytes(frame[data_offset : data_offset + frame[BODY_OFFSET + 3]])
+
+            yield ErdEvent(erd_id, 0x22, data, record.timestamp_ns / 1e9, erd_decoders.decode(erd_id, data))
+
+    def _load_index(self) -> tuple:
+        """Load the index file, ignoring entries which do not point inside the capture.
+
+        Returns:
+            tuple: The indexed timestamps and their file offsets, as two lists in file order.
+        """
+        timestamps = []
+        offsets = []
+
+        try:
+            index_data = self.path.with_name(self.path.name + INDEX_FILE_SUFFIX).read_bytes()
+        except OSError:
+            logger.debug(f"No index for '{self.path}'; records will be scanned from the start")
+            index_data = b""
+
+        for position in range(0, len(index_data) - INDEX_ENTRY.size + 1, INDEX_ENTRY.size):
+            timestamp_ns, offset = INDEX_ENTRY.unpack_from(index_data, position)
+
+            if offset + RECORD_HEADER.size > len(self._map):
+                break
+
+            timestamps.append(timestamp_ns)
+            offsets.append(offset)
+
+        return timestamps, offsets
+
+    def _seek(self, timestamp_ns: int) -> int:
+        """Find where to start reading to reach a time.
+
+        Args:
+            timestamp_ns (int): The time.
+
+        Returns:
+            int: The file offset of the last indexed record at or before the time, or of the first record.
+        """
+        position = bisect.bisect_right(self._index_timestamps, timestamp_ns) - 1
+
+        return self._index_offsets[position] if position >= 0 else CAPTURE_HEADER.size
@@ -0,0 +1,340 @@
+import crcmod
+import threading
+import time
+from concurrent.futures import Future, InvalidStateError
+from contextlib import contextmanager
+from serial import Serial
+from typing import Callable
+from PythonCommsBusHijack.erd_lib import ERDLib
+from modules.ipb.erd_decoder import ErdDecoderTable
+from modules.ipb.erd_event_bus import ErdEvent, ErdEventBus
+from modules.ipb.erd_index import get_erd_index
+from modules.ipb.erd_state_cache import ErdStateCache
+from modules.ipb.erd_time_series import ErdTimeSeriesStore, set_active_store
+from modules.ipb.ipb_capture import IpbCaptureWriter, RECEIVED, SENT
+from modules.ipb.ipb_frame_builder import IpbFrameBuilder
+from modules.ipb.ipb_frame_parser import BODY_OFFSET, IpbFrameParser
+
+READ_TIMEOUT = 0.1  # Seconds a read waits for data, so readers can give up and check for other work.
+READ_REQUEST_TIMEOUT = 1.0  # Seconds to wait for the product to answer an ERD read request.
+MAX_READ_REQUESTS_IN_FLIGHT = 16
+
+
+class IPB_Control:
+    """Controls IPB messages, enables read/write ERD messages and IPB commands."""
+
+    def __init__(self, port: str, erd_lib: ERDLib | None = None, write_window: float = 0.0) -> None:
+        """Initialise class with IPB port and ERD Library for ERD definition and lookup.
+
+        Args:
+            port (str): COM port connected to product IPB.
+            erd_lib (ERDLib | None): ERDLib instance, only used to look up ERDs missing from the cached ERD index.
+                Defaults to None, which loads ERDLib only if an ERD is missing.
+            write_window (float): Seconds to hold a message so messages sent soon after it go in the same write. 0
+                writes each message straight away unless it is sent inside a batch(). Defaults to 0.
+        """
+        self.com = Serial(port, 115200, timeout=READ_TIMEOUT)
+        self.com.reset_input_buffer()
+        self.com.read_all()
+        self.crc16 = crcmod.mkCrcFun(0x11021, rev=False, initCrc=0x1021)
+        self.frame_parser = IpbFrameParser(self.crc16)
+        self.frame_builder = IpbFrameBuilder(self.crc16)
+
+        self.erd_lib = erd_lib
+        self.erd_index = get_erd_index(erd_lib)
+        self.erd_decoders = ErdDecoderTable(erd_lib)
+        self.key_count = 1
+        self.err_count = 0
+        self.keep_alive = True
+        self.event_bus = ErdEventBus()
+        self.erd_state = ErdStateCache()
+        self.time_series = ErdTimeSeriesStore()
+        set_active_store(self.time_series)  # So the test report can plot the ERDs received during each scenario.
+        self.reader_thread = None
+        self.capture = None
+        self.write_window = write_window
+        self._write_lock = threading.RLock()
+        self._pending_writes = []
+        self._batch_depth = 0
+        self._write_timer = None
+        self._pending_reads = {}  # ERD id -> list of (future, deadline).
+        self._reads_lock = threading.Lock()
+        self._read_slots = threading.BoundedSemaphore(MAX_READ_REQUESTS_IN_FLIGHT)
+        self.message_type = {
+            0x21: "Write Request",
+            0x22: "Publish",
+            0x23: "Start/Pause Request",
+            0x24: "IPB Safety Key",
+            0x25: "Line Test Request",
+            0x26: "Data Transfer Request",
+            0x27: "Read Request",
+        }
+
+    def construct_message(self, databytes: bytearray, message_type: int):
+        """Construct the IPB message based on data length and message type.
+
+        Args:
+            databytes (bytearray): ERD data to be sent over IPB.
+            message_type (int): message type int.
+        """
+        out_bytes = self.frame_builder.encode(message_type, databytes)
+        self.output(out_bytes)
+        # print(out_bytes.hex())
+
+    def read_erd(self, erd: int, timeout: float = READ_REQUEST_TIMEOUT) -> Future:
+        """Send a read request for an ERD and get a future for the product's answer.
+
+        Any number of reads can be outstanding; all reads of an ERD are answered by the next value the product
+        publishes for it. At most MAX_READ_REQUESTS_IN_FLIGHT reads can be waiting at once, so this blocks (for up to
+        timeout seconds) while that many are waiting. If it has to block, the queued messages are written first (even
+        inside a batch()), so the requests it is waiting on can be answered. Starts the background reader if it is not
+        running.
+
+        Example:
+            status = dryer_control.read_erd(0xF301).result(timeout=1)
+
+        Args:
+            erd (int): ERD id, e.g. 0xF301.
+            timeout (float): Seconds to wait for the answer before the future fails with TimeoutError.
+
+        Returns:
+            Future: Resolves to the ErdEvent of the answer, or fails with TimeoutError.
+        """
+        future = Future()
+        if not self.reader_running:
+            self.start_reader()
+        if not self._read_slots.acquire(blocking=False):
+            # The reads holding the slots may still be queued in a batch; send them so they can be answered.
+            self.flush_writes()
+            if not self._read_slots.acquire(timeout=timeout):
+                future.set_exception(TimeoutError("Too many ERD read requests in flight to read ERD " + hex(erd)))
+                return future
+        future.add_done_callback(lambda _: self._read_slots.release())
+
+        with self._reads_lock:
+            self._pending_reads.setdefault(erd, []).append((future, time.monotonic() + timeout))
+        self.construct_message(erd.to_bytes(2, "big"), 0x27)
+        return future
+
+    def get_erd_value(self, erd: int, max_age: float, timeout: float = READ_REQUEST_TIMEOUT) -> ErdEvent:
+        """Get an ERD's value, from the latest value the product sent if it is fresh enough.
+
+        Only sends a read request (and waits for the answer) if the ERD has not been received in the last max_age
+        seconds.
+
+        Args:
+            erd (int): ERD id, e.g. 0xF301.
+            max_age (float): Seconds old the latest value can be.
+            timeout (float): Seconds to wait for the answer to a read request.
+
+        Returns:
+            ErdEvent: The ERD's value.
+
+        Raises:
+            TimeoutError: If a read request was needed and the product did not answer it in time.
+        """
+        event = self.erd_state.get(erd, max_age)
+        if event is not None:
+            return event
+        return self.read_erd(erd, timeout).result()
+
+    def _resolve_reads(self, event: ErdEvent):
+        """Answer the outstanding read requests for an ERD with a value the product sent.
+
+        Args:
+            event (ErdEvent): The ERD event.
+        """
+        with self._reads_lock:
+            pending_reads = self._pending_reads.pop(event.erd_id, None)
+        for future, _ in pending_reads or []:
+            try:
+                future.set_result(event)
+            except InvalidStateError:
+                pass  # Cancelled by the caller.
+
+    def _expire_reads(self):
+        """Fail the read requests which have not been answered in time."""
+        if not self._pending_reads:
+            return
+        now = time.monotonic()
+        expired = []
+        with self._reads_lock:
+            for erd, pending_reads in list(self._pending_reads.items()):
+                expired += [(erd, future) for future, deadline in pending_reads if deadline <= now]
+                pending_reads[:] = [(future, deadline) for future, deadline in pending_reads if deadline > now]
+                if not pending_reads:
+                    del self._pending_reads[erd]
+        for erd, future in expired:
+            try:
+                future.set_exception(TimeoutError("No answer to the read request for ERD " + hex(erd)))
+            except InvalidStateError:
+                pass
+
+    def start_capture(self, path: str):
+        """Record every frame received and every write sent to a capture file, replacing any existing file.
+
+        Read the file with modules.ipb.ipb_capture.IpbCaptureReader.
+
+        Args:
+            path (str): The capture file, e.g. "reports/ipb.cap".
+        """
+        self.stop_capture()
+        self.capture = IpbCaptureWriter(path)
+
+    def stop_capture(self):
+        """Stop recording and close the capture file started by start_capture()."""
+        capture = self.capture
+        self.capture = None
+        if capture is not None:
+            capture.close()
+
+    def subscribe(self, erd: int, callback: Callable[[ErdEvent], None]):
+        """Call a function whenever the product publishes an ERD.
+
+        Callbacks run on the event bus's dispatcher thread, not the reader thread.
+
+        Args:
+            erd (int): ERD id, e.g. 0xF301.
+            callback (Callable[[ErdEvent], None]): Called with each ERD event.
+        """
+        self.event_bus.subscribe(erd, callback)
+
+    def unsubscribe(self, erd: int, callback: Callable[[ErdEvent], None]):
+        """Stop calling a function subscribed with subscribe().
+
+        Args:
+            erd (int): ERD id, e.g. 0xF301.
+            callback (Callable[[ErdEvent], None]): The subscribed function.
+        """
+        self.event_bus.unsubscribe(erd, callback)
+
+    def start_reader(self):
+        """Run the message reader on a background thread, so tests can drive the UI while ERD events arrive."""
+        if self.reader_thread is not None and self.reader_thread.is_alive():
+            return
+        self.keep_alive = True
+        self.reader_thread = threading.Thread(target=self.run, name="IPB reader", daemon=True)
+        self.reader_thread.start()
+
+    def stop_reader(self):
+        """Stop the background message reader started by start_reader()."""
+        self.flush_writes()
+        self.keep_alive = False
+        if self.reader_thread is not None:
+            self.reader_thread.join()
+            self.reader_thread = None
+
+    @property
+    def reader_running(self) -> bool:
+        """Whether the background message reader is running."""
+        return self.reader_thread is not None and self.reader_thread.is_alive()
+
+    def read_messages(self) -> int:
+        """Read whatever has arrived on the port and parse every complete message.
+
+        Reads in bulk and lets the streaming frame parser find the frames, so a CRC error or noise only skips the bad
+        bytes rather than flushing valid frames already received.
+
+        Returns:
+            int: The number of messages parsed. 0 if nothing complete arrived within the read timeout.
+        """
+        data = self.com.read(max(self.com.in_waiting, 1))
+        timestamp_ns = time.monotonic_ns()
+        frames = self.frame_parser.feed(data)
+        self.err_count = self.frame_parser.crc_errors
+
+        for frame in frames:
+            # print(frame.hex())
+            capture = self.capture
+            if capture is not None:
+                capture.write(frame, RECEIVED, timestamp_ns)
+            self.parse_message(memoryview(frame)[BODY_OFFSET:], timestamp_ns / 1e9)
+        self._expire_reads()
+        return len(frames)
+
+    def run(self):
+        """Runner that keeps listening on IPB for incoming messages from the products"""
+        while self.keep_alive:
+            self.read_messages()
+
+    def parse_message(self, message: bytearray, timestamp: float | None = None):
+        """Decode an incoming message and publish ERD values to the event bus.
+
+        Args:
+            message (bytearray): The message body: message type, ERD and ERD data.
+            timestamp (float | None): When the message was read, from time.monotonic(). Defaults to now. The reader
+                passes the time it recorded the frame in the capture with, so live and replayed events line up.
+        """
+        if message[0] != 0x22:
+            # Other message types are requests to the product, which the tester has no need to decode.
+            return
+
+        erd_id = int.from_bytes(message[1:3], "big")
+        data = bytes(message[4 : 4 + message[3]])
+        decoder = self.erd_decoders.get(erd_id)
+        values = decoder.decode(data) if decoder is not None else None
+        event = ErdEvent(erd_id, message[0], data, time.monotonic() if timestamp is None else timestamp, values)
+        self.erd_state.update(event)
+        self.time_series.record(event, decoder.name if decoder is not None else None)
+        self._resolve_reads(event)
+        self.event_bus.publish(event)
+        # print("[" + self.message_type[message[0]] + "] " + decoder.describe(values))
+
+    def output(self, output_arr: bytearray):
+        """Writes to IPB comm port.
+
+        Inside a batch(), or when a write window is set, the message is queued and written together with the messages
+        sent around it, in the order they were sent.
+
+        Args:
+            output_arr (bytearray): output byte array.
+        """
+        with self._write_lock:
+            self._pending_writes.append(bytes(output_arr))
+            if self._batch_depth > 0:
+                return
+            if self.write_window <= 0:
+                self.flush_writes()
+            elif self._write_timer is None:
+                self._write_timer = threading.Timer(self.write_window, self.flush_writes)
+                self._write_timer.daemon = True
+                self._write_timer.start()
+
+    def flush_writes(self):
+        """Write every queued message to the IPB comm port with one write and one flush."""
+        with self._write_lock:
+            if self._write_timer is not None:
+                self._write_timer.cancel()
+                self._write_timer = None
+            if not self._pending_writes:
+                return
+            frames = self._pending_writes
+            self._pending_writes = []
+            self.com.write(b"".join(frames))
+            self.com.flush()
+            capture = self.capture
+            if capture is not None:
+                timestamp_ns = time.monotonic_ns()
+                for frame in frames:
+                    capture.write(frame, SENT, timestamp_ns)
+
+    @contextmanager
+    def batch(self):
+        """Queue the messages sent inside a with block and write them together when it ends.
+
+        Batches can be nested; the messages are written when the outermost batch ends.
+
+        Example:
+            with dryer_control.batch():
+                dryer_control.get_machine_status()
+                dryer_control.get_machine_substatus()
+        """
+        with self._write_lock:
+            self._batch_depth += 1
+        try:
+            yield self
+        finally:
+            with self._write_lock:
+                self._batch_depth -= 1
+                if self._batch_depth == 0:
+                    self.flush_writes()
@@ -0,0 +1,195 @@
+"""Encode IPB frames from precomputed headers and a table-driven CRC.
+
+The header of an IPB frame only depends on the body length, so the header bytes and header CRC are computed once for
+every possible body length. The body CRC continues from a precomputed CRC of the message type byte, so only the message
+data is run through the CRC for each frame. A 256-entry table-driven CRC16 is provided for when 'crcmod' (whose C
+extension is faster still) is not used. Frames can be encoded straight into a preallocated buffer.
+
+See 'ipb_frame_parser' for the layout of an IPB frame.
+
+&copy; Copyright 2024, Fisher & Paykel Appliances Ltd
+
+All rights reserved. Fisher & Paykel's source code is an
+unpublished work and the use of a copyright notice does not imply otherwise.
+This source code contains confidential, trade secret material of
+Fisher & Paykel Appliances Ltd.
+Any attempt or participation in deciphering, decoding, reverse engineering
+or in any way altering the source code is strictly prohibited,
+unless the prior written consent of Fisher & Paykel is obtained.
+Permission to use, copy, publish, modify and distribute for any purpose
+is not permitted without specific, written prior permission from
+Fisher & Paykel Appliances Limited.
+"""
+
+from typing import Callable
+
+from modules.ipb.ipb_frame_parser import BODY_CRC_LENGTH, BODY_OFFSET, HEADER_START
+
+
+CRC_POLYNOMIAL = 0x1021
+CRC_INITIAL_VALUE = 0x1021  # The IPB uses the polynomial as the initial value.
+
+PROTOCOL = 0x00
+SOURCE_ADDRESS = 0xFE
+BROADCAST_ADDRESS = 0xFF
+SEQUENCE_NUMBER = 0x00
+
+MAX_BODY_LENGTH = 0xFF
+MAX_DATA_LENGTH = MAX_BODY_LENGTH - 1 - BODY_CRC_LENGTH  # Less the message type and the body CRC.
+FRAME_OVERHEAD = BODY_OFFSET + 1 + BODY_CRC_LENGTH  # Header, header CRC, message type, and body CRC.
+
+PRECOMPUTED_MESSAGE_TYPES = (0x21, 0x22, 0x27)  # Write, publish, and read requests.
+
+
+def _make_crc_table() -> tuple:
+    """Compute the CRC16 value of every byte, for the table-driven CRC.
+
+    Returns:
+        tuple: The 256 values.
+    """
+    table = []
+
+    for byte in range(256):
+        crc = byte << 8
+
+        for _ in range(8):
+            crc = ((crc << 1) ^ CRC_POLYNOMIAL) if crc & 0x8000 else (crc << 1)
+
+        table.append(crc & 0xFFFF)
+
+    return tuple(table)
+
+
+CRC_TABLE = _make_crc_table()
+
+
+def crc16(data: bytes, crc: int = CRC_INITIAL_VALUE) -> int:
+    """Compute the IPB CRC16 of some data.
+
+    Gives the same result as the 'crcmod' function used by 'IPB_Control', but can continue from an earlier CRC.
+
+    Args:
+        data (bytes): The data. Any bytes-like object.
+        crc (int): The CRC to continue from, for example the CRC of the data before this data. Defaults to the IPB's
+            initial value.
+
+    Returns:
+        int: The CRC.
+    """
+    table = CRC_TABLE
+
+    for byte in data:
+        crc = ((crc << 8) & 0xFFFF) ^ table[(crc >> 8) ^ byte]
+
+    return crc
+
+
+class IpbFrameBuilder:
+    """Encodes IPB frames sent from the tester to the product."""
+
+    def __init__(
+        self,
+        crc16: Callable = crc16,
+        source_address: int = SOURCE_ADDRESS,
+        destination_address: int = BROADCAST_ADDRESS,
+    ) -> None:
+        """Precompute the header of every body length and the body CRC prefix of the common message types.
+
+        Args:
+            crc16 (Callable): The IPB CRC16 function. It must accept the CRC to continue from as its second argument,
+                as both this module's 'crc16' and 'crcmod' functions do. Defaults to this module's 'crc16'.
+            source_address (int): The tester's IPB address. Defaults to 'SOURCE_ADDRESS'.
+            destination_address (int): The product's IPB address. Defaults to 'BROADCAST_ADDRESS'.
+        """
+        self._crc16 = crc16
+        self._headers = [b""] * (MAX_BODY_LENGTH + 1)  # Body length -> header and header CRC.
+
+        for body_length in range(1 + BODY_CRC_LENGTH, MAX_BODY_LENGTH + 1):
+            header = bytes(
+                [HEADER_START, PROTOCOL, source_address, destination_address, SEQUENCE_NUMBER, body_length]
+            )
+            self._headers[body_length] = header + self._crc16(header).to_bytes(2, "big")
+
+        # Message type -> CRC of the message type byte, which the CRC of the rest of the body continues from.
+        self._message_type_crcs = {
+            message_type: self._crc16(bytes([message_type])) for message_type in PRECOMPUTED_MESSAGE_TYPES
+        }
+        # (Message type, data length) -> header, header CRC, and message type byte. Filled in as they are needed.
+        self._prefixes = {}
+
+    def _get_prefix(self, message_type: int, data_length: int) -> tuple:
+        """Get the bytes before the message data and the CRC to continue the body CRC from.
+
+        Args:
+            message_type (int): The message type.
+            data_length (int): The length of the message data.
+
+        Returns:
+            tuple: The header, header CRC, and message type byte (bytes), and the CRC of the message type byte (int).
+
+        Raises:
+            ValueError: If the data is too long for one frame.
+        """
+        try:
+            return self._prefixes[message_type, data_length]
+        except KeyError:
+            pass
+
+        if data_length > MAX_DATA_LENGTH:
+            raise ValueError(f"IPB message data is {data_length} bytes, the most is {MAX_DATA_LENGTH}")
+
+        message_type_crc = self._message_type_crcs.get(message_type)
+
+        if message_type_crc is None:
+            message_type_crc = self._message_type_crcs[message_type] = self._crc16(bytes([message_type]))
+
+        body_length = data_length + 1 + BODY_CRC_LENGTH
+        prefix = self._prefixes[message_type, data_length] = (
+            self._headers[body_length] + bytes([message_type]),
+            message_type_crc,
+        )
+
+        return prefix
+
+    def encode_into(self, buffer: bytearray, offset: int, message_type: int, data: bytes) -> int:
+        """Encode a frame into a buffer.
+
+        Args:
+            buffer (bytearray): The buffer. It must have at least 'len(data) + FRAME_OVERHEAD' bytes from 'offset'.
+            offset (int): Where to write the frame in the buffer.
+            message_type (int): The message type. For example: 0x27 for a read request.
+            data (bytes): The message data. For example: the ERD ID to read.
+
+        Returns:
+            int: The offset just after the frame, where the next frame can be written.
+
+        Raises:
+            ValueError: If the data is too long for one frame.
+        """
+        prefix, message_type_crc = self._get_prefix(message_type, len(data))
+        data_offset = offset + len(prefix)
+        crc_offset = data_offset + len(data)
+        end = crc_offset + BODY_CRC_LENGTH
+
+        buffer[offset:data_offset] = prefix
+        buffer[data_offset:crc_offset] = data
+        buffer[crc_offset:end] = self._crc16(data, message_type_crc).to_bytes(2, "big")
+
+        return end
+
+    def encode(self, message_type: int, data: bytes) -> bytes:
+        """Encode a frame.
+
+        Args:
+            message_type (int): The message type.
+            data (bytes): The message data.
+
+        Returns:
+            bytes: The frame.
+
+        Raises:
+            ValueError: If the data is too long for one frame.
+        """
+        prefix, message_type_crc = self._get_prefix(message_type, len(data))
+
+        return prefix + data + self._crc16(data, message_type_crc).to_bytes(2, "big")
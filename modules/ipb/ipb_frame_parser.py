@@ -0,0 +1,144 @@
+"""Split a stream of IPB bytes into validated frames.
+
+Bytes are read from the port in bulk and appended to a buffer. The parser scans the buffer for the 0x4B start byte,
+checks the header and body CRCs on 'memoryview' slices of the buffer (without copying), and hands back each valid
+frame. After a CRC error it skips one byte and resynchronises on the next start byte rather than flushing the port, so
+valid frames already in the buffer are not lost.
+
+An IPB frame is laid out as follows:
+
+    0x4B | protocol | source | destination | sequence | body length | header CRC (2 bytes) | body
+
+The body is the message type, the message data, and a body CRC (2 bytes). The body length includes the body CRC.
+
+&copy; Copyright 2024, Fisher & Paykel Appliances Ltd
+
+All rights reserved. Fisher & Paykel's source code is an
+unpublished work and the use of a copyright notice does not imply otherwise.
+This source code contains confidential, trade secret material of
+Fisher & Paykel Appliances Ltd.
+Any attempt or participation in deciphering, decoding, reverse engineering
+or in any way altering the source code is strictly prohibited,
+unless the prior written consent of Fisher & Paykel is obtained.
+Permission to use, copy, publish, modify and distribute for any purpose
+is not permitted without specific, written prior permission from
+Fisher & Paykel Appliances Limited.
+"""
+
+from time import monotonic
+from typing import Callable
+
+
+HEADER_START = 0x4B
+HEADER_LENGTH = 6  # Without the header CRC.
+HEADER_CRC_LENGTH = 2
+BODY_OFFSET = HEADER_LENGTH + HEADER_CRC_LENGTH
+BODY_LENGTH_OFFSET = 5
+BODY_CRC_LENGTH = 2
+MIN_BODY_LENGTH = 1 + BODY_CRC_LENGTH  # A message type and a body CRC.
+
+
+class IpbFrameParser:
+    """A streaming IPB frame parser with resynchronisation and error counters."""
+
+    def __init__(self, crc16: Callable) -> None:
+        """Create an empty parser.
+
+        Args:
+            crc16 (Callable): The IPB CRC16 function. It must accept a 'memoryview' and return an integer.
+        """
+        self._crc16 = crc16
+        self._buffer = bytearray()
+
+        self.bytes_received = 0
+        self.bytes_skipped = 0
+        self.frames = 0
+        self.crc_errors = 0
+        self.start_time = monotonic()
+
+    @property
+    def frames_per_second(self) -> float:
+        """The average number of valid frames parsed per second since the parser was created or reset."""
+        elapsed = monotonic() - self.start_time
+
+        return self.frames / elapsed if elapsed > 0 else 0.0
+
+    def reset_counters(self) -> None:
+        """Reset the counters and the frames-per-second measurement."""
+        self.bytes_received = 0
+        self.bytes_skipped = 0
+        self.frames = 0
+        self.crc_errors = 0
+        self.start_time = monotonic()
+
+    def feed(self, data: bytes) -> list:
+        """Add received bytes to the buffer and extract every complete, valid frame.
+
+        Args:
+            data (bytes): The bytes read from the port. May contain partial frames, several frames, or noise.
+
+        Returns:
+            list: The complete frames (header, header CRC, and body) as 'bytes', in the order they were received. An
+                incomplete frame at the end of the buffer is kept until more bytes arrive.
+        """
+        buffer = self._buffer
+        buffer += data
+        self.bytes_received += len(data)
+
+        frames = []
+        position = 0
+        buffer_length = len(buffer)
+        view = memoryview(buffer)
+
+        try:
+            while True:
+                start = buffer.find(HEADER_START, position)
+
+                if start < 0:
+                    self.bytes_skipped += buffer_length - position
+                    position = buffer_length
+                    break
+
+                self.bytes_skipped += start - position
+                position = start
+
+                if buffer_length - position < BODY_OFFSET:
+                    break  # Wait for the rest of the header.
+
+                # Slices of the view are passed straight to the CRC function rather than kept in variables, because
+                # the buffer cannot be resized while any slice of it is still alive.
+                header_end = position + HEADER_LENGTH
+                header_crc = int.from_bytes(view[header_end : header_end + HEADER_CRC_LENGTH], "big")
+                body_length = buffer[position + BODY_LENGTH_OFFSET]
+
+                if body_length < MIN_BODY_LENGTH or self._crc16(view[position:header_end]) != header_crc:
+                    self._skip_start_byte()
+                    position += 1
+                    continue
+
+                end = position + BODY_OFFSET + body_length
+
+                if buffer_length < end:
+                    break  # Wait for the rest of the body.
+
+                body_crc = int.from_bytes(view[end - BODY_CRC_LENGTH : end], "big")
+
+                if self._crc16(view[position + BODY_OFFSET : end - BODY_CRC_LENGTH]) != body_crc:
+                    self._skip_start_byte()
+                    position += 1
+                    continue
+
+                frames.append(bytes(view[position:end]))
+                self.frames += 1
+                position = end
+        finally:
+            view.release()  # The buffer cannot be resized while a view of it exists.
+
+        del buffer[:position]
+
+        return frames
+
+    def _skip_start_byte(self) -> None:
+        """Count a start byte whose frame failed a CRC check, so the scan can resume after it."""
+        self.crc_errors += 1
+        self.bytes_skipped += 1
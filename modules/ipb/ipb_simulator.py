@@ -0,0 +1,285 @@
+"""Simulate an appliance on the IPB through a pseudo-terminal, so IPB code can be tested without a dryer.
+
+The simulator opens a pty and speaks the IPB protocol on it. 'IPB_Control' (or anything else using pyserial) connects
+to the pty's device path as if it were the appliance's COM port. The simulator:
+
+    - answers read requests (0x27) with a publish (0x22) of the ERD's value,
+    - stores the values written by write requests (0x21) and publishes (0x22), and publishes them back,
+    - toggles between running and paused on start/pause requests (0x23) and start/pause key presses,
+    - completes the running cycle when test mode is on and the 2D moisture is set to 'DRY_MOISTURE',
+    - publishes the machine status and substatus at a configurable rate,
+    - corrupts a configurable fraction of the frames it sends, to exercise resynchronisation.
+
+Only Linux (and other POSIX systems with ptys) is supported.
+
+Usage:
+    python3 -m modules.ipb.ipb_simulator [--publish-rate HZ] [--crc-error-rate FRACTION]
+
+    Prints the device path to connect to, then runs until interrupted.
+
+&copy; Copyright 2024, Fisher & Paykel Appliances Ltd
+
+All rights reserved. Fisher & Paykel's source code is an
+unpublished work and the use of a copyright notice does not imply otherwise.
+This source code contains confidential, trade secret material of
+Fisher & Paykel Appliances Ltd.
+Any attempt or participation in deciphering, decoding, reverse engineering
+or in any way altering the source code is strictly prohibited,
+unless the prior written consent of Fisher & Paykel is obtained.
+Permission to use, copy, publish, modify and distribute for any purpose
+is not permitted without specific, written prior permission from
+Fisher & Paykel Appliances Limited.
+"""
+
+import argparse
+import crcmod
+import logging
+import os
+import random
+import select
+import threading
+import tty
+
+from time import monotonic
+
+from modules.ipb.ipb_frame_builder import IpbFrameBuilder
+from modules.ipb.ipb_frame_parser import BODY_OFFSET, IpbFrameParser
+
+
+APPLIANCE_ADDRESS = 0xC0
+TESTER_ADDRESS = 0xFE
+
+MACHINE_STATUS_ERD = 0xF301
+MACHINE_SUBSTATUS_ERD = 0xF302
+SELECTED_CYCLE_ERD = 0xF307
+CAP_TOUCH_ERD = 0xF012
+SET_CYCLE_ERD = 0xF403
+TEST_MODE_ERD = 0xF42A
+MOISTURE_ERD = 0xF42B
+
+# The machine status values the simulator moves between. They must match ERDLib's definition of 0xF301.
+STATUS_STANDBY = 1
+STATUS_RUN = 2
+STATUS_PAUSE = 3
+STATUS_COMPLETE = 5
+
+DRY_MOISTURE = 0  # In test mode, setting the 2D moisture to this completes the running cycle.
+
+START_PAUSE_KEYS = (10, 11)  # The washer and dryer start/pause keys of the cap touch ERD.
+
+DEFAULT_ERD_VALUES = {
+    MACHINE_STATUS_ERD: bytes([STATUS_STANDBY]),
+    MACHINE_SUBSTATUS_ERD: b"\x00",
+    SELECTED_CYCLE_ERD: b"\x01",
+    CAP_TOUCH_ERD: b"\x00\x00",
+    TEST_MODE_ERD: b"\x00",
+    MOISTURE_ERD: b"\x00",
+}
+PUBLISHED_ERDS = (MACHINE_STATUS_ERD, MACHINE_SUBSTATUS_ERD)
+READ_SIZE = 4096
+
+
+logger = logging.getLogger(__name__)
+
+
+class IpbSimulator:
+    """A simulated appliance on the IPB, reachable through a pty."""
+
+    def __init__(
+        self,
+        erd_values: dict | None = None,
+        publish_rate: float = 1.0,
+        crc_error_rate: float = 0.0,
+        seed: int | None = None,
+    ) -> None:
+        """Open the pty. Call 'start' (or use the simulator as a context manager) to start answering.
+
+        Args:
+            erd_values (dict | None): ERD IDs and their initial values (bytes). They are added to, and override,
+                'DEFAULT_ERD_VALUES'. Defaults to None.
+            publish_rate (float): How many times per second to publish the machine status and substatus. 0 only
+                publishes them when they change. Defaults to 1.
+            crc_error_rate (float): The fraction of frames sent with a corrupted body CRC. Defaults to 0.
+            seed (int | None): The seed for choosing which frames to corrupt, for repeatable runs. Defaults to None.
+        """
+        self.erd_values = {**DEFAULT_ERD_VALUES, **(erd_values or {})}
+        self.publish_rate = publish_rate
+        self.crc_error_rate = crc_error_rate
+
+        self.frames_received = 0
+        self.frames_sent = 0
+        self.crc_errors_injected = 0
+
+        crc16 = crcmod.mkCrcFun(0x11021, rev=False, initCrc=0x1021)
+        self._parser = IpbFrameParser(crc16)
+        self._builder = IpbFrameBuilder(crc16, APPLIANCE_ADDRESS, TESTER_ADDRESS)
+        self._random = random.Random(seed)
+        self._write_lock = threading.Lock()
+        self._running = False
+        self._thread = None
+
+        self._master_fd, self._slave_fd = os.openpty()
+        tty.setraw(self._slave_fd)  # No echo or line ending translation; the IPB is binary.
+        self.port = os.ttyname(self._slave_fd)
+
+    def __enter__(self) -> "IpbSimulator":
+        self.start()
+        return self
+
+    def __exit__(self, *_) -> None:
+        self.close()
+
+    def start(self) -> None:
+        """Start answering on a background thread."""
+        if self._running:
+            return
+
+        self._running = True
+        self._thread = threading.Thread(target=self._run, name="IpbSimulator", daemon=True)
+        self._thread.start()
+        logger.info(f"IPB simulator listening on {self.port}")
+
+    def stop(self) -> None:
+        """Stop answering and publishing, but keep the pty open so the tester can read what was already sent."""
+        self._running = False
+
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
+
+    def close(self) -> None:
+        """Stop answering and close the pty."""
+        self.stop()
+
+        for fd in (self._master_fd, self._slave_fd):
+            try:
+                os.close(fd)
+            except OSError:
+                pass
+
+    def set_erd(self, erd_id: int, value: bytes, publish: bool = True) -> None:
+        """Change an ERD's value, as the appliance would.
+
+        Args:
+            erd_id (int): The ERD ID. For example: 0xF301.
+            value (bytes): The new value.
+            publish (bool): Whether to publish the value if it changed. Defaults to True.
+        """
+        changed = self.erd_values.get(erd_id) != value
+        self.erd_values[erd_id] = value
+
+        if publish and changed:
+            self.publish(erd_id)
+
+    def publish(self, erd_id: int) -> None:
+        """Publish an ERD's value.
+
+        Args:
+            erd_id (int): The ERD ID.
+        """
+        value = self.erd_values[erd_id]
+        self._send(self._builder.encode(0x22, erd_id.to_bytes(2, "big") + bytes([len(value)]) + value))
+
+    def _send(self, frame: bytes) -> None:
+        """Write a frame to the tester, corrupting it if the CRC error rate says so.
+
+        Args:
+            frame (bytes): The frame.
+        """
+        if self.crc_error_rate > 0 and self._random.random() < self.crc_error_rate:
+            corrupted_frame = bytearray(frame)
+            corrupted_frame[-1] ^= 0xFF
+            frame = bytes(corrupted_frame)
+            self.crc_errors_injected += 1
+
+        with self._write_lock:
+            try:
+                os.write(self._master_fd, frame)
+            except OSError as e:
+                logger.warning(f"IPB simulator could not write a frame: {e}")
+                return
+
+        self.frames_sent += 1
+
+    def _run(self) -> None:
+        """Answer frames and publish the status until stopped."""
+        publish_interval = 1 / self.publish_rate if self.publish_rate > 0 else None
+        next_publish = monotonic()
+
+        while self._running:
+            timeout = 0.1 if publish_interval is None else max(0.0, min(0.1, next_publish - monotonic()))
+            readable, _, _ = select.select([self._master_fd], [], [], timeout)
+
+            if readable:
+                try:
+                    data = os.read(self._master_fd, READ_SIZE)
+                except OSError:
+                    break  # The pty was closed.
+
+                for frame in self._parser.feed(data):
+                    self.frames_received += 1
+                    self._handle(memoryview(frame)[BODY_OFFSET:])
+
+            if publish_interval is not None and monotonic() >= next_publish:
+                for erd_id in PUBLISHED_ERDS:
+                    self.publish(erd_id)
+
+                next_publish += publish_interval
+
+    def _handle(self, body: memoryview) -> None:
+        """Answer a frame from the tester.
+
+        Args:
+            body (memoryview): The frame's body: message type, data, and body CRC.
+        """
+        message_type = body[0]
+        data = bytes(body[1:-2])
+
+        if message_type == 0x27 and len(data) >= 2:
+            erd_id = int.from_bytes(data[:2], "big")
+
+            if erd_id in self.erd_values:
+                self.publish(erd_id)
+        elif message_type in [0x21, 0x22] and len(data) >= 3:
+            erd_id = int.from_bytes(data[:2], "big")
+            value = data[3 : 3 + data[2]]
+            self.set_erd(erd_id, value, publish=False)
+            self.publish(erd_id)
+
+            if erd_id == CAP_TOUCH_ERD and value[:1] in [bytes([key]) for key in START_PAUSE_KEYS]:
+                self._start_pause()
+            elif erd_id == SET_CYCLE_ERD:
+                self.set_erd(SELECTED_CYCLE_ERD, value)
+            elif erd_id == MOISTURE_ERD and value == bytes([DRY_MOISTURE]):
+                self._complete_if_dry()
+        elif message_type == 0x23:
+            self._start_pause()
+
+    def _complete_if_dry(self) -> None:
+        """Complete the cycle if it is running in test mode, as the load has been reported dry."""
+        test_mode = self.erd_values[TEST_MODE_ERD][:1] == b"\x01"
+
+        if test_mode and self.erd_values[MACHINE_STATUS_ERD][:1] == bytes([STATUS_RUN]):
+            self.set_erd(MACHINE_STATUS_ERD, bytes([STATUS_COMPLETE]))
+
+    def _start_pause(self) -> None:
+        """Start or pause the cycle."""
+        status = self.erd_values[MACHINE_STATUS_ERD][:1]
+        self.set_erd(MACHINE_STATUS_ERD, bytes([STATUS_PAUSE if status == bytes([STATUS_RUN]) else STATUS_RUN]))
+
+
+if __name__ == "__main__":
+    argument_parser = argparse.ArgumentParser(description="Simulate an appliance on the IPB through a pty.")
+    argument_parser.add_argument("--publish-rate", type=float, default=1.0, help="status publishes per second")
+    argument_parser.add_argument("--crc-error-rate", type=float, default=0.0, help="fraction of frames to corrupt")
+    arguments = argument_parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO)
+
+    with IpbSimulator(publish_rate=arguments.publish_rate, crc_error_rate=arguments.crc_error_rate) as simulator:
+        print(f"Connect to {simulator.port}")
+
+        try:
+            threading.Event().wait()
+        except KeyboardInterrupt:
+            pass
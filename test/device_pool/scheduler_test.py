@@ -0,0 +1,115 @@
+"""Check the device pool splits scenarios evenly between rigs and merges the rigs' results into one run.
+
+&copy; Copyright 2024, Fisher & Paykel Appliances Ltd
+
+All rights reserved. Fisher & Paykel's source code is an
+unpublished work and the use of a copyright notice does not imply otherwise.
+This source code contains confidential, trade secret material of
+Fisher & Paykel Appliances Ltd.
+Any attempt or participation in deciphering, decoding, reverse engineering
+or in any way altering the source code is strictly prohibited,
+unless the prior written consent of Fisher & Paykel is obtained.
+Permission to use, copy, publish, modify and distribute for any purpose
+is not permitted without specific, written prior permission from
+Fisher & Paykel Appliances Limited.
+
+It needs no rigs; the scenarios and results are made up.
+
+Usage:
+    python3 test/device_pool/scheduler_test.py
+
+    The exit code is 0 if the test passes. The exit code is not 0 if the test fails.
+"""
+
+import json
+import random
+import sys
+import tempfile
+
+from pathlib import Path
+
+sys.path.append(str(Path(__file__).resolve().parents[2]))  # The root of the repository.
+
+from modules.device_pool.device_pool import (  # noqa: E402
+    DurationHistory,
+    RIG_ATTRIBUTE_KEY,
+    assign_shards,
+    load_inventory,
+    merge_results,
+)
+
+
+NUM_SCENARIOS = 40
+NUM_RIGS = 4
+MAX_IMBALANCE = 1.1  # The busiest rig's expected work, relative to a perfect split.
+
+
+def check_inventory(directory: Path) -> None:
+    """Check each rig gets its own Appium and system ports.
+
+    Args:
+        directory (Path): A directory for the inventory file.
+    """
+    inventory_path = directory / "devices.json"
+
+    with open(inventory_path, "w") as file:
+        json.dump({"rigs": [{"name": f"rig-{number}", "capabilities": {}} for number in range(NUM_RIGS)]}, file)
+
+    rigs = load_inventory(inventory_path)
+
+    assert len({rig.appium_port for rig in rigs}) == NUM_RIGS
+    assert len({rig.capabilities["appium:systemPort"] for rig in rigs}) == NUM_RIGS
+
+
+def check_shards(directory: Path) -> None:
+    """Check the scenarios are split so every rig finishes at about the same time.
+
+    Args:
+        directory (Path): A directory for the durations file.
+    """
+    node_ids = [f"tests/functions/test_{number // 5}.py::test_{number}" for number in range(NUM_SCENARIOS)]
+    history = DurationHistory(directory / "durations.json")
+    history.update({node_id: random.uniform(10, 300) for node_id in node_ids})
+
+    history = DurationHistory(directory / "durations.json")  # Read the durations back from disk.
+    shards = assign_shards(node_ids, NUM_RIGS, history)
+    loads = [sum(history.get(node_id) for node_id in shard) for shard in shards]
+    perfect_load = sum(loads) / NUM_RIGS
+
+    print(f"Expected work per rig: {', '.join(f'{load:.0f} s' for load in loads)} (perfect: {perfect_load:.0f} s)")
+
+    assert sorted(node_id for shard in shards for node_id in shard) == sorted(node_ids)
+    assert max(loads) <= perfect_load * MAX_IMBALANCE
+    assert all(shard == sorted(shard, key=node_ids.index) for shard in shards)
+
+
+def check_merge() -> None:
+    """Check the rigs' results merge into one run, with each scenario recording its rig."""
+
+    def make_result(start_second: int, passed: bool) -> dict:
+        start_timestamp = f"2024-11-15 11:00:{start_second:02d},000"
+        end_timestamp = f"2024-11-15 11:00:{start_second + 1:02d},000"
+        attributes = {"start_timestamp": start_timestamp, "end_timestamp": end_timestamp}
+        scenario = {"name": f"test_{start_second}", "attributes": dict(attributes), "steps": [], "result": passed}
+        feature = {"name": "End", "attributes": dict(attributes), "scenarios": [scenario], "result": passed}
+
+        return {"attributes": dict(attributes), "features": [feature], "result": passed}
+
+    merged = merge_results({"rig-1": make_result(30, True), "rig-2": make_result(10, False)})
+    scenarios = merged["features"][0]["scenarios"]
+
+    assert len(merged["features"]) == 1
+    assert [scenario["attributes"][RIG_ATTRIBUTE_KEY] for scenario in scenarios] == ["rig-2", "rig-1"]
+    assert merged["attributes"]["start_timestamp"] == "2024-11-15 11:00:10,000"
+    assert merged["attributes"]["end_timestamp"] == "2024-11-15 11:00:31,000"
+    assert merged["result"] is False
+
+
+if __name__ == "__main__":
+    with tempfile.TemporaryDirectory() as directory:
+        check_inventory(Path(directory))
+        check_shards(Path(directory))
+
+    check_merge()
+
+    print("Test passed!")
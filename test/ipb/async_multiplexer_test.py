@@ -0,0 +1,91 @@
+"""Monitor several simulated appliances from one asyncio event loop and check their events merge in time order.
+
+&copy; Copyright 2024, Fisher & Paykel Appliances Ltd
+
+All rights reserved. Fisher & Paykel's source code is an
+unpublished work and the use of a copyright notice does not imply otherwise.
+This source code contains confidential, trade secret material of
+Fisher & Paykel Appliances Ltd.
+Any attempt or participation in deciphering, decoding, reverse engineering
+or in any way altering the source code is strictly prohibited,
+unless the prior written consent of Fisher & Paykel is obtained.
+Permission to use, copy, publish, modify and distribute for any purpose
+is not permitted without specific, written prior permission from
+Fisher & Paykel Appliances Limited.
+
+It needs ERDLib (from PythonCommsBusHijack) and a POSIX system with ptys, but no appliance.
+
+Usage:
+    python3 test/ipb/async_multiplexer_test.py
+
+    The exit code is 0 if the test passes. The exit code is not 0 if the test fails.
+"""
+
+import asyncio
+import sys
+import threading
+
+from contextlib import ExitStack
+from pathlib import Path
+from time import perf_counter
+
+sys.path.append(str(Path(__file__).resolve().parents[2]))  # The root of the repository.
+
+from modules.ipb.ipb_async import IpbMultiplexer  # noqa: E402
+from modules.ipb.ipb_simulator import IpbSimulator, MACHINE_STATUS_ERD, SELECTED_CYCLE_ERD  # noqa: E402
+
+
+NUM_APPLIANCES = 8
+PUBLISH_RATE = 50  # Status publishes per second, per appliance.
+MONITOR_TIME = 2.0  # Seconds.
+
+
+async def monitor(simulators: dict) -> None:
+    """Read from every appliance at once, then collect the merged stream for a while and check it.
+
+    Args:
+        simulators (dict): Appliance names mapped to their simulators.
+    """
+    async with IpbMultiplexer() as multiplexer:  # ERD definitions come from the cached ERD index.
+        ports = {name: multiplexer.add_port(name, simulator.port) for name, simulator in simulators.items()}
+
+        answers = await asyncio.gather(*[port.read_erd(SELECTED_CYCLE_ERD, timeout=5) for port in ports.values()])
+        assert all(answer.data == b"\x01" for answer in answers)
+
+        events = []
+        start_time = perf_counter()
+
+        async def collect() -> None:
+            async for appliance_event in multiplexer.events():
+                events.append(appliance_event)
+
+        try:
+            await asyncio.wait_for(collect(), MONITOR_TIME)
+        except asyncio.TimeoutError:
+            pass
+
+        elapsed = perf_counter() - start_time
+
+    appliances = {appliance_event.appliance for appliance_event in events}
+    timestamps = [appliance_event.event.timestamp for appliance_event in events]
+
+    print(f"{len(events)} events from {len(appliances)} appliances in {elapsed:.2f} s on {threading.active_count()} "
+          f"threads (including {NUM_APPLIANCES} simulator threads)")
+
+    assert appliances == set(simulators)
+    assert timestamps == sorted(timestamps)
+    assert all(appliance_event.event.erd_id != MACHINE_STATUS_ERD or appliance_event.event.values is not None
+               for appliance_event in events)
+    assert multiplexer.dropped_events == 0
+
+
+if __name__ == "__main__":
+    with ExitStack() as stack:
+        simulators = {
+            f"appliance {number}": stack.enter_context(IpbSimulator(publish_rate=PUBLISH_RATE))
+            for number in range(NUM_APPLIANCES)
+        }
+
+        asyncio.run(monitor(simulators))
+
+    print("Test passed!")
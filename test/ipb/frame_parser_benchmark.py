@@ -0,0 +1,130 @@
+"""Replay a synthetic IPB capture through the streaming frame parser and report its throughput.
+
+&copy; Copyright 2024, Fisher & Paykel Appliances Ltd
+
+All rights reserved. Fisher & Paykel's source code is an
+unpublished work and the use of a copyright notice does not imply otherwise.
+This source code contains confidential, trade secret material of
+Fisher & Paykel Appliances Ltd.
+Any attempt or participation in deciphering, decoding, reverse engineering
+or in any way altering the source code is strictly prohibited,
+unless the prior written consent of Fisher & Paykel is obtained.
+Permission to use, copy, publish, modify and distribute for any purpose
+is not permitted without specific, written prior permission from
+Fisher & Paykel Appliances Limited.
+
+The capture mixes machine status, substatus, and cap touch publishes with line noise and frames whose body CRC has been
+corrupted. It is replayed in chunks of several sizes, from single bytes (the worst case for a serial port) up to the
+bulk reads the IPB reader makes when the port is busy. The parser must recover every valid frame.
+
+For reference, 115200 baud is roughly 11,500 bytes per second, or about 1,000 typical frames per second.
+
+Usage:
+    python3 test/ipb/frame_parser_benchmark.py
+
+    The exit code is 0 if every valid frame was recovered. The exit code is not 0 otherwise.
+"""
+
+import crcmod
+import random
+import sys
+
+from pathlib import Path
+from time import perf_counter
+
+sys.path.append(str(Path(__file__).resolve().parents[2]))  # The root of the repository.
+
+from modules.ipb.ipb_frame_parser import IpbFrameParser  # noqa: E402
+
+
+NUM_FRAMES = 100000
+NOISE_INTERVAL = 97  # Insert line noise before every Nth frame.
+CORRUPT_INTERVAL = 251  # Insert a corrupted copy before every Nth frame.
+CHUNK_SIZES = [1, 64, 4096]
+
+
+crc16 = crcmod.mkCrcFun(0x11021, rev=False, initCrc=0x1021)
+
+
+def build_frame(message_type: int, data: bytes) -> bytes:
+    """Build an IPB frame, as 'IPB_Control.construct_message' does.
+
+    Args:
+        message_type (int): The message type. For example: 0x22.
+        data (bytes): The message data.
+
+    Returns:
+        bytes: The frame.
+    """
+    header = bytes([0x4B, 0x00, 0xFE, 0xFF, 0x00, len(data) + 3])
+    body = bytes([message_type]) + data
+
+    return header + crc16(header).to_bytes(2, "big") + body + crc16(body).to_bytes(2, "big")
+
+
+def build_capture() -> tuple:
+    """Build the synthetic capture.
+
+    Returns:
+        tuple: The capture (bytes) and the list of valid frames in it.
+    """
+    generator = random.Random(1)
+    frames = []
+    capture = bytearray()
+
+    for frame_index in range(NUM_FRAMES):
+        erd = generator.choice([0xF301, 0xF302, 0xF012])
+        data = erd.to_bytes(2, "big") + bytes([2, generator.randrange(256), generator.randrange(256)])
+        frame = build_frame(0x22, data)
+
+        if frame_index % NOISE_INTERVAL == 0:
+            capture += bytes([0x11, 0x4B]) + bytes(generator.randrange(256) for _ in range(6))
+
+        if frame_index % CORRUPT_INTERVAL == 0:
+            corrupted_frame = bytearray(frame)
+            corrupted_frame[-3] ^= 0xFF
+            capture += corrupted_frame
+
+        capture += frame
+        frames.append(frame)
+
+    return bytes(capture), frames
+
+
+def replay(capture: bytes, chunk_size: int) -> tuple:
+    """Replay the capture through a new parser.
+
+    Args:
+        capture (bytes): The capture.
+        chunk_size (int): The number of bytes fed to the parser at a time.
+
+    Returns:
+        tuple: The parsed frames, the parser, and the elapsed time in seconds.
+    """
+    parser = IpbFrameParser(crc16)
+    parsed_frames = []
+
+    start_time = perf_counter()
+
+    for offset in range(0, len(capture), chunk_size):
+        parsed_frames.extend(parser.feed(capture[offset : offset + chunk_size]))
+
+    return parsed_frames, parser, perf_counter() - start_time
+
+
+if __name__ == "__main__":
+    capture, frames = build_capture()
+    print(f"Capture: {len(capture)} bytes, {len(frames)} valid frames")
+
+    for chunk_size in CHUNK_SIZES:
+        parsed_frames, parser, elapsed = replay(capture, chunk_size)
+
+        print(
+            f"Chunk size {chunk_size:>5}: {len(parsed_frames) / elapsed:>10.0f} frames/s, "
+            f"{len(capture) / elapsed / 1e6:.2f} MB/s, "
+            f"{parser.crc_errors} CRC errors, {parser.bytes_skipped} bytes skipped"
+        )
+
+        assert parsed_frames == frames  # Every valid frame must be recovered, in order.
+
+    print("Benchmark passed!")
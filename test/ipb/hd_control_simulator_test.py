@@ -0,0 +1,146 @@
+"""Drive 'HD_control' against the IPB simulator, then load test the reader with read requests.
+
+&copy; Copyright 2024, Fisher & Paykel Appliances Ltd
+
+All rights reserved. Fisher & Paykel's source code is an
+unpublished work and the use of a copyright notice does not imply otherwise.
+This source code contains confidential, trade secret material of
+Fisher & Paykel Appliances Ltd.
+Any attempt or participation in deciphering, decoding, reverse engineering
+or in any way altering the source code is strictly prohibited,
+unless the prior written consent of Fisher & Paykel is obtained.
+Permission to use, copy, publish, modify and distribute for any purpose
+is not permitted without specific, written prior permission from
+Fisher & Paykel Appliances Limited.
+
+The simulator corrupts some of the frames it sends, so the test also checks the reader resynchronises after every CRC
+error. It needs ERDLib (from PythonCommsBusHijack) and a POSIX system with ptys, but no appliance.
+
+Usage:
+    python3 test/ipb/hd_control_simulator_test.py
+
+    The exit code is 0 if the test passes. The exit code is not 0 if the test fails.
+"""
+
+import sys
+
+from concurrent.futures import wait
+from pathlib import Path
+from time import monotonic, perf_counter, sleep
+
+sys.path.append(str(Path(__file__).resolve().parents[2]))  # The root of the repository.
+
+from modules.ipb.high_spec_dryer_control import HD_control  # noqa: E402
+from modules.ipb.ipb_simulator import (  # noqa: E402
+    IpbSimulator,
+    MACHINE_STATUS_ERD,
+    MACHINE_SUBSTATUS_ERD,
+    SELECTED_CYCLE_ERD,
+    TEST_MODE_ERD,
+)
+from PythonCommsBusHijack.erd_lib import ERDLib  # noqa: E402
+
+
+NUM_LOAD_TEST_READS = 2000
+LOAD_TEST_ERDS = (MACHINE_STATUS_ERD, MACHINE_SUBSTATUS_ERD, SELECTED_CYCLE_ERD)  # Read in turn.
+CRC_ERROR_RATE = 0.02
+DRAIN_QUIET_TIME = 0.5  # Seconds the port must stay empty before everything the simulator sent counts as read.
+
+
+def verify_commands(dryer_control: HD_control):
+    """Verify reads, writes, and cap touch commands are answered.
+
+    Args:
+        dryer_control (HD_control): The dryer control connected to the simulator.
+    """
+    status, substatus, cycle = [future.result(timeout=5) for future in dryer_control.get_machine_state(timeout=5)]
+    assert status.data == b"\x01"
+    assert substatus.data == b"\x00"
+    assert cycle.data == b"\x01"
+
+    dryer_control.dryer_start_pause()
+    dryer_control.wait_for_machine_status("run", timeout=5, request_interval=0.5)
+
+    dryer_control.enable_test_mode()
+    assert dryer_control.read_erd(TEST_MODE_ERD, timeout=5).result().data == b"\x01"
+
+    start_time = perf_counter()
+    dryer_control.fast_forward_to_complete(schedule=[(50, 0.1), (0, 0.0)], timeout=5)
+    print(f"Fast forwarded to the end of the cycle in {perf_counter() - start_time:.2f} s")
+
+
+def load_test(dryer_control: HD_control, simulator: IpbSimulator):
+    """Send many read requests for several ERDs back to back, check each is answered with its own ERD, and report how
+    fast they are answered.
+
+    Args:
+        dryer_control (HD_control): The dryer control connected to the simulator.
+        simulator (IpbSimulator): The simulator.
+    """
+    # Give every ERD a different value, so an answer given to the wrong request is caught.
+    simulator.set_erd(MACHINE_SUBSTATUS_ERD, b"\x0a", publish=False)
+    simulator.set_erd(SELECTED_CYCLE_ERD, b"\x07", publish=False)
+    expected_data = {erd_id: simulator.erd_values[erd_id] for erd_id in LOAD_TEST_ERDS}
+    assert len(set(expected_data.values())) == len(LOAD_TEST_ERDS)
+
+    start_time = perf_counter()
+    erd_ids = [LOAD_TEST_ERDS[number % len(LOAD_TEST_ERDS)] for number in range(NUM_LOAD_TEST_READS)]
+    requests = [(erd_id, dryer_control.read_erd(erd_id, timeout=5)) for erd_id in erd_ids]
+    done, not_done = wait([future for _, future in requests], timeout=30)
+    elapsed = perf_counter() - start_time
+
+    for erd_id, future in requests:
+        if future in done and future.exception() is None:
+            assert future.result().erd_id == erd_id
+            assert future.result().data == expected_data[erd_id]
+
+    answered = sum(1 for future in done if future.exception() is None)
+    print(f"{answered}/{NUM_LOAD_TEST_READS} reads answered in {elapsed:.2f} s ({answered / elapsed:.0f} reads/s)")
+
+    # A read fails only if every answer to it was corrupted, so nearly all of them must succeed.
+    assert not not_done
+    assert answered >= NUM_LOAD_TEST_READS * (1 - 2 * CRC_ERROR_RATE)
+
+
+def wait_until_drained(dryer_control: HD_control, timeout: float = 5):
+    """Wait until the reader has read everything waiting on the port.
+
+    Args:
+        dryer_control (HD_control): The dryer control connected to the simulator.
+        timeout (float): Seconds to wait before giving up.
+    """
+    deadline = monotonic() + timeout
+    quiet_since = monotonic()
+
+    while monotonic() - quiet_since < DRAIN_QUIET_TIME:
+        assert monotonic() < deadline, "The reader did not drain the port"
+
+        if dryer_control.com.in_waiting:
+            quiet_since = monotonic()
+
+        sleep(0.05)
+
+
+if __name__ == "__main__":
+    with IpbSimulator(publish_rate=10, crc_error_rate=CRC_ERROR_RATE, seed=1) as simulator:
+        dryer_control = HD_control(simulator.port, ERDLib())
+        dryer_control.start_reader()
+
+        try:
+            verify_commands(dryer_control)
+            load_test(dryer_control, simulator)
+        finally:
+            # Stop the simulator first, so every frame it sent (and every CRC error it injected) reaches the reader
+            # before the counts are compared.
+            simulator.stop()
+            wait_until_drained(dryer_control)
+            dryer_control.stop_reader()
+
+        print(
+            f"Simulator sent {simulator.frames_sent} frames with {simulator.crc_errors_injected} CRC errors; "
+            f"the reader saw {dryer_control.frame_parser.crc_errors} CRC errors"
+        )
+
+        assert dryer_control.frame_parser.crc_errors >= simulator.crc_errors_injected
+
+    print("Test passed!")